@@ -31,6 +31,7 @@ class MMDToolsHelperPanel(bpy.types.Panel):
 # 导入子模块
 from . import (
     model,
+    mmd_logging,
     mmd_view,
     mmd_lamp_setup,
     convert_to_blender_camera,
@@ -45,11 +46,42 @@ from . import (
     toon_modifier,
     reverse_japanese_english,
     miscellaneous_tools,
-    blender_bone_names_to_japanese_bone_names
+    blender_bone_names_to_japanese_bone_names,
+    vertex_weights,
+    vertex_group_cleanup,
+    weight_limiter,
+    datablock_dedup,
+    texture_atlas,
+    performance_mode,
+    proxy_meshes,
+    apply_rest_pose,
+    shape_key_audit,
+    helper_bone_pruning,
+    depsgraph_profiler,
+    ik_tuning,
+    physics_optimizer,
+    physics_cache,
+    pmx_reader,
+    rig_detection,
+    pmx_index,
+    pmx_catalog,
+    action_retarget,
+    rename_index,
+    name_translation,
+    translate_names,
+    bone_name_matcher,
+    bone_dictionaries,
+    dictionary_cache,
+    rig_topology,
+    topology_match,
+    armature_diff,
+    armature_compare,
+    toon_vertex_colors
 )
 
 # 使用importlib.reload替代imp.reload
 importlib.reload(model)
+importlib.reload(mmd_logging)
 importlib.reload(mmd_view)
 importlib.reload(mmd_lamp_setup)
 importlib.reload(convert_to_blender_camera)
@@ -65,12 +97,44 @@ importlib.reload(toon_modifier)
 importlib.reload(reverse_japanese_english)
 importlib.reload(miscellaneous_tools)
 importlib.reload(blender_bone_names_to_japanese_bone_names)
+importlib.reload(vertex_weights)
+importlib.reload(vertex_group_cleanup)
+importlib.reload(weight_limiter)
+importlib.reload(datablock_dedup)
+importlib.reload(texture_atlas)
+importlib.reload(performance_mode)
+importlib.reload(proxy_meshes)
+importlib.reload(apply_rest_pose)
+importlib.reload(shape_key_audit)
+importlib.reload(helper_bone_pruning)
+importlib.reload(depsgraph_profiler)
+importlib.reload(ik_tuning)
+importlib.reload(physics_optimizer)
+importlib.reload(physics_cache)
+importlib.reload(pmx_reader)
+importlib.reload(rig_detection)
+importlib.reload(pmx_index)
+importlib.reload(pmx_catalog)
+importlib.reload(action_retarget)
+importlib.reload(rename_index)
+importlib.reload(name_translation)
+importlib.reload(translate_names)
+importlib.reload(bone_name_matcher)
+importlib.reload(bone_dictionaries)
+importlib.reload(dictionary_cache)
+importlib.reload(rig_topology)
+importlib.reload(topology_match)
+importlib.reload(armature_diff)
+importlib.reload(armature_compare)
+importlib.reload(toon_vertex_colors)
 
 
 def register():
     bpy.utils.register_class(MMDToolsHelperPanel)
     # 确保子模块中的类也被注册
     #model.register()
+    mmd_logging.register()
+    bone_dictionaries.register()  # 骨架类型枚举依赖覆盖字典目录，需先于其他模块注册
     mmd_view.register()
     mmd_lamp_setup.register()
     convert_to_blender_camera.register()
@@ -86,6 +150,25 @@ def register():
     reverse_japanese_english.register()
     miscellaneous_tools.register()
     blender_bone_names_to_japanese_bone_names.register()
+    vertex_group_cleanup.register()
+    weight_limiter.register()
+    datablock_dedup.register()
+    texture_atlas.register()
+    performance_mode.register()
+    proxy_meshes.register()
+    apply_rest_pose.register()
+    shape_key_audit.register()
+    helper_bone_pruning.register()
+    depsgraph_profiler.register()
+    ik_tuning.register()
+    physics_optimizer.register()
+    physics_cache.register()
+    pmx_catalog.register()
+    action_retarget.register()
+    translate_names.register()
+    topology_match.register()
+    armature_compare.register()
+    toon_vertex_colors.register()
 
 
 def unregister():
@@ -107,6 +190,27 @@ def unregister():
     reverse_japanese_english.unregister()
     miscellaneous_tools.unregister()
     blender_bone_names_to_japanese_bone_names.unregister()
+    vertex_group_cleanup.unregister()
+    weight_limiter.unregister()
+    datablock_dedup.unregister()
+    texture_atlas.unregister()
+    performance_mode.unregister()
+    proxy_meshes.unregister()
+    apply_rest_pose.unregister()
+    shape_key_audit.unregister()
+    helper_bone_pruning.unregister()
+    depsgraph_profiler.unregister()
+    ik_tuning.unregister()
+    physics_optimizer.unregister()
+    physics_cache.unregister()
+    pmx_catalog.unregister()
+    action_retarget.unregister()
+    translate_names.unregister()
+    bone_dictionaries.unregister()
+    topology_match.unregister()
+    armature_compare.unregister()
+    toon_vertex_colors.unregister()
+    mmd_logging.unregister()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,250 @@
+import bpy
+import re
+import numpy as np
+from . import model
+from . import mmd_logging
+from . import rig_detection
+from . import bone_dictionaries
+
+# F 曲线中的骨骼路径：pose.bones["name"].属性
+POSE_BONE_PATH = re.compile(r'^pose\.bones\["((?:[^"\\]|\\.)*)"\](.*)$')
+# 合并 F 曲线时整体复制的关键帧属性：(属性, 分量数, 类型)；枚举属性按整数读写
+KEYFRAME_ATTRS = (
+    ("co", 2, np.float32), ("handle_left", 2, np.float32), ("handle_right", 2, np.float32),
+    ("interpolation", 1, np.int32), ("handle_left_type", 1, np.int32), ("handle_right_type", 1, np.int32),
+    ("easing", 1, np.int32), ("back", 1, np.float32), ("amplitude", 1, np.float32), ("period", 1, np.float32),
+)
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class ActionRetargetPanel(bpy.types.Panel):
+    """按骨骼字典把动作的 F 曲线改指向另一种骨架类型的骨骼"""
+    bl_idname = "OBJECT_PT_mmd_action_retarget"
+    bl_label = "Action Retarget"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.label(text="Retarget Actions Between Rig Types", icon="ACTION")
+        layout.prop(scene, "retarget_from", text="From")
+        layout.prop(scene, "retarget_to", text="To")
+        layout.prop(scene, "retarget_scope", text="")
+        if scene.retarget_scope == 'MATCHING':
+            layout.prop(scene, "retarget_name_filter")
+        layout.prop(scene, "retarget_unmapped", text="Unmapped")
+        layout.operator("mmd_tools_helper.action_retarget", text="Retarget Actions")
+
+
+# ------------------------------
+# 2. 核心逻辑
+# ------------------------------
+def target_actions(context):
+    scene = context.scene
+    if scene.retarget_scope == 'ACTIVE':
+        active_obj = context.view_layer.objects.active
+        armature_obj = model.findArmature(active_obj) if active_obj else None
+        anim = armature_obj.animation_data if armature_obj else None
+        return [anim.action] if anim and anim.action else []
+    if scene.retarget_scope == 'MATCHING':
+        return [a for a in bpy.data.actions if scene.retarget_name_filter in a.name]
+    return list(bpy.data.actions)
+
+
+def read_keyframes(fcurve):
+    points = fcurve.keyframe_points
+    values = {}
+    for attr, size, dtype in KEYFRAME_ATTRS:
+        values[attr] = np.empty(len(points) * size, dtype=dtype)
+        points.foreach_get(attr, values[attr])
+        values[attr] = values[attr].reshape(len(points), size)
+    return values
+
+
+def merge_fcurve(action, source, target):
+    """把 source 中 target 没有的关键帧（含控制柄、插值、缓动）并入 target，然后删除 source"""
+    old = read_keyframes(target)
+    new = read_keyframes(source)
+    count = len(old["co"])
+    extra = ~np.isin(np.round(new["co"][:, 0], 3), np.round(old["co"][:, 0], 3))
+    if extra.any():
+        combined = {attr: np.concatenate([old[attr], new[attr][extra]]) for attr in old}
+        order = np.argsort(combined["co"][:, 0], kind="stable")
+        points = target.keyframe_points
+        points.add(int(extra.sum()))
+        for attr, values in combined.items():
+            points.foreach_set(attr, values[order].ravel())
+        if count == 0:  # target 原本没有关键帧时沿用 source 的外插方式
+            target.extrapolation = source.extrapolation
+        target.update()
+    action.fcurves.remove(source)
+
+
+def retarget_action(action, mapping, drop_unmapped):
+    """返回 (改名数, 合并数, 删除数)
+    全部新路径先一次算出、同时生效（左右互换、A→B→C 连锁不会互相覆盖）；
+    只有新路径上已有且不会被改名的 F 曲线才作为合并目标"""
+    target_names = set(mapping.values())  # 已是目标命名的通道不算未映射
+    doomed = []
+    moves = {}   # {id(F 曲线): (新路径, 原骨骼名称, 目标骨骼名称)}
+    final = {}   # {(最终路径, 索引): [F 曲线, ...]}，每组第一个为保留的 F 曲线
+    for fcurve in action.fcurves:
+        path = fcurve.data_path
+        match = POSE_BONE_PATH.match(path)
+        if match is not None:
+            bone_name = bpy.utils.unescape_identifier(match.group(1))
+            target_name = mapping.get(bone_name)
+            if target_name is None:
+                if drop_unmapped and bone_name not in target_names:
+                    doomed.append(fcurve)
+                    continue
+            elif target_name != bone_name:
+                path = f'pose.bones["{bpy.utils.escape_identifier(target_name)}"]{match.group(2)}'
+                moves[id(fcurve)] = (path, bone_name, target_name)
+        curves = final.setdefault((path, fcurve.array_index), [])
+        if path == fcurve.data_path:
+            curves.insert(0, fcurve)  # 不改名的 F 曲线优先保留
+        else:
+            curves.append(fcurve)
+
+    # 两种命名的通道同时存在（或多个源骨骼映射到同一目标）：合并关键帧
+    merged = renamed = 0
+    regroup = []
+    for curves in final.values():
+        fcurve = curves[0]
+        for source in curves[1:]:
+            merge_fcurve(action, source, fcurve)
+            merged += 1
+        if id(fcurve) not in moves:
+            continue
+        path, bone_name, target_name = moves[id(fcurve)]
+        fcurve.data_path = path
+        if fcurve.group is not None and fcurve.group.name == bone_name:
+            regroup.append((fcurve, target_name))
+        renamed += 1
+    # 通道组在全部改名之后再调整（连锁改名时不能直接给原组改名）
+    for fcurve, target_name in regroup:
+        group = action.groups.get(target_name) or action.groups.new(target_name)
+        if fcurve.group != group:
+            fcurve.group = group
+
+    for fcurve in doomed:
+        action.fcurves.remove(fcurve)
+    dropped = len(doomed)
+    # 清理改名/合并后留下的空通道组
+    for group in list(action.groups):
+        if not group.channels:
+            action.groups.remove(group)
+    return renamed, merged, dropped
+
+
+def main(context):
+    scene = context.scene
+    source_type, target_type = scene.retarget_from, scene.retarget_to
+    if source_type == target_type:
+        raise Exception("源骨架类型和目标骨架类型相同")
+    mapping = rig_detection.rename_map(source_type, target_type)
+    if not mapping:
+        raise Exception(f"骨骼字典中没有 {source_type} → {target_type} 的映射")
+
+    actions = target_actions(context)
+    if not actions:
+        raise Exception("没有要处理的动作")
+
+    drop_unmapped = scene.retarget_unmapped == 'DROP'
+    totals = [0, 0, 0]
+    for action in actions:
+        result = retarget_action(action, mapping, drop_unmapped)
+        totals = [t + r for t, r in zip(totals, result)]
+        if any(result):
+            mmd_logging.debug(f"{action.name}: 改名 {result[0]}，合并 {result[1]}，删除 {result[2]}")
+    mmd_logging.info(
+        f"{source_type} → {target_type}：{len(actions)} 个动作，改名 {totals[0]} 条 F 曲线，"
+        f"合并 {totals[1]}，删除 {totals[2]}"
+    )
+    return len(actions), totals[0]
+
+
+# ------------------------------
+# 3. 操作器类
+# ------------------------------
+class ActionRetarget(bpy.types.Operator):
+    """用骨骼字典一次性改写动作中 pose.bones["..."] 的数据路径"""
+    bl_idname = "mmd_tools_helper.action_retarget"
+    bl_label = "Retarget Actions"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Action Retarget", context.scene):
+                action_count, renamed = main(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Retargeted {renamed} F-curves in {action_count} actions")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 4. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.retarget_from = bpy.props.EnumProperty(
+        items=bone_dictionaries.rig_type_items,
+        name="Retarget From",
+        default=bone_dictionaries.rig_type_index('mmd_japanese')
+    )
+    bpy.types.Scene.retarget_to = bpy.props.EnumProperty(
+        items=bone_dictionaries.rig_type_items,
+        name="Retarget To",
+        default=bone_dictionaries.rig_type_index('mmd_english')
+    )
+    bpy.types.Scene.retarget_scope = bpy.props.EnumProperty(
+        items=[
+            ('ACTIVE', 'Active Armature Action', '只处理当前骨架的动作'),
+            ('MATCHING', 'Actions Matching Name', '处理名称包含指定文本的动作'),
+            ('ALL', 'All Actions', '处理文件中的全部动作'),
+        ],
+        name="Actions",
+        default='ACTIVE'
+    )
+    bpy.types.Scene.retarget_name_filter = bpy.props.StringProperty(
+        name="Name Contains",
+        default=""
+    )
+    bpy.types.Scene.retarget_unmapped = bpy.props.EnumProperty(
+        items=[
+            ('KEEP', 'Keep', '保留字典中没有映射的骨骼通道'),
+            ('DROP', 'Drop', '删除字典中没有映射的骨骼通道'),
+        ],
+        name="Unmapped Channels",
+        default='KEEP'
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("retarget_from", "retarget_to", "retarget_scope", "retarget_name_filter", "retarget_unmapped"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(ActionRetargetPanel)
+    bpy.utils.register_class(ActionRetarget)
+
+
+def unregister():
+    bpy.utils.unregister_class(ActionRetarget)
+    bpy.utils.unregister_class(ActionRetargetPanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,198 @@
+import bpy
+import numpy as np
+from . import model
+from . import mmd_logging
+from . import vertex_weights
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class ApplyRestPosePanel(bpy.types.Panel):
+    """把当前姿态应用为静止姿态（网格含形态键也可以，例如 A-pose 转 T-pose）"""
+    bl_idname = "OBJECT_PT_mmd_apply_rest_pose"
+    bl_label = "MMD Apply Pose as Rest"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        layout.label(text="Apply Pose as Rest (with Shape Keys)", icon="ARMATURE_DATA")
+        row = layout.row()
+        row.operator("mmd_tools_helper.apply_rest_pose", text="Apply Pose as Rest")
+        row.enabled = context.active_object is not None
+
+
+# ------------------------------
+# 2. 线性混合蒙皮（NumPy）
+# ------------------------------
+def matrix_to_numpy(matrix):
+    return np.array([list(row) for row in matrix], dtype=np.float64)
+
+
+def bone_deform_matrices(armature_obj):
+    """每根骨骼的变形矩阵（骨架空间）：pose.matrix @ bone.matrix_local⁻¹，返回 (名称列表, (B, 4, 4))"""
+    names = []
+    matrices = []
+    for pose_bone in armature_obj.pose.bones:
+        names.append(pose_bone.name)
+        matrices.append(matrix_to_numpy(pose_bone.matrix @ pose_bone.bone.matrix_local.inverted()))
+    return names, np.array(matrices, dtype=np.float64).reshape(-1, 4, 4)
+
+
+def vertex_blend_matrices(mesh_obj, armature_obj, bone_names, bone_matrices):
+    """每个顶点的混合矩阵 (V, 3, 4)；无变形权重的顶点为单位矩阵（与骨架修改器一致）"""
+    counts, groups, weights = vertex_weights.read_weights(mesh_obj)
+    vertex_count = len(counts)
+    blend = np.zeros((vertex_count, 12), dtype=np.float64)
+    identity = np.eye(4)[:3].reshape(12)
+    if len(groups) == 0:
+        blend[:] = identity
+        return blend.reshape(-1, 3, 4)
+
+    # 网格空间 ↔ 骨架空间
+    to_arm = matrix_to_numpy(armature_obj.matrix_world.inverted() @ mesh_obj.matrix_world)
+    from_arm = np.linalg.inv(to_arm)
+    local = np.einsum("ij,bjk,kl->bil", from_arm, bone_matrices, to_arm)[:, :3, :].reshape(-1, 12)
+
+    # 顶点组索引 → 变形骨骼索引（非骨骼/非变形顶点组为 -1）
+    bone_index = {name: i for i, name in enumerate(bone_names)}
+    deform = {b.name for b in armature_obj.data.bones if b.use_deform}
+    group_bone = np.array(
+        [bone_index[vg.name] if vg.name in deform else -1 for vg in mesh_obj.vertex_groups],
+        dtype=np.int64,
+    )
+
+    vert = vertex_weights.vertex_indices(counts)
+    bone = group_bone[groups]
+    valid = (bone >= 0) & (weights > 0)
+    vert, bone, w = vert[valid], bone[valid], weights[valid].astype(np.float64)
+
+    total = np.bincount(vert, weights=w, minlength=vertex_count)
+    for c in range(12):
+        blend[:, c] = np.bincount(vert, weights=w * local[bone, c], minlength=vertex_count)
+
+    weighted = total > 0
+    blend[weighted] /= total[weighted][:, None]
+    blend[~weighted] = identity
+    return blend.reshape(-1, 3, 4)
+
+
+def deform_coords(blend, coords):
+    """v' = M[:, :3, :3] · v + M[:, :3, 3]"""
+    return np.einsum("vij,vj->vi", blend[:, :, :3], coords) + blend[:, :, 3]
+
+
+def read_coords(collection):
+    coords = np.empty(len(collection) * 3, dtype=np.float32)
+    collection.foreach_get("co", coords)
+    return coords.reshape(-1, 3).astype(np.float64)
+
+
+def write_coords(collection, coords):
+    collection.foreach_set("co", coords.astype(np.float32).ravel())
+
+
+def armature_modifier(mesh_obj, armature_obj):
+    return next(
+        (m for m in mesh_obj.modifiers if m.type == 'ARMATURE' and m.object == armature_obj),
+        None,
+    )
+
+
+def bake_mesh(mesh_obj, armature_obj, bone_names, bone_matrices):
+    """把当前姿态烘焙到基础形状和全部形态键，返回处理的形态键数量"""
+    mod = armature_modifier(mesh_obj, armature_obj)
+    if mod is None:
+        return None
+    if mod.use_deform_preserve_volume:
+        mmd_logging.warning(f"{mesh_obj.name}: 骨架修改器启用了保持体积（双四元数），这里按线性混合计算")
+    if mod.use_bone_envelopes:
+        mmd_logging.warning(f"{mesh_obj.name}: 骨架修改器的封套变形不会被烘焙")
+
+    blend = vertex_blend_matrices(mesh_obj, armature_obj, bone_names, bone_matrices)
+    mesh = mesh_obj.data
+    write_coords(mesh.vertices, deform_coords(blend, read_coords(mesh.vertices)))
+
+    # 形态键：每个键的绝对坐标用同一组顶点矩阵变换（线性混合对位移同样成立）
+    key_count = 0
+    if mesh.shape_keys:
+        for block in mesh.shape_keys.key_blocks:
+            write_coords(block.data, deform_coords(blend, read_coords(block.data)))
+            key_count += 1
+    mesh.update()
+    return key_count
+
+
+# ------------------------------
+# 3. 主流程
+# ------------------------------
+def main(context):
+    view_layer = context.view_layer
+    active_obj = view_layer.objects.active
+    armature_obj = model.findArmature(active_obj)
+    if not (armature_obj and armature_obj.type == 'ARMATURE'):
+        raise Exception("未找到有效的骨架对象")
+    mesh_objects_list = model.find_MMD_MeshesList(active_obj) or model.findMeshesList(armature_obj)
+
+    if context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    # 1. 读取当前姿态下的骨骼变形矩阵（含约束求值结果）
+    bone_names, bone_matrices = bone_deform_matrices(armature_obj)
+
+    # 2. 逐网格批量烘焙基础形状和形态键
+    for mesh_obj in mesh_objects_list:
+        key_count = bake_mesh(mesh_obj, armature_obj, bone_names, bone_matrices)
+        if key_count is None:
+            mmd_logging.warning(f"{mesh_obj.name}: 没有指向 {armature_obj.name} 的骨架修改器，跳过")
+            continue
+        mmd_logging.info(f"{mesh_obj.name}: {len(mesh_obj.data.vertices)} 个顶点，{key_count} 个形态键")
+
+    # 3. 把姿态应用为骨架的静止姿态
+    view_layer.objects.active = armature_obj
+    bpy.ops.object.mode_set(mode='POSE')
+    bpy.ops.pose.select_all(action='SELECT')
+    bpy.ops.pose.armature_apply(selected=False)
+    bpy.ops.object.mode_set(mode='OBJECT')
+    return len(mesh_objects_list)
+
+
+# ------------------------------
+# 4. 操作器类
+# ------------------------------
+class ApplyRestPose(bpy.types.Operator):
+    """用 NumPy 线性混合蒙皮把当前姿态烘焙到网格（含形态键），再应用为骨架静止姿态"""
+    bl_idname = "mmd_tools_helper.apply_rest_pose"
+    bl_label = "Apply Pose as Rest"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Apply Pose as Rest", context.scene):
+                count = main(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Applied pose as rest for {count} meshes")
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(ApplyRestPosePanel)
+    bpy.utils.register_class(ApplyRestPose)
+
+
+def unregister():
+    bpy.utils.unregister_class(ApplyRestPose)
+    bpy.utils.unregister_class(ApplyRestPosePanel)
+
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,181 @@
+import bpy
+import os
+import sys
+import json
+from . import model
+from . import mmd_logging
+from . import armature_diff
+from . import topology_match
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class ArmatureDiffPanel(bpy.types.Panel):
+    """比较当前骨架与基准骨架（新增、删除、改名、改父骨骼、移动、扭转）"""
+    bl_idname = "OBJECT_PT_mmd_armature_diff"
+    bl_label = "Armature Diff"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.label(text="Compare Active Armature with Base", icon="OUTLINER_OB_ARMATURE")
+        layout.prop(scene, "armature_diff_base")
+        layout.prop(scene, "armature_diff_tolerance")
+        layout.prop(scene, "armature_diff_structure")
+        layout.prop(scene, "armature_diff_json_path")
+        row = layout.row()
+        row.operator("mmd_tools_helper.armature_diff", text="Compare Armatures")
+        row.enabled = context.active_object is not None and scene.armature_diff_base is not None
+
+
+# ------------------------------
+# 2. 核心逻辑
+# ------------------------------
+def snapshot(armature_obj):
+    return topology_match.skeleton_from_armature(armature_obj, rolls=True)
+
+
+def blend_skeleton(path):
+    """读取 .blend 文件中骨骼最多的骨架数据块，取快照后移除（只载入骨架数据块，不留下孤立数据）"""
+    with bpy.data.libraries.load(path) as (data_from, data_to):
+        data_to.armatures = list(data_from.armatures)
+    armatures = [arm for arm in data_to.armatures if arm is not None]
+    try:
+        if not armatures:
+            raise ValueError(f"{path} 中没有骨架")
+        return topology_match.skeleton_from_bones(max(armatures, key=lambda arm: len(arm.bones)).bones, rolls=True)
+    finally:
+        for arm in armatures:
+            bpy.data.armatures.remove(arm)
+
+
+def file_skeleton(path):
+    if os.path.splitext(path)[1].lower() == ".blend":
+        return blend_skeleton(path)
+    return armature_diff.pmx_skeleton(path)
+
+
+def log_report(result):
+    for name in result["added"]:
+        mmd_logging.info(f"新增：{name}")
+    for name in result["removed"]:
+        mmd_logging.warning(f"删除：{name}")
+    for item in result["renamed"]:
+        mmd_logging.info(f"改名：{item['old']} → {item['new']}")
+    for item in result["reparented"]:
+        mmd_logging.warning(f"改父骨骼：{item['bone']}（{item['old_parent']} → {item['new_parent']}）")
+    for item in result["moved"]:
+        mmd_logging.info(f"移动：{item['bone']} 头部 {item['head_delta']} 尾部 {item['tail_delta']}")
+    for item in result["rolled"]:
+        mmd_logging.info(f"扭转：{item['bone']} {item['delta']:+.4f}")
+    mmd_logging.info(armature_diff.summary_text(result))
+
+
+def main(context):
+    scene = context.scene
+    armature_obj = model.findArmature(context.active_object)
+    base_obj = scene.armature_diff_base
+    if armature_obj is None or armature_obj.type != 'ARMATURE':
+        raise Exception("未找到骨架对象")
+    if base_obj is None or base_obj.type != 'ARMATURE':
+        raise Exception("请选择基准骨架")
+
+    result = armature_diff.diff(
+        snapshot(base_obj), snapshot(armature_obj),
+        position_tolerance=scene.armature_diff_tolerance,
+        match_structure=scene.armature_diff_structure,
+    )
+    log_report(result)
+    if scene.armature_diff_json_path:
+        with open(bpy.path.abspath(scene.armature_diff_json_path), "w", encoding="utf-8") as f:
+            json.dump({"old": base_obj.name, "new": armature_obj.name, "diff": result}, f, ensure_ascii=False, indent=1)
+    return result
+
+
+def cli():
+    """命令行批量比较 .blend / .pmx 文件对：
+    blender -b --python-expr "import mmd_tools_helper.armature_compare as m; m.cli()" -- old.blend new.blend [...]"""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    armature_diff.run(armature_diff.parse_args(argv), file_skeleton)
+
+
+# ------------------------------
+# 3. 操作器类
+# ------------------------------
+class ArmatureDiff(bpy.types.Operator):
+    """先按名称、再按结构对应骨骼，列出当前骨架相对基准骨架的变化"""
+    bl_idname = "mmd_tools_helper.armature_diff"
+    bl_label = "Armature Diff"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Armature Diff", context.scene):
+                result = main(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        if armature_diff.is_empty(result):
+            self.report({'INFO'}, "Armatures are identical")
+        else:
+            self.report({'INFO'}, armature_diff.summary_text(result))
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 4. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.armature_diff_base = bpy.props.PointerProperty(
+        type=bpy.types.Object,
+        name="Base",
+        description="作为比较基准的骨架（旧版本）",
+        poll=lambda self, obj: obj.type == 'ARMATURE'
+    )
+    bpy.types.Scene.armature_diff_tolerance = bpy.props.FloatProperty(
+        name="Tolerance",
+        description="位置变化小于骨架高度的此比例时忽略",
+        default=armature_diff.POSITION_TOLERANCE,
+        min=0.0,
+        max=0.1,
+        precision=5
+    )
+    bpy.types.Scene.armature_diff_structure = bpy.props.BoolProperty(
+        name="Match by Structure",
+        description="名称不同但父骨骼和位置相同的骨骼视为改名",
+        default=True
+    )
+    bpy.types.Scene.armature_diff_json_path = bpy.props.StringProperty(
+        name="JSON",
+        description="把完整结果写入 JSON 文件（留空则只输出到控制台）",
+        default="",
+        subtype='FILE_PATH'
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("armature_diff_base", "armature_diff_tolerance", "armature_diff_structure", "armature_diff_json_path"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(ArmatureDiffPanel)
+    bpy.utils.register_class(ArmatureDiff)
+
+
+def unregister():
+    bpy.utils.unregister_class(ArmatureDiff)
+    bpy.utils.unregister_class(ArmatureDiffPanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()
@@ -1,6 +1,10 @@
 import bpy
-from . import import_csv  # 需确保同目录下有 import_csv.py 模块
+import os
 from . import model       # 需确保同目录下有 model.py 模块（含 findArmature 函数）
+from . import mmd_logging
+from . import pmx_reader
+from . import rig_detection
+from . import bone_dictionaries
 
 
 # ------------------------------
@@ -35,6 +39,11 @@ class ArmatureDiagnosticPanel(bpy.types.Panel):
         # 按钮可用性控制：仅选中对象时启用（避免空对象报错）
         row.enabled = bool(view_layer.objects.active)
 
+        # 4. 不导入模型，直接诊断 PMX 文件
+        layout.separator()
+        layout.prop(scene, "pmx_diagnose_path", text="")
+        layout.operator("mmd_tools_helper.diagnose_pmx", text="Diagnose PMX Files")
+
 
 # ------------------------------
 # 2. 核心诊断逻辑（修复活跃对象获取路径）
@@ -46,18 +55,17 @@ def main(context):
 
     # 1. 读取 CSV 骨骼字典（容错处理：避免模块缺失或读取失败导致崩溃）
     try:
-        BONE_NAMES_DICTIONARY = import_csv.use_csv_bones_dictionary()
-        FINGER_BONE_NAMES_DICTIONARY = import_csv.use_csv_bones_fingers_dictionary()
+        BONE_NAMES_DICTIONARY, FINGER_BONE_NAMES_DICTIONARY = rig_detection.dictionaries()
     except Exception as e:
-        print(f"【错误】读取骨骼字典失败：{str(e)}")
+        mmd_logging.error(f"读取骨骼字典失败：{str(e)}")
         return
 
     # 2. 验证字典格式（首行需为骨骼类型列表）
     if not (isinstance(BONE_NAMES_DICTIONARY, list) and len(BONE_NAMES_DICTIONARY) > 0):
-        print("【错误】普通骨骼字典格式无效（需为非空列表）")
+        mmd_logging.error("普通骨骼字典格式无效（需为非空列表）")
         return
     if not (isinstance(FINGER_BONE_NAMES_DICTIONARY, list) and len(FINGER_BONE_NAMES_DICTIONARY) > 0):
-        print("【错误】手指骨骼字典格式无效（需为非空列表）")
+        mmd_logging.error("手指骨骼字典格式无效（需为非空列表）")
         return
 
     # 3. 获取选中的骨骼类型及索引（容错：避免类型不存在导致崩溃）
@@ -66,56 +74,90 @@ def main(context):
         BoneMapIndex = BONE_NAMES_DICTIONARY[0].index(SelectedBoneMap)
         FingerBoneMapIndex = FINGER_BONE_NAMES_DICTIONARY[0].index(SelectedBoneMap)
     except ValueError:
-        print(f"【错误】选中的骨骼类型「{SelectedBoneMap}」不在字典中")
+        mmd_logging.error(f"选中的骨骼类型「{SelectedBoneMap}」不在字典中")
         return
 
     # 4. 找到并激活骨架对象（依赖 model.findArmature 函数）
     active_obj = view_layer.objects.active  # 从视图层拿活跃对象（而非 scene）
     armature_obj = model.findArmature(active_obj)
     if not (armature_obj and armature_obj.type == "ARMATURE"):
-        print("【错误】未找到有效骨架对象（选中对象或其关联对象需为骨架）")
+        mmd_logging.error("未找到有效骨架对象（选中对象或其关联对象需为骨架）")
         return
     view_layer.objects.active = armature_obj  # 在视图层中激活骨架（关键修复）
 
-    # 5. 检测普通骨骼是否缺失
-    for bone_entry in BONE_NAMES_DICTIONARY[1:]:  # 跳过首行（骨骼类型列表）
-        # 避免索引越界（容错：处理字典行长度不一致的情况）
-        if len(bone_entry) <= BoneMapIndex:
-            continue
-        target_bone = bone_entry[BoneMapIndex]
-        # 跳过空名称和排除列表（原逻辑保留）
-        if (target_bone != "" 
-            and target_bone not in ["upper body 2", "上半身2"]
-            and target_bone not in armature_obj.data.bones):
-            missing_bone_names.append(target_bone)
-
-    # 6. 检测手指骨骼是否缺失
-    for finger_entry in FINGER_BONE_NAMES_DICTIONARY[1:]:  # 跳过首行
-        if len(finger_entry) <= FingerBoneMapIndex:
-            continue
-        target_finger_bone = finger_entry[FingerBoneMapIndex]
-        if (target_finger_bone != ""
-            and target_finger_bone not in ["thumb0_L", "thumb0_R", "左親指0", "親指0.L", "右親指0", "親指0.R"]
-            and target_finger_bone not in armature_obj.data.bones):
-            missing_bone_names.append(target_finger_bone)
-
-    # 7. 打印诊断结果（优化格式，便于阅读）
-    print("\n" + "="*50)
-    print(f"【骨架诊断结果】选中的骨骼类型：{SelectedBoneMap}")
-    print(f"【缺失骨骼列表】共 {len(missing_bone_names)} 个缺失骨骼：")
+    # 5-6. 检测普通骨骼和手指骨骼是否缺失
+    missing_bones, missing_fingers = rig_detection.missing_bones(armature_obj.data.bones.keys(), SelectedBoneMap)
+    missing_bone_names = missing_bones + missing_fingers
+
+    # 7. 打印诊断结果
+    log_diagnostic(SelectedBoneMap, missing_bone_names, armature_obj.data.bones.keys())
+
+
+def log_diagnostic(SelectedBoneMap, missing_bone_names, bone_names=()):
+    """打印诊断结果（优化格式，便于阅读）；缺失骨骼有模糊匹配候选时一并列出"""
+    candidates = rig_detection.resolve_bone_names(bone_names, SelectedBoneMap) if bone_names else {}
+    mmd_logging.info(f"【骨架诊断结果】选中的骨骼类型：{SelectedBoneMap}")
+    mmd_logging.info(f"【缺失骨骼列表】共 {len(missing_bone_names)} 个缺失骨骼：")
     if missing_bone_names:
         for idx, bone in enumerate(missing_bone_names, 1):
-            print(f"  {idx}. {bone}")
+            if bone in candidates:
+                actual, confidence = candidates[bone]
+                mmd_logging.info(f"  {idx}. {bone}（可能对应「{actual}」，置信度 {confidence:.2f}）")
+            else:
+                mmd_logging.info(f"  {idx}. {bone}")
     else:
-        print("  无缺失骨骼（骨架完整性良好）")
+        mmd_logging.info("  无缺失骨骼（骨架完整性良好）")
     
     # 8. MMD 英文骨骼特殊提示（原逻辑保留）
     if SelectedBoneMap == "mmd_english":
-        print("\n【提示】以下 3 个骨骼为 MMD 半标准骨骼，非必需：")
-        print("  - upper body 2（上半身2）")
-        print("  - thumb0_L（左手拇指0）")
-        print("  - thumb0_R（右手拇指0）")
-    print("="*50 + "\n")
+        mmd_logging.info("【提示】以下 3 个骨骼为 MMD 半标准骨骼，非必需：")
+        mmd_logging.info("  - upper body 2（上半身2）")
+        mmd_logging.info("  - thumb0_L（左手拇指0）")
+        mmd_logging.info("  - thumb0_R（右手拇指0）")
+
+
+# ------------------------------
+# 2b. PMX 文件诊断（不导入模型，流式读取骨骼）
+# ------------------------------
+def pmx_files(path):
+    """单个文件，或目录下（含子目录）的全部 .pmx 文件"""
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for dirpath, dirnames, filenames in os.walk(path):
+        files.extend(os.path.join(dirpath, f) for f in filenames if f.lower().endswith(".pmx"))
+    return sorted(files)
+
+
+def diagnose_pmx(context):
+    scene = context.scene
+    path = bpy.path.abspath(scene.pmx_diagnose_path)
+    files = pmx_files(path) if path else []
+    if not files:
+        raise Exception("未找到 PMX 文件")
+
+    SelectedBoneMap = scene.selected_armature_to_diagnose
+    failed = 0
+    for file_path in files:
+        try:
+            info = pmx_reader.read_pmx(file_path)
+        except (OSError, pmx_reader.PMXError) as e:
+            failed += 1
+            mmd_logging.error(f"{file_path}: {e}")
+            continue
+        bone_names = info.bone_names
+        ranked = rig_detection.detect_rig_type(bone_names, fuzzy=True)
+        best = ranked[0] if ranked else ("unknown", 0, 0)
+        mmd_logging.info(
+            f"【PMX】{os.path.basename(file_path)}「{info.name}」：{len(bone_names)} 个骨骼，"
+            f"检测类型 {best[0]}（{best[1]}/{best[2]}）"
+        )
+        missing_bones, missing_fingers = rig_detection.missing_bones(bone_names, SelectedBoneMap)
+        if len(files) == 1:
+            log_diagnostic(SelectedBoneMap, missing_bones + missing_fingers, bone_names)
+        else:
+            mmd_logging.debug(f"  {SelectedBoneMap} 缺失 {len(missing_bones)} 个骨骼、{len(missing_fingers)} 个手指骨骼")
+    return len(files) - failed, failed
 
 
 # ------------------------------
@@ -149,63 +191,62 @@ class ArmatureDiagnostic(bpy.types.Operator):
             b.name for b in armature_obj.data.bones 
             if "dummy" not in b.name.lower() and "shadow" not in b.name.lower()
         ]
-        print("\n" + "="*50)
-        print(f"【当前骨架信息】名称：{armature_obj.name}")
-        print(f"【有效骨骼列表】共 {len(valid_bones)} 个骨骼：")
-        for idx, bone in enumerate(sorted(valid_bones), 1):  # 排序后打印，便于查找
-            print(f"  {idx}. {bone}")
-        print("="*50 + "\n")
+        with mmd_logging.session("Armature Diagnostic", scene):
+            mmd_logging.info(f"【当前骨架信息】名称：{armature_obj.name}")
+            mmd_logging.info(f"【有效骨骼列表】共 {len(valid_bones)} 个骨骼：")
+            for idx, bone in enumerate(sorted(valid_bones), 1):  # 排序后输出，便于查找
+                mmd_logging.info(f"  {idx}. {bone}")
 
-        # 3. 执行核心诊断逻辑
-        main(context)
+            # 3. 执行核心诊断逻辑（结果在会话结束时统一输出）
+            main(context)
 
         # 4. 在 Blender 信息栏显示成功提示
         self.report({"INFO"}, "骨架诊断完成！详见系统控制台输出")
         return {"FINISHED"}  # 标记操作成功
 
 
+class DiagnosePMX(bpy.types.Operator):
+    """不导入模型，直接读取 PMX 文件的骨骼进行诊断和骨架类型检测"""
+    bl_idname = "mmd_tools_helper.diagnose_pmx"
+    bl_label = "Diagnose PMX Files"
+    bl_options = {"REGISTER"}
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("PMX Diagnostic", context.scene):
+                count, failed = diagnose_pmx(context)
+        except Exception as e:
+            self.report({"ERROR"}, str(e))
+            return {"CANCELLED"}
+        self.report({"INFO"}, f"已诊断 {count} 个 PMX 文件（失败 {failed} 个），详见系统控制台输出")
+        return {"FINISHED"}
+
+
 # ------------------------------
 # 4. 注册场景属性（骨骼类型枚举）
 # ------------------------------
 def register_scene_properties():
     """注册场景级枚举属性（供面板选择骨骼类型）"""
-    # 骨骼类型选项列表（优化原代码拼写错误：MikuMikuDamce → MikuMikuDance）
-    bone_type_items = [
-        ('mmd_english', 'MMD English', 'MikuMikuDance English bone names'),
-        ('mmd_japanese', 'MMD Japanese', 'MikuMikuDance Japanese bone names'),
-        ('mmd_japaneseLR', 'MMD Japanese (.L.R)', 'MikuMikuDance Japanese bones with .L.R suffixes'),
-        ('xna_lara', 'XNALara', 'XNALara bone names'),
-        ('daz_poser', 'DAZ/Poser', 'DAZ/Poser bone names'),
-        ('blender_rigify', 'Blender Rigify', 'Blender Rigify bone names (pre-rig)'),
-        ('sims_2', 'Sims 2', 'Sims 2 bone names'),
-        ('motion_builder', 'Motion Builder', 'Motion Builder bone names'),
-        ('3ds_max', '3ds Max', '3ds Max bone names'),
-        ('bepu', 'Bepu Full-Body IK', 'Bepu full body IK bone names'),
-        ('project_mirai', 'Project Mirai', 'Project Mirai bone names'),
-        ('manuel_bastioni_lab', 'Manuel Bastioni Lab', 'Manuel Bastioni Lab bone names'),
-        ('makehuman_mhx', 'MakeHuman MHX', 'MakeHuman MHX bone names'),
-        ('sims_3', 'Sims 3', 'Sims 3 bone names'),
-        ('doa5lr', 'DOA5LR', 'Dead or Alive 5 Last Round bone names'),
-        ('Bip_001', 'Bip001', 'Bip001 bone names'),
-        ('biped_3ds_max', 'Biped (3ds Max)', 'Biped 3DS Max bone names'),
-        ('biped_sfm', 'Biped (SFM)', 'Biped Source Film Maker bone names'),
-        ('valvebiped', 'ValveBiped', 'ValveBiped bone names'),
-        ('iClone7', 'iClone 7', 'iClone7 bone names')
-    ]
-
     # 注册场景属性（供面板和逻辑调用）
     bpy.types.Scene.selected_armature_to_diagnose = bpy.props.EnumProperty(
-        items=bone_type_items,
+        items=bone_dictionaries.rig_type_items,  # 由合并后的字典（含用户覆盖字典）生成
         name="Armature Type",
         description="Select the bone type to diagnose against",
-        default='mmd_english'  # 默认选中 MMD 英文骨骼
+        default=bone_dictionaries.rig_type_index('mmd_english')  # 默认选中 MMD 英文骨骼
+    )
+    bpy.types.Scene.pmx_diagnose_path = bpy.props.StringProperty(
+        name="PMX File or Folder",
+        description="要诊断的 PMX 文件；选择目录时诊断其中（含子目录）的全部 PMX 文件",
+        default="",
+        subtype='FILE_PATH'
     )
 
 
 def unregister_scene_properties():
     """注销场景属性（避免 Blender 内存泄漏）"""
-    if hasattr(bpy.types.Scene, "selected_armature_to_diagnose"):
-        del bpy.types.Scene.selected_armature_to_diagnose
+    for prop in ("selected_armature_to_diagnose", "pmx_diagnose_path"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
 
 
 # ------------------------------
@@ -216,11 +257,13 @@ def register():
     register_scene_properties()
     bpy.utils.register_class(ArmatureDiagnosticPanel)
     bpy.utils.register_class(ArmatureDiagnostic)
+    bpy.utils.register_class(DiagnosePMX)
     print("【Armature Diagnostic】插件注册完成！")
 
 
 def unregister():
     """注销插件所有组件（反向顺序，避免依赖错误）"""
+    bpy.utils.unregister_class(DiagnosePMX)
     bpy.utils.unregister_class(ArmatureDiagnostic)
     bpy.utils.unregister_class(ArmatureDiagnosticPanel)
     unregister_scene_properties()
@@ -0,0 +1,185 @@
+# 两个骨架之间的差异（新增、删除、改名、改父骨骼、移动、扭转），只依赖 numpy
+# 先按名称对应，剩余骨骼再按结构对应（父骨骼已对应且头尾位置接近的视为改名）。
+# 也可在命令行比较 PMX 文件对（.blend 文件对请在 Blender 中使用 armature_compare.cli）：
+#   python armature_diff.py old.pmx new.pmx [old2.pmx new2.pmx ...] --json diff.json
+import sys
+import json
+import argparse
+import numpy as np
+
+try:
+    from . import pmx_reader
+    from . import rig_topology
+except ImportError:  # 命令行中以顶层模块导入
+    import pmx_reader
+    import rig_topology
+
+# 默认容差：位置相对骨架高度，扭转为弧度
+POSITION_TOLERANCE = 1e-4
+ROLL_TOLERANCE = 1e-3
+# 按结构对应时，头尾位置差不超过骨架高度的此比例
+STRUCTURE_TOLERANCE = 0.02
+
+
+def skeleton_height(*skeletons):
+    """骨架高度（Z 轴向上，PMX 坐标在 pmx_skeleton 中已转换）"""
+    heights = [np.ptp(s.heads[:, 2]) if len(s) else 0.0 for s in skeletons]
+    return max(max(heights), 1e-6)
+
+
+def match_by_structure(old, new, pairs, tolerance):
+    """为名称不同的骨骼按结构补充对应：pairs 为 {新骨骼序号: 旧骨骼序号}，原地更新"""
+    matched_old = np.zeros(len(old), dtype=bool)
+    matched_old[list(pairs.values())] = True
+    old_children = old.children()
+    for j in new.order():
+        if j in pairs:
+            continue
+        parent = new.parents[j]
+        if parent < 0:
+            candidates = [i for i, p in enumerate(old.parents) if p < 0]
+        elif parent in pairs:
+            candidates = old_children[pairs[parent]]
+        else:
+            candidates = []
+        candidates = [i for i in candidates if not matched_old[i]]
+        if not candidates:
+            # 同时改名又改父骨骼：在全部未对应的旧骨骼中查找
+            candidates = np.flatnonzero(~matched_old)
+        if len(candidates) == 0:
+            continue
+        candidates = np.asarray(candidates)
+        distance = (np.linalg.norm(old.heads[candidates] - new.heads[j], axis=1)
+                    + np.linalg.norm(old.tails[candidates] - new.tails[j], axis=1))
+        best = int(distance.argmin())
+        if distance[best] <= tolerance:
+            pairs[j] = int(candidates[best])
+            matched_old[candidates[best]] = True
+
+
+def diff(old, new, position_tolerance=POSITION_TOLERANCE, roll_tolerance=ROLL_TOLERANCE, match_structure=True):
+    """比较两个 rig_topology.Skeleton，返回可直接写成 JSON 的字典"""
+    height = skeleton_height(old, new)
+    old_index = {name: i for i, name in enumerate(old.names)}
+    pairs = {j: old_index[name] for j, name in enumerate(new.names) if name in old_index}
+    if match_structure:
+        match_by_structure(old, new, pairs, STRUCTURE_TOLERANCE * height)
+    inverse = {i: j for j, i in pairs.items()}
+
+    new_ids = np.fromiter(pairs.keys(), dtype=np.int64, count=len(pairs))
+    old_ids = np.fromiter(pairs.values(), dtype=np.int64, count=len(pairs))
+
+    result = {
+        "added": [new.names[j] for j in range(len(new)) if j not in pairs],
+        "removed": [old.names[i] for i in range(len(old)) if i not in inverse],
+        "renamed": [{"old": old.names[i], "new": new.names[j]} for j, i in pairs.items() if old.names[i] != new.names[j]],
+        "reparented": [],
+        "moved": [],
+        "rolled": [],
+    }
+
+    for j, i in pairs.items():
+        old_parent = old.parents[i]
+        expected = inverse.get(old_parent, -2) if old_parent >= 0 else -1
+        if expected != new.parents[j]:
+            result["reparented"].append({
+                "bone": new.names[j],
+                "old_parent": old.names[old_parent] if old_parent >= 0 else None,
+                "new_parent": new.names[new.parents[j]] if new.parents[j] >= 0 else None,
+            })
+
+    if len(pairs):
+        head_delta = new.heads[new_ids] - old.heads[old_ids]
+        tail_delta = new.tails[new_ids] - old.tails[old_ids]
+        limit = position_tolerance * height
+        moved = (np.linalg.norm(head_delta, axis=1) > limit) | (np.linalg.norm(tail_delta, axis=1) > limit)
+        for k in np.flatnonzero(moved):
+            result["moved"].append({
+                "bone": new.names[new_ids[k]],
+                "head_delta": [round(float(v), 6) for v in head_delta[k]],
+                "tail_delta": [round(float(v), 6) for v in tail_delta[k]],
+            })
+        if old.rolls is not None and new.rolls is not None:
+            delta = np.angle(np.exp(1j * (new.rolls[new_ids] - old.rolls[old_ids])))  # 折算到 (-π, π]
+            for k in np.flatnonzero(np.abs(delta) > roll_tolerance):
+                result["rolled"].append({"bone": new.names[new_ids[k]], "delta": round(float(delta[k]), 6)})
+
+    result["summary"] = {key: len(value) for key, value in result.items()}
+    result["summary"]["old_bones"] = len(old)
+    result["summary"]["new_bones"] = len(new)
+    return result
+
+
+def is_empty(result):
+    return not any(result[key] for key in ("added", "removed", "renamed", "reparented", "moved", "rolled"))
+
+
+def summary_text(result):
+    s = result["summary"]
+    return (f"新增 {s['added']}，删除 {s['removed']}，改名 {s['renamed']}，改父骨骼 {s['reparented']}，"
+            f"移动 {s['moved']}，扭转 {s['rolled']}（{s['old_bones']} → {s['new_bones']} 个骨骼）")
+
+
+# ------------------------------
+# PMX 文件
+# ------------------------------
+def pmx_skeleton(path):
+    """PMX 骨骼的头部位置和尾部位置（尾部为骨骼时取该骨骼的位置）；PMX 不含扭转角
+    PMX 为 Y 轴向上，与 mmd_tools 导入时相同交换 Y、Z 轴，使容差按模型高度计算"""
+    info = pmx_reader.read_pmx(path)
+    bones = info.bones
+    heads = np.array([b.position for b in bones], dtype=np.float64).reshape(-1, 3)
+    tails = heads.copy()
+    for k, bone in enumerate(bones):
+        if bone.tail_is_bone:
+            if 0 <= bone.tail < len(bones):
+                tails[k] = heads[bone.tail]
+        else:
+            tails[k] += bone.tail
+    return rig_topology.Skeleton([b.name for b in bones], [b.parent for b in bones],
+                                 heads[:, [0, 2, 1]], tails[:, [0, 2, 1]])
+
+
+def diff_pairs(pairs, load, **options):
+    """[(旧文件, 新文件), ...] → [{"old":, "new":, "diff":/"error":}]"""
+    reports = []
+    for old_path, new_path in pairs:
+        try:
+            report = diff(load(old_path), load(new_path), **options)
+        except (OSError, ValueError, pmx_reader.PMXError) as e:
+            reports.append({"old": old_path, "new": new_path, "error": str(e)})
+            continue
+        reports.append({"old": old_path, "new": new_path, "diff": report})
+    return reports
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="比较骨架（文件按 旧 新 成对给出）")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--json", help="把完整结果写入 JSON 文件")
+    parser.add_argument("--tolerance", type=float, default=POSITION_TOLERANCE, help="位置容差（相对骨架高度）")
+    parser.add_argument("--no-structure", action="store_true", help="只按名称对应骨骼")
+    args = parser.parse_args(argv)
+    if len(args.files) % 2:
+        parser.error("文件数必须为偶数（旧 新 成对）")
+    return args
+
+
+def run(args, load):
+    pairs = list(zip(args.files[0::2], args.files[1::2]))
+    reports = diff_pairs(pairs, load, position_tolerance=args.tolerance, match_structure=not args.no_structure)
+    for report in reports:
+        text = report["error"] if "error" in report else summary_text(report["diff"])
+        print(f"{report['old']} → {report['new']}: {text}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=1)
+    return reports
+
+
+def main(argv=None):
+    run(parse_args(sys.argv[1:] if argv is None else argv), pmx_skeleton)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 import bpy
 from . import model  # 确保同目录下有 model.py 模块（含 findArmature 函数）
-from . import import_csv  # 确保同目录下有 import_csv.py 模块
+from . import mmd_logging
+from . import rename_index
+from . import rig_detection
+from . import bone_dictionaries
 
 print("---bonesMaps_renamer--->>")
 
@@ -29,6 +32,12 @@ class BonesRenamerPanel_MTH(bpy.types.Panel):
         # 骨骼类型选择
         layout.prop(scene, "Origin_Armature_Type", text="From")
         layout.prop(scene, "Destination_Armature_Type", text="To")
+        layout.operator("mmd_tools_helper.reload_bone_dictionaries", text="Reload Dictionaries", icon="FILE_REFRESH")
+        row = layout.row()
+        row.prop(scene, "bones_renamer_fuzzy")
+        sub = row.row()
+        sub.prop(scene, "bones_renamer_fuzzy_threshold", text="Min")
+        sub.enabled = scene.bones_renamer_fuzzy
         layout.separator()
 
         # 重命名按钮（仅选中骨架时可用）
@@ -71,8 +80,7 @@ def print_missing_bone_names():
 
     # 读取CSV字典（容错处理）
     try:
-        bone_dict = import_csv.use_csv_bones_dictionary()
-        finger_bone_dict = import_csv.use_csv_bones_fingers_dictionary()
+        bone_dict, finger_bone_dict = rig_detection.dictionaries()
     except Exception as e:
         print(f"读取骨骼字典失败：{str(e)}")
         return
@@ -122,8 +130,35 @@ def print_missing_bone_names():
             missing_bone_names.append(target_finger)
 
     # 打印结果
-    print(f"\n目标骨骼类型：{target_bone_type}")
-    print(f"缺失的骨骼：{missing_bone_names if missing_bone_names else '无'}")
+    mmd_logging.info(f"目标骨骼类型：{target_bone_type}")
+    mmd_logging.info(f"缺失的骨骼：{missing_bone_names if missing_bone_names else '无'}")
+
+
+def normalize_source_names(armature_obj, source_type, threshold):
+    """把与字典名称仅有写法差异的骨骼（全角/半角、大小写、分隔符、左右写法）先改为字典中的源名称"""
+    resolved = rig_detection.resolve_bone_names(armature_obj.data.bones.keys(), source_type, threshold)
+    count = 0
+    for canonical, (actual, confidence) in resolved.items():
+        if actual == canonical or canonical in armature_obj.data.bones:
+            continue
+        armature_obj.data.bones[actual].name = canonical
+        mmd_logging.info(f"模糊匹配：{actual} → {canonical}（置信度 {confidence:.2f}）")
+        count += 1
+    return count
+
+
+def rename_from_mapping(armature_obj, mapping):
+    """按 {当前名称: 新名称} 重命名（例如结构匹配给出的对应关系）；返回改名数
+    先改为临时名称再改为目标名称，避免互换名称时 Blender 自动追加 .001"""
+    bones = armature_obj.data.bones
+    pending = [(bones[name], target) for name, target in mapping.items() if name in bones and name != target]
+    for i, (bone, target) in enumerate(pending):
+        bone.name = f"__rename_{i}__"
+    for bone, target in pending:
+        bone.name = target
+        if bone.name != target:
+            mmd_logging.warning(f"名称冲突：{target} 已存在，改为 {bone.name}")
+    return len(pending)
 
 
 def rename_bones(source_type, target_type, bone_dict):
@@ -166,7 +201,7 @@ def rename_bones(source_type, target_type, bone_dict):
             and target_bone != "" 
             and source_bone in armature_obj.data.bones):
             armature_obj.data.bones[source_bone].name = target_bone
-            print(f"重命名：{source_bone} → {target_bone}")
+            mmd_logging.info(f"重命名：{source_bone} → {target_bone}")
 
             # 同步MMD骨骼属性（依赖 mmd_tools 插件）
             if target_type in ["mmd_japanese", "mmd_japaneseLR"]:
@@ -177,7 +212,7 @@ def rename_bones(source_type, target_type, bone_dict):
                         pose_bone.mmd_bone.name_e = bone_entry[0]
                     bpy.ops.object.mode_set(mode="OBJECT")
                 except (RuntimeError, AttributeError):
-                    print(f"警告：无法同步MMD属性（{target_bone}）")
+                    mmd_logging.warning(f"无法同步MMD属性（{target_bone}）")
 
 
 def rename_finger_bones(source_type, target_type, finger_dict):
@@ -220,7 +255,7 @@ def rename_finger_bones(source_type, target_type, finger_dict):
             and target_bone != "" 
             and source_bone in armature_obj.data.bones):
             armature_obj.data.bones[source_bone].name = target_bone
-            print(f"重命名手指：{source_bone} → {target_bone}")
+            mmd_logging.info(f"重命名手指：{source_bone} → {target_bone}")
 
             # 同步MMD属性
             if target_type in ["mmd_japanese", "mmd_japaneseLR"]:
@@ -231,7 +266,7 @@ def rename_finger_bones(source_type, target_type, finger_dict):
                         pose_bone.mmd_bone.name_e = finger_entry[0]
                     bpy.ops.object.mode_set(mode="OBJECT")
                 except (RuntimeError, AttributeError):
-                    print(f"警告：无法同步MMD属性（手指骨骼 {target_bone}）")
+                    mmd_logging.warning(f"无法同步MMD属性（手指骨骼 {target_bone}）")
 
     # 更新源类型并检查缺失骨骼
     scene.Origin_Armature_Type = target_type
@@ -259,12 +294,18 @@ def main(context):
 
     # 读取骨骼字典
     try:
-        bone_dict = import_csv.use_csv_bones_dictionary()
-        finger_dict = import_csv.use_csv_bones_fingers_dictionary()
+        bone_dict, finger_dict = rig_detection.dictionaries()
     except Exception as e:
         print(f"读取字典失败：{str(e)}")
         return
 
+    # 改名前建立一次外部引用索引，改名后统一更新
+    reference_index = rename_index.BoneReferenceIndex(armature_obj)
+    before = rename_index.snapshot(armature_obj)
+
+    if scene.bones_renamer_fuzzy:
+        normalize_source_names(armature_obj, scene.Origin_Armature_Type, scene.bones_renamer_fuzzy_threshold)
+
     # 重命名骨骼
     rename_bones(
         scene.Origin_Armature_Type,
@@ -276,6 +317,7 @@ def main(context):
         scene.Destination_Armature_Type,
         finger_dict
     )
+    rename_index.propagate(reference_index, armature_obj, before)
 
     # 切换到姿态模式并全选骨骼
     try:
@@ -300,54 +342,47 @@ class BonesRenamer(bpy.types.Operator):
         return bool(view_layer.objects.active and view_layer.objects.active.type == "ARMATURE")
 
     def execute(self, context):
-        main(context)
+        with mmd_logging.session("Bones Renamer", context.scene):
+            main(context)
         self.report({"INFO"}, "骨骼重命名完成（查看控制台日志）")
         return {"FINISHED"}
 
 
 # ------------------------------
-# 5. 注册场景属性（骨骼类型枚举）
+# 5. 注册场景属性（骨骼类型枚举由合并后的字典生成）
 # ------------------------------
 def register_scene_properties():
-    bone_type_items = [
-        ('mmd_english', 'MMD English', 'MikuMikuDance English bones'),
-        ('mmd_japanese', 'MMD Japanese', 'MikuMikuDance Japanese bones'),
-        ('mmd_japaneseLR', 'MMD Japanese (.L.R)', 'MMD Japanese with .L.R suffix'),
-        ('xna_lara', 'XNALara', 'XNALara bones'),
-        ('daz_poser', 'DAZ/Poser', 'DAZ/Poser/Second Life bones'),
-        ('blender_rigify', 'Blender Rigify', 'Rigify pre-rig bones'),
-        ('sims_2', 'Sims 2', 'Sims 2 bones'),
-        ('motion_builder', 'Motion Builder', 'Motion Builder bones'),
-        ('3ds_max', '3ds Max', '3ds Max bones'),
-        ('bepu', 'Bepu Full-Body IK', 'Bepu IK bones'),
-        ('project_mirai', 'Project Mirai', 'Project Mirai bones'),
-        ('manuel_bastioni_lab', 'Manuel Bastioni Lab', 'MBL bones'),
-        ('makehuman_mhx', 'MakeHuman MHX', 'MakeHuman MHX bones'),
-        ('sims_3', 'Sims 3', 'Sims 3 bones'),
-        ('doa5lr', 'DOA5LR', 'Dead or Alive 5 LR bones'),
-        ('Bip_001', 'Bip001', 'Bip001 bones'),
-        ('biped_3ds_max', 'Biped (3ds Max)', '3ds Max Biped bones'),
-        ('biped_sfm', 'Biped (SFM)', 'Source Film Maker Biped bones'),
-        ('valvebiped', 'ValveBiped', 'ValveBiped bones'),
-        ('iClone7', 'iClone 7', 'iClone7 bones')
-    ]
-
     # 源骨骼类型
     bpy.types.Scene.Origin_Armature_Type = bpy.props.EnumProperty(
-        items=bone_type_items,
+        items=bone_dictionaries.rig_type_items,
         name="Rename From",
-        default='mmd_japanese'
+        default=bone_dictionaries.rig_type_index('mmd_japanese')
     )
 
     # 目标骨骼类型
     bpy.types.Scene.Destination_Armature_Type = bpy.props.EnumProperty(
-        items=bone_type_items,
+        items=bone_dictionaries.rig_type_items,
         name="Rename To",
-        default='mmd_english'
+        default=bone_dictionaries.rig_type_index('mmd_english')
+    )
+
+    bpy.types.Scene.bones_renamer_fuzzy = bpy.props.BoolProperty(
+        name="Fuzzy Match",
+        description="骨骼名称与字典仅有写法差异时（ＩＫ/IK、_L/.L/左、大小写、分隔符）也进行重命名",
+        default=False
+    )
+    bpy.types.Scene.bones_renamer_fuzzy_threshold = bpy.props.FloatProperty(
+        name="Min Confidence",
+        description="模糊匹配的最低置信度",
+        default=rig_detection.FUZZY_THRESHOLD,
+        min=0.0,
+        max=1.0
     )
 
 
 def unregister_scene_properties():
+    del bpy.types.Scene.bones_renamer_fuzzy
+    del bpy.types.Scene.bones_renamer_fuzzy_threshold
     del bpy.types.Scene.Origin_Armature_Type
     del bpy.types.Scene.Destination_Armature_Type
 
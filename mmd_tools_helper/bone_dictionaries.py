@@ -0,0 +1,125 @@
+import bpy
+import os
+from . import mmd_logging
+from . import rig_detection
+from . import dictionary_cache
+
+# 内置骨架类型的显示名称和说明；覆盖字典新增的类型直接显示标识符。
+# .blend 文件按整数保存枚举值，内置类型的值固定为此处的顺序（与原先手写的选项列表一致），
+# 新的内置类型只能追加到末尾；覆盖字典中的类型排在全部内置类型之后。
+RIG_TYPE_LABELS = {
+    'mmd_english': ('MMD English', 'MikuMikuDance English bones'),
+    'mmd_japanese': ('MMD Japanese', 'MikuMikuDance Japanese bones'),
+    'mmd_japaneseLR': ('MMD Japanese (.L.R)', 'MMD Japanese with .L.R suffix'),
+    'xna_lara': ('XNALara', 'XNALara bones'),
+    'daz_poser': ('DAZ/Poser', 'DAZ/Poser/Second Life bones'),
+    'blender_rigify': ('Blender Rigify', 'Rigify pre-rig bones'),
+    'sims_2': ('Sims 2', 'Sims 2 bones'),
+    'motion_builder': ('Motion Builder', 'Motion Builder bones'),
+    '3ds_max': ('3ds Max', '3ds Max bones'),
+    'bepu': ('Bepu Full-Body IK', 'Bepu IK bones'),
+    'project_mirai': ('Project Mirai', 'Project Mirai bones'),
+    'manuel_bastioni_lab': ('Manuel Bastioni Lab', 'MBL bones'),
+    'makehuman_mhx': ('MakeHuman MHX', 'MakeHuman MHX bones'),
+    'sims_3': ('Sims 3', 'Sims 3 bones'),
+    'doa5lr': ('DOA5LR', 'Dead or Alive 5 LR bones'),
+    'Bip_001': ('Bip001', 'Bip001 bones'),
+    'biped_3ds_max': ('Biped (3ds Max)', '3ds Max Biped bones'),
+    'biped_sfm': ('Biped (SFM)', 'Source Film Maker Biped bones'),
+    'valvebiped': ('ValveBiped', 'ValveBiped bones'),
+    'iClone7': ('iClone 7', 'iClone7 bones'),
+    'type_x': ('Type X', 'Type X bones'),
+}
+BUILTIN_RIG_TYPES = list(RIG_TYPE_LABELS)
+
+ANY_ITEM = ('ANY', 'Any', '不限骨架类型', 'NONE', 0)
+
+# 动态枚举的选项必须由 Python 持有引用（否则界面引用的字符串被释放），
+# 按 (字典版本, 是否含 Any) 缓存，两种选项列表同时保留
+_enum_items = {}
+
+
+# ------------------------------
+# 1. 骨架类型枚举（由合并后的字典首行生成）
+# ------------------------------
+def rig_type_number(rig_type, rig_types):
+    """内置类型按 BUILTIN_RIG_TYPES 的固定值；覆盖字典中的类型依次排在其后"""
+    if rig_type in RIG_TYPE_LABELS:
+        return BUILTIN_RIG_TYPES.index(rig_type)
+    extra = [t for t in rig_types if t not in RIG_TYPE_LABELS]
+    return len(BUILTIN_RIG_TYPES) + extra.index(rig_type)
+
+
+def _items(with_any):
+    rig_types = rig_detection.rig_types()  # 同时检查源文件是否变化（热重载）
+    key = (rig_detection.generation, with_any)
+    items = _enum_items.get(key)
+    if items is None:
+        offset = 1 if with_any else 0  # 0 留给 Any
+        items = [ANY_ITEM] if with_any else []
+        for rig_type in rig_types:
+            label, description = RIG_TYPE_LABELS.get(rig_type, (rig_type, "用户覆盖字典中的骨架类型"))
+            items.append((rig_type, label, description, 'NONE', rig_type_number(rig_type, rig_types) + offset))
+        # 只丢弃旧版本字典的选项
+        for old_key in [k for k in _enum_items if k[0] != rig_detection.generation]:
+            del _enum_items[old_key]
+        _enum_items[key] = items
+    return items
+
+
+def rig_type_items(self, context):
+    return _items(False)
+
+
+def rig_type_items_with_any(self, context):
+    return _items(True)
+
+
+def rig_type_index(rig_type, with_any=False):
+    """动态枚举的默认值只能是整数（选项的枚举值）"""
+    types = rig_detection.rig_types()
+    number = rig_type_number(rig_type, types) if rig_type in types or rig_type in RIG_TYPE_LABELS else 0
+    return number + 1 if with_any else number
+
+
+def default_overlay_dir():
+    return bpy.utils.user_resource('CONFIG', path=os.path.join("mmd_tools_helper", "dictionaries"), create=True)
+
+
+# ------------------------------
+# 2. 操作器类
+# ------------------------------
+class ReloadBoneDictionaries(bpy.types.Operator):
+    """重新读取内置骨骼字典和用户覆盖字典（源文件变化时也会自动重新读取）"""
+    bl_idname = "mmd_tools_helper.reload_bone_dictionaries"
+    bl_label = "Reload Bone Dictionaries"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Reload Bone Dictionaries", context.scene):
+                rig_detection.reload()
+                for path, is_finger in rig_detection.overlay_files():
+                    mmd_logging.info(f"覆盖字典：{path}{'（手指骨骼）' if is_finger else ''}")
+                count = len(rig_detection.rig_types())
+                mmd_logging.info(f"骨架类型 {count} 种，覆盖字典目录：{', '.join(rig_detection.overlay_dirs())}")
+                mmd_logging.info(f"编译缓存目录：{dictionary_cache.cache_dir()}")
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Loaded {count} rig types")
+        return {'FINISHED'}
+
+
+def register():
+    rig_detection.set_overlay_dirs([default_overlay_dir()])
+    bpy.utils.register_class(ReloadBoneDictionaries)
+
+
+def unregister():
+    bpy.utils.unregister_class(ReloadBoneDictionaries)
+    _enum_items.clear()
+
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,106 @@
+# 骨骼名称模糊匹配（不依赖 bpy）
+# 先把名称规范化为 (左右, 主体)：全角/半角统一、小写、去掉分隔符，
+# 左右写法（_L、.L、 L 、Left、左…）统一为 l/r；
+# 规范化后仍不相同时，在同侧条目中按二元组（bigram）Dice 系数查找最接近的名称。
+import re
+import unicodedata
+
+# 分隔符
+_SEPARATORS = re.compile(r"[\s_.\-]+")
+
+# 单独成词的左右标记（"Bip001 L Thigh"、"arm_L"、"腕.L"）
+SIDE_TOKENS = {"l": "l", "r": "r", "left": "l", "right": "r", "左": "l", "右": "r"}
+# 连写在开头的左右标记（"左腕"、"LeftArm"）；英文标记只在大小写边界处识别，
+# 避免把普通单词中的 left/right（"cleft"、"Bright"）当作左右
+SIDE_PREFIXES = (
+    (re.compile(r"^左"), "l"), (re.compile(r"^右"), "r"),
+    (re.compile(r"^(?:[Ll]eft|LEFT)(?=[A-Z0-9])"), "l"), (re.compile(r"^(?:[Rr]ight|RIGHT)(?=[A-Z0-9])"), "r"),
+)
+# 连写在末尾的左右标记（"ArmLeft"、"腕左"）
+SIDE_SUFFIXES = (
+    (re.compile(r"左$"), "l"), (re.compile(r"右$"), "r"),
+    (re.compile(r"(?<=[a-z0-9])(?:Left|LEFT)$"), "l"), (re.compile(r"(?<=[a-z0-9])(?:Right|RIGHT)$"), "r"),
+)
+
+# 置信度：原名相同 > 规范化后相同 > 模糊匹配（按 Dice 系数缩放）
+EXACT = 1.0
+NORMALIZED = 0.95
+FUZZY_SCALE = 0.9
+
+
+def split_side(name):
+    """返回 (左右 'l'/'r'/'', 规范化主体)"""
+    text = unicodedata.normalize("NFKC", name)  # 连写标记需要原大小写，最后再转小写
+    tokens = [t for t in _SEPARATORS.split(text) if t]
+    side = ""
+    rest = []
+    for token in tokens:
+        if not side and token.lower() in SIDE_TOKENS and len(tokens) > 1:
+            side = SIDE_TOKENS[token.lower()]
+            continue
+        rest.append(token)
+    if not side and rest:
+        for pattern, s in SIDE_PREFIXES:
+            match = pattern.match(rest[0])
+            if match and match.end() < len(rest[0]):
+                side, rest[0] = s, rest[0][match.end():]
+                break
+    if not side and rest:
+        for pattern, s in SIDE_SUFFIXES:
+            match = pattern.search(rest[-1])
+            if match and match.start() > 0:
+                side, rest[-1] = s, rest[-1][:match.start()]
+                break
+    return side, "".join(rest).lower()
+
+
+def bigrams(core):
+    padded = f"^{core}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+class BoneNameMatcher:
+    """对一组规范名称建立索引；match() 返回 (规范名称, 置信度)，无匹配时为 (None, 0.0)"""
+
+    def __init__(self, names):
+        self.names = list(dict.fromkeys(n for n in names if n))
+        self.exact = set(self.names)
+        self.keys = {}    # {(左右, 主体): 名称}，先出现的优先
+        self.grams = {}   # {(左右, 二元组): [条目序号]}
+        self.entry_grams = []
+        for index, name in enumerate(self.names):
+            side, core = split_side(name)
+            self.keys.setdefault((side, core), name)
+            grams = bigrams(core)
+            self.entry_grams.append((side, grams))
+            for gram in grams:
+                self.grams.setdefault((side, gram), []).append(index)
+        self._memo = {}
+
+    def match(self, name, threshold=0.0):
+        result = self._memo.get(name)
+        if result is None:
+            result = self._match(name)
+            self._memo[name] = result
+        return result if result[1] >= threshold else (None, 0.0)
+
+    def _match(self, name):
+        if name in self.exact:
+            return name, EXACT
+        side, core = split_side(name)
+        canonical = self.keys.get((side, core))
+        if canonical is not None:
+            return canonical, NORMALIZED
+        grams = bigrams(core)
+        shared = {}
+        for gram in grams:
+            for index in self.grams.get((side, gram), ()):
+                shared[index] = shared.get(index, 0) + 1
+        best, best_score = None, 0.0
+        for index, count in shared.items():
+            score = 2.0 * count / (len(grams) + len(self.entry_grams[index][1]))
+            if score > best_score:
+                best, best_score = index, score
+        if best is None:
+            return None, 0.0
+        return self.names[best], FUZZY_SCALE * best_score
@@ -0,0 +1,270 @@
+import bpy
+import hashlib
+import numpy as np
+from . import mmd_logging
+
+# 材质签名中忽略的属性（名称、索引等不影响渲染结果）
+IGNORED_MATERIAL_PROPS = {"rna_type", "name", "name_j", "name_e", "material_id", "comment", "paint_active_slot"}
+
+# 节点签名中忽略的界面属性（位置、尺寸、选择状态等）
+IGNORED_NODE_PROPS = {
+    "rna_type", "name", "label", "location", "width", "width_hidden", "height", "dimensions",
+    "select", "hide", "show_options", "show_preview", "show_texture", "use_custom_color", "color",
+}
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class DatablockDedupPanel(bpy.types.Panel):
+    """合并内容相同的图像和材质（多个 MMD 模型共享的 toon/sphere/皮肤纹理）"""
+    bl_idname = "OBJECT_PT_mmd_datablock_dedup"
+    bl_label = "MMD Image/Material Dedup"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.label(text="Deduplicate Images/Materials", icon="DUPLICATE")
+        layout.prop(scene, "dedup_images")
+        layout.prop(scene, "dedup_materials")
+        layout.operator("mmd_tools_helper.datablock_dedup", text="Deduplicate")
+
+
+# ------------------------------
+# 2. 签名计算
+# ------------------------------
+def image_signature(image):
+    """图像像素内容的哈希（一次 foreach_get 批量读取像素缓冲）
+    色彩空间、Alpha 模式和来源类型不同的图像即使像素相同也不能合并（例如同时用作 Non-Color 数据的纹理）"""
+    width, height = image.size
+    channels = image.channels
+    buf = np.empty(width * height * channels, dtype=np.float32)
+    image.pixels.foreach_get(buf)
+    digest = hashlib.sha1(buf.tobytes())
+    digest.update(f"{image.colorspace_settings.name}|{image.alpha_mode}|{image.source}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _value_signature(value):
+    """把 RNA 属性值转换为可哈希的形式（浮点数四舍五入，避免精度噪声）"""
+    if isinstance(value, float):
+        return round(value, 5)
+    if isinstance(value, (bool, int, str)) or value is None:
+        return value
+    if isinstance(value, bpy.types.ID):
+        return ("ID", type(value).__name__, value.name)
+    try:
+        return tuple(_value_signature(v) for v in value)
+    except TypeError:
+        return str(value)
+
+
+def rna_signature(struct, ignored=IGNORED_MATERIAL_PROPS):
+    """结构体全部简单属性的签名（数据块通用属性如 users、session_uid 一并忽略）"""
+    if isinstance(struct, bpy.types.ID):
+        ignored = ignored | {p.identifier for p in bpy.types.ID.bl_rna.properties}
+    items = []
+    for prop in struct.bl_rna.properties:
+        if prop.identifier in ignored or prop.type in {'POINTER', 'COLLECTION'}:
+            continue
+        items.append((prop.identifier, _value_signature(getattr(struct, prop.identifier, None))))
+    return tuple(items)
+
+
+def node_tree_signature(node_tree, ignore_image_node=None):
+    """节点树签名：节点类型、未连接输入的默认值、引用的图像、颜色梯度和连线
+
+    ignore_image_node：该节点引用的图像不计入签名（纹理图集按漫反射纹理以外的参数分组时使用）
+    """
+    if node_tree is None:
+        return None
+    nodes = []
+    for node in sorted(node_tree.nodes, key=lambda n: n.name):
+        entry = [node.name, node.bl_idname, rna_signature(node, IGNORED_NODE_PROPS)]
+        image = getattr(node, "image", None)
+        if image is not None and node != ignore_image_node:
+            entry.append(("image", image.name))
+        light = getattr(node, "light_object", None)
+        if light is not None:
+            entry.append(("light", light.name))
+        ramp = getattr(node, "color_ramp", None)
+        if ramp is not None:
+            entry.append(("ramp", ramp.interpolation, tuple((round(e.position, 5), _value_signature(e.color)) for e in ramp.elements)))
+        for sock in node.inputs:
+            if not sock.is_linked and hasattr(sock, "default_value"):
+                entry.append((sock.identifier, _value_signature(sock.default_value)))
+        nodes.append(tuple(entry))
+    links = sorted(
+        (l.from_node.name, l.from_socket.identifier, l.to_node.name, l.to_socket.identifier)
+        for l in node_tree.links
+    )
+    return (tuple(nodes), tuple(links))
+
+
+def material_signature(material):
+    """材质参数签名（忽略名称）：基础属性 + mmd_material 参数 + 节点树"""
+    sig = [rna_signature(material), material.use_nodes]
+    if hasattr(material, "mmd_material"):
+        sig.append(rna_signature(material.mmd_material))
+    if material.use_nodes:
+        sig.append(node_tree_signature(material.node_tree))
+    return hashlib.sha1(repr(sig).encode("utf-8")).hexdigest()
+
+
+# ------------------------------
+# 3. 合并逻辑
+# ------------------------------
+def _canonical_first(datablocks):
+    """优先保留不带 .001 后缀、名称最短的数据块"""
+    return sorted(datablocks, key=lambda d: (len(d.name), d.name))
+
+
+def group_duplicates(datablocks, signature_func):
+    """按签名分组，返回 [(canonical, [duplicates...]), ...]"""
+    buckets = {}
+    for d in datablocks:
+        buckets.setdefault(signature_func(d), []).append(d)
+    result = []
+    for same in buckets.values():
+        if len(same) > 1:
+            ordered = _canonical_first(same)
+            result.append((ordered[0], ordered[1:]))
+    return result
+
+
+def dedup_images():
+    """合并像素内容完全相同的图像，返回删除数量"""
+    candidates = [
+        img for img in bpy.data.images
+        if img.type == 'IMAGE' and img.size[0] > 0 and img.size[1] > 0
+    ]
+    # 先按尺寸/通道分组，只对可能重复的图像读取像素
+    by_shape = {}
+    for img in candidates:
+        by_shape.setdefault((tuple(img.size), img.channels), []).append(img)
+
+    removed = 0
+    for same_shape in by_shape.values():
+        if len(same_shape) < 2:
+            continue
+        for canonical, duplicates in group_duplicates(same_shape, image_signature):
+            for dup in duplicates:
+                mmd_logging.info(f"图像 {dup.name} → {canonical.name}")
+                dup.user_remap(canonical)
+                bpy.data.images.remove(dup)
+                removed += 1
+    return removed
+
+
+def material_morph_targets():
+    """[(材质 Morph 数据, 目标材质名称), ...]；material 是按 material_id 查找的 getter，必须在删除材质前读取"""
+    targets = []
+    for obj in bpy.data.objects:
+        if getattr(obj, "mmd_type", None) != 'ROOT':
+            continue
+        for morph in obj.mmd_root.material_morphs:
+            for data in morph.data:
+                material = getattr(data, "material_data", None)
+                name = material.name if material is not None else getattr(data, "material", "")
+                if name:
+                    targets.append((data, name))
+    return targets
+
+
+def rename_material_morph_references(targets, renamed):
+    """把指向已合并材质的材质 Morph 改为指向保留的材质（setter 同时更新 material_id）"""
+    for data, name in targets:
+        new_name = renamed.get(name)
+        if new_name is not None:
+            data.material = new_name
+
+
+def dedup_materials():
+    """合并参数完全相同（仅名称不同）的材质，返回删除数量"""
+    candidates = [m for m in bpy.data.materials if "mmd_tools_rigid" not in m.name.lower()]
+    targets = material_morph_targets()
+    renamed = {}
+    for canonical, duplicates in group_duplicates(candidates, material_signature):
+        for dup in duplicates:
+            renamed[dup.name] = canonical.name
+            mmd_logging.info(f"材质 {dup.name} → {canonical.name}")
+            dup.user_remap(canonical)
+            bpy.data.materials.remove(dup)
+    rename_material_morph_references(targets, renamed)
+    return len(renamed)
+
+
+def main(context):
+    scene = context.scene
+    images_removed = 0
+    materials_removed = 0
+    # 先合并图像：材质签名中按图像名称比较，图像合并后更多材质会变得相同
+    if scene.dedup_images:
+        images_removed = dedup_images()
+    if scene.dedup_materials:
+        materials_removed = dedup_materials()
+    mmd_logging.info(f"删除重复图像 {images_removed} 个，重复材质 {materials_removed} 个")
+    return images_removed, materials_removed
+
+
+# ------------------------------
+# 4. 操作器类
+# ------------------------------
+class DatablockDedup(bpy.types.Operator):
+    """按内容哈希合并重复的图像和材质，并删除重复项"""
+    bl_idname = "mmd_tools_helper.datablock_dedup"
+    bl_label = "Deduplicate Images/Materials"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Datablock Dedup", context.scene):
+                images_removed, materials_removed = main(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Removed {images_removed} images, {materials_removed} materials")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 5. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.dedup_images = bpy.props.BoolProperty(
+        name="Images",
+        description="合并像素内容相同的图像",
+        default=True
+    )
+    bpy.types.Scene.dedup_materials = bpy.props.BoolProperty(
+        name="Materials",
+        description="合并仅名称不同的材质",
+        default=True
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("dedup_images", "dedup_materials"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(DatablockDedupPanel)
+    bpy.utils.register_class(DatablockDedup)
+
+
+def unregister():
+    bpy.utils.unregister_class(DatablockDedup)
+    bpy.utils.unregister_class(DatablockDedupPanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,237 @@
+import bpy
+import json
+import time
+from . import model
+from . import mmd_logging
+from . import performance_mode
+
+# 最近一次分析结果（JSON，随 .blend 文件保存，面板中显示排名）
+REPORT_KEY = "mmd_helper_profile_report"
+
+# 面板中显示的条目数
+PANEL_ROWS = 5
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class DepsgraphProfilerPanel(bpy.types.Panel):
+    """逐个隔离 MMD 模型，测量每个模型的依赖图求值耗时"""
+    bl_idname = "OBJECT_PT_mmd_depsgraph_profiler"
+    bl_label = "MMD Evaluation Profiler"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.prop(scene, "profiler_frame_count")
+        layout.prop(scene, "profiler_by_type")
+        layout.operator("mmd_tools_helper.depsgraph_profiler", text="Profile MMD Models", icon="TIME")
+
+        if REPORT_KEY not in scene.keys():
+            return
+        box = layout.box()
+        for entry in json.loads(scene[REPORT_KEY]):
+            box.label(text=f"{entry['model']}: {entry['total']:.2f} ms/frame")
+            for kind in ("modifiers", "constraints"):
+                ranked = sorted(entry[kind].items(), key=lambda kv: -kv[1])[:PANEL_ROWS]
+                for name, ms in ranked:
+                    box.label(text=f"    {name}: {ms:.2f} ms")
+
+
+# ------------------------------
+# 2. 临时开关（测量结束后逆序恢复）
+# ------------------------------
+class Toggles:
+    def __init__(self):
+        self.changes = []
+
+    def set(self, target, attr, value):
+        old = getattr(target, attr)
+        if old != value:
+            self.changes.append((target, attr, old))
+            setattr(target, attr, value)
+
+    def restore(self):
+        for target, attr, old in reversed(self.changes):
+            setattr(target, attr, old)
+        self.changes = []
+
+
+def model_objects(root):
+    return model.allObjects(None, root)
+
+
+def model_modifiers(root):
+    """{修改器类型: [修改器, ...]}"""
+    result = {}
+    for obj in model_objects(root):
+        for mod in getattr(obj, "modifiers", []):
+            if mod.show_viewport:
+                result.setdefault(mod.type, []).append(mod)
+    return result
+
+
+def model_constraints(root):
+    """{约束类型: [约束, ...]}（对象约束和骨骼约束，含 add_foot_leg_ik / add_hand_arm_ik 添加的 IK）"""
+    result = {}
+    for obj in model_objects(root):
+        constraints = list(obj.constraints)
+        if obj.type == 'ARMATURE':
+            for pose_bone in obj.pose.bones:
+                constraints.extend(pose_bone.constraints)
+        for con in constraints:
+            if not con.mute:
+                result.setdefault(con.type, []).append(con)
+    return result
+
+
+# ------------------------------
+# 3. 计时
+# ------------------------------
+def time_frames(scene, frames):
+    """逐帧求值，返回平均每帧毫秒数（第一帧预热不计时；只有一帧时重复求值该帧计时）"""
+    scene.frame_set(frames[0])
+    timed = frames[1:] or frames
+    start = time.perf_counter()
+    for frame in timed:
+        scene.frame_set(frame)
+    return (time.perf_counter() - start) * 1000.0 / len(timed)
+
+
+def time_without(scene, frames, items, attr, value):
+    """关闭一组修改器/约束后的耗时"""
+    toggles = Toggles()
+    try:
+        for item in items:
+            toggles.set(item, attr, value)
+        return time_frames(scene, frames)
+    finally:
+        toggles.restore()
+
+
+def profile_root(scene, frames, root, baseline, by_type):
+    total = time_frames(scene, frames)
+    entry = {"model": root.name, "total": max(total - baseline, 0.0), "modifiers": {}, "constraints": {}}
+    if not by_type:
+        return entry
+    # 某一类型的耗时 = 完整耗时 - 关闭该类型后的耗时
+    for mod_type, mods in model_modifiers(root).items():
+        cost = total - time_without(scene, frames, mods, "show_viewport", False)
+        entry["modifiers"][f"{mod_type} ×{len(mods)}"] = max(cost, 0.0)
+    for con_type, cons in model_constraints(root).items():
+        cost = total - time_without(scene, frames, cons, "mute", True)
+        entry["constraints"][f"{con_type} ×{len(cons)}"] = max(cost, 0.0)
+    return entry
+
+
+# ------------------------------
+# 4. 主流程
+# ------------------------------
+def main(context):
+    scene = context.scene
+    roots = performance_mode.find_roots(scene)
+    if not roots:
+        raise Exception("场景中没有 MMD 模型")
+    if context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    start = scene.frame_current
+    frames = list(range(start, start + scene.profiler_frame_count))
+    isolation = Toggles()
+    report = []
+    try:
+        # 基线：所有模型隐藏时场景本身的耗时
+        for root in roots:
+            for obj in model_objects(root):
+                isolation.set(obj, "hide_viewport", True)
+        baseline = time_frames(scene, frames)
+        isolation.restore()
+        mmd_logging.info(f"基线（无 MMD 模型）：{baseline:.2f} ms/帧")
+
+        for root in roots:
+            for other in roots:
+                if other != root:
+                    for obj in model_objects(other):
+                        isolation.set(obj, "hide_viewport", True)
+            entry = profile_root(scene, frames, root, baseline, scene.profiler_by_type)
+            isolation.restore()
+            report.append(entry)
+            mmd_logging.debug(f"{root.name}: {entry['total']:.2f} ms/帧")
+    finally:
+        isolation.restore()
+        scene.frame_set(start)
+
+    report.sort(key=lambda e: -e["total"])
+    for rank, entry in enumerate(report, 1):
+        mmd_logging.info(f"{rank}. {entry['model']}: {entry['total']:.2f} ms/帧")
+        for kind in ("modifiers", "constraints"):
+            for name, ms in sorted(entry[kind].items(), key=lambda kv: -kv[1]):
+                mmd_logging.info(f"     {name}: {ms:.2f} ms")
+    scene[REPORT_KEY] = json.dumps(report, ensure_ascii=False)
+    return report
+
+
+# ------------------------------
+# 5. 操作器类
+# ------------------------------
+class DepsgraphProfiler(bpy.types.Operator):
+    """在帧范围内逐个隔离 MMD 模型，按模型、修改器类型和约束类型统计求值耗时"""
+    bl_idname = "mmd_tools_helper.depsgraph_profiler"
+    bl_label = "Profile MMD Models"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Depsgraph Profiler", context.scene):
+                report = main(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        slowest = report[0]
+        self.report({'INFO'}, f"Slowest model: {slowest['model']} ({slowest['total']:.2f} ms/frame)")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 6. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.profiler_frame_count = bpy.props.IntProperty(
+        name="Frames",
+        description="从当前帧开始测量的帧数",
+        default=30,
+        min=1,
+        max=1000
+    )
+    bpy.types.Scene.profiler_by_type = bpy.props.BoolProperty(
+        name="Per Modifier/Constraint Type",
+        description="逐个关闭每种修改器和约束类型，测量各自的耗时（测量次数成倍增加）",
+        default=True
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("profiler_frame_count", "profiler_by_type"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(DepsgraphProfilerPanel)
+    bpy.utils.register_class(DepsgraphProfiler)
+
+
+def unregister():
+    bpy.utils.unregister_class(DepsgraphProfiler)
+    bpy.utils.unregister_class(DepsgraphProfilerPanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,68 @@
+# 编译后骨骼字典的磁盘缓存（marshal，不依赖 bpy）
+# 以全部源 CSV 的内容哈希校验：内容不变时直接载入，跳过 CSV 解析和合并。
+# 缓存目录与 Blender 的用户缓存目录一致，可用环境变量 MMD_TOOLS_HELPER_CACHE 覆盖。
+import os
+import sys
+import marshal
+import hashlib
+
+CACHE_ENV = "MMD_TOOLS_HELPER_CACHE"
+CACHE_FILE = "bone_dictionaries.marshal"
+
+# 缓存内容格式变化时加一，旧缓存自动失效
+FORMAT_VERSION = 1
+
+
+def blender_cache_dir():
+    """Blender 的用户缓存目录（与 Blender 内部使用的位置相同）"""
+    if sys.platform == "win32":
+        base = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "Blender Foundation", "Blender", "Cache")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches/Blender")
+    else:
+        base = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "blender")
+    return base
+
+
+def cache_dir():
+    return os.environ.get(CACHE_ENV) or os.path.join(blender_cache_dir(), "mmd_tools_helper")
+
+
+def source_digest(sources):
+    """sources 为 [(路径, 标记), ...]；路径、标记和文件内容都计入哈希"""
+    h = hashlib.sha1(f"v{FORMAT_VERSION}|{marshal.version}".encode())
+    for path, tag in sources:
+        h.update(f"|{os.path.basename(path)}|{tag}|".encode("utf-8"))
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def load(digest, directory=None):
+    """哈希一致时返回缓存的数据，否则返回 None"""
+    path = os.path.join(directory or cache_dir(), CACHE_FILE)
+    try:
+        with open(path, "rb") as f:
+            cached_digest, data = marshal.loads(f.read())  # 整块读取比 marshal.load(f) 逐段读取快得多
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return data if cached_digest == digest else None
+
+
+def save(digest, data, directory=None):
+    """原子写入（先写临时文件再替换）；缓存目录不可写时静默跳过"""
+    directory = directory or cache_dir()
+    path = os.path.join(directory, CACHE_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(marshal.dumps((digest, data)))
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
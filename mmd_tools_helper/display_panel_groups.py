@@ -1,6 +1,6 @@
 import bpy
 from . import model
-from . import import_csv
+from . import rig_detection
 
 # ------------------------------
 # 辅助函数：兼容MMD Tools不同版本的Display Item Frame结构
@@ -227,10 +227,9 @@ My_Display_Panel_Groups = [
 
 def display_panel_groups_create(root, armature_object):
     """按自定义规则生成显示面板组（骨骼名称匹配+IK约束）"""
-    # 加载CSV骨骼字典（依赖import_csv模块）
+    # 加载骨骼字典（内置字典与用户覆盖字典合并后的结果）
     try:
-        BONE_NAMES_DICTIONARY = import_csv.use_csv_bones_dictionary()
-        FINGER_BONE_NAMES_DICTIONARY = import_csv.use_csv_bones_fingers_dictionary()
+        BONE_NAMES_DICTIONARY, FINGER_BONE_NAMES_DICTIONARY = rig_detection.dictionaries()
     except Exception as e:
         raise Exception(f"加载骨骼字典失败：{str(e)}")
     
@@ -0,0 +1,295 @@
+import bpy
+import re
+import numpy as np
+from . import model
+from . import mmd_logging
+from . import vertex_weights
+
+# 动作 F 曲线中的骨骼路径：pose.bones["name"].xxx
+POSE_BONE_PATH = re.compile(r'pose\.bones\["((?:[^"\\]|\\.)*)"\]')
+
+# 约束中可能引用骨骼的属性
+CONSTRAINT_BONE_ATTRS = ("subtarget",)
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class HelperBonePruningPanel(bpy.types.Panel):
+    """查找并删除不参与任何变形的辅助骨骼"""
+    bl_idname = "OBJECT_PT_mmd_helper_bone_pruning"
+    bl_label = "MMD Helper Bone Pruning"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.label(text="Prune Non-Deforming Bones", icon="BONE_DATA")
+        layout.prop(scene, "bone_prune_weight_threshold")
+        layout.prop(scene, "bone_prune_report_only")
+        row = layout.row()
+        row.operator("mmd_tools_helper.helper_bone_pruning", text="Prune Helper Bones")
+        row.enabled = context.active_object is not None
+
+
+# ------------------------------
+# 2. 一次性收集所有引用（权重、约束、驱动器、动画、子对象、mmd_tools 数据）
+# ------------------------------
+def weighted_bone_names(armature_obj, mesh_objects_list, threshold):
+    """在任一网格中有有效权重的顶点组名称"""
+    names = set()
+    for mesh_obj in mesh_objects_list:
+        if len(mesh_obj.vertex_groups) == 0:
+            continue
+        counts, groups, weights = vertex_weights.read_weights(mesh_obj)
+        totals = vertex_weights.group_totals(mesh_obj, groups, weights)
+        for i in np.flatnonzero(totals >= threshold):
+            names.add(mesh_obj.vertex_groups[int(i)].name)
+    return names
+
+
+def constraint_references(armature_obj, constraints, names):
+    for con in constraints:
+        targets = [con] + list(getattr(con, "targets", []))  # 骨架约束有多个目标
+        for t in targets:
+            if getattr(t, "target", None) != armature_obj:
+                continue
+            for attr in CONSTRAINT_BONE_ATTRS:
+                name = getattr(t, attr, "")
+                if name:
+                    names.add(name)
+        if getattr(con, "pole_target", None) == armature_obj and con.pole_subtarget:
+            names.add(con.pole_subtarget)
+
+
+def driver_references(armature_obj, id_data, names):
+    anim = getattr(id_data, "animation_data", None)
+    if anim is None:
+        return
+    for fcurve in anim.drivers:
+        for var in fcurve.driver.variables:
+            for t in var.targets:
+                if t.id != armature_obj:
+                    continue
+                if t.bone_target:
+                    names.add(t.bone_target)
+                for match in POSE_BONE_PATH.finditer(t.data_path or ""):
+                    names.add(match.group(1))
+
+
+def animated_bone_names():
+    """所有动作中有 F 曲线的骨骼（VMD 动作可能稍后才指定给骨架，因此扫描全部动作）"""
+    names = set()
+    for action in bpy.data.actions:
+        for fcurve in action.fcurves:
+            match = POSE_BONE_PATH.match(fcurve.data_path)
+            if match:
+                names.add(match.group(1))
+    return names
+
+
+def mmd_references(armature_obj, root, names):
+    """骨骼 Morph、付与亲骨骼、刚体绑定骨骼"""
+    for pose_bone in armature_obj.pose.bones:
+        mmd_bone = getattr(pose_bone, "mmd_bone", None)
+        if mmd_bone is not None and getattr(mmd_bone, "additional_transform_bone", ""):
+            names.add(mmd_bone.additional_transform_bone)
+    if root is None or not hasattr(root, "mmd_root"):
+        return
+    for morph in root.mmd_root.bone_morphs:
+        for item in morph.data:
+            if item.bone:
+                names.add(item.bone)
+    for rigid in model.find_mmd_rigid_bodies_list(root):
+        bone = getattr(getattr(rigid, "mmd_rigid", None), "bone", "")
+        if bone:
+            names.add(bone)
+
+
+def referenced_bone_names(context, armature_obj, root, mesh_objects_list, threshold):
+    """返回 {原因: 骨骼名称集合}"""
+    constrained = set()
+    driven = set()
+    parented = set()
+    for obj in context.scene.objects:
+        constraint_references(armature_obj, obj.constraints, constrained)
+        if obj.type == 'ARMATURE':
+            for pose_bone in obj.pose.bones:
+                constraint_references(armature_obj, pose_bone.constraints, constrained)
+        driver_references(armature_obj, obj, driven)
+        if obj.type == 'MESH' and obj.data.shape_keys:
+            driver_references(armature_obj, obj.data.shape_keys, driven)
+        if obj.parent == armature_obj and obj.parent_type == 'BONE' and obj.parent_bone:
+            parented.add(obj.parent_bone)
+
+    # IK 约束会移动父骨骼链，自身带 IK 的骨骼也要保留
+    ik_owners = {
+        pb.name for pb in armature_obj.pose.bones
+        if any(con.type in {'IK', 'SPLINE_IK'} for con in pb.constraints)
+    }
+
+    mmd = set()
+    mmd_references(armature_obj, root, mmd)
+    return {
+        "weights": weighted_bone_names(armature_obj, mesh_objects_list, threshold),
+        "constraints": constrained | ik_owners,
+        "drivers": driven,
+        "animation": animated_bone_names(),
+        "children": parented,
+        "mmd": mmd,
+    }
+
+
+def find_prunable_bones(armature_obj, references):
+    """没有任何引用、且所有子骨骼都可删除的骨骼（自底向上判断，保证删除后其余骨骼层级不变）"""
+    referenced = set().union(*references.values())
+    keep = {}
+
+    def is_kept(bone):
+        if bone.name not in keep:
+            kept_child = False
+            for child in bone.children:
+                kept_child = is_kept(child) or kept_child
+            keep[bone.name] = kept_child or bone.name in referenced
+        return keep[bone.name]
+
+    for bone in armature_obj.data.bones:
+        if bone.parent is None:
+            is_kept(bone)
+    return [bone.name for bone in armature_obj.data.bones if not keep[bone.name]]
+
+
+# ------------------------------
+# 3. 删除（单次编辑模式会话）
+# ------------------------------
+def delete_bones(context, armature_obj, bone_names):
+    view_layer = context.view_layer
+    view_layer.objects.active = armature_obj
+    bpy.ops.object.mode_set(mode='EDIT')
+    edit_bones = armature_obj.data.edit_bones
+    for name in bone_names:
+        edit_bone = edit_bones.get(name)
+        if edit_bone is not None:
+            edit_bones.remove(edit_bone)
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+
+def remove_bone_references(root, mesh_objects_list, bone_names):
+    """删除同名的空顶点组和显示面板中的骨骼项"""
+    doomed = set(bone_names)
+    for mesh_obj in mesh_objects_list:
+        for vg in [vg for vg in mesh_obj.vertex_groups if vg.name in doomed]:
+            mesh_obj.vertex_groups.remove(vg)
+    if root is None or not hasattr(root, "mmd_root"):
+        return
+    for frame in root.mmd_root.display_item_frames:
+        items = getattr(frame, 'data', frame.items)
+        for i in range(len(items) - 1, -1, -1):
+            if items[i].type == 'BONE' and items[i].name in doomed:
+                items.remove(i)
+
+
+# ------------------------------
+# 4. 主流程
+# ------------------------------
+def main(context):
+    scene = context.scene
+    active_obj = context.view_layer.objects.active
+    armature_obj = model.findArmature(active_obj)
+    if not (armature_obj and armature_obj.type == 'ARMATURE'):
+        raise Exception("未找到有效的骨架对象")
+    root = model.findRoot(armature_obj)
+    mesh_objects_list = model.find_MMD_MeshesList(active_obj) or model.findMeshesList(armature_obj)
+
+    if context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    references = referenced_bone_names(
+        context, armature_obj, root, mesh_objects_list, scene.bone_prune_weight_threshold
+    )
+    for reason, names in references.items():
+        mmd_logging.debug(f"{reason}: {len(names)} 个骨骼被引用")
+
+    prunable = find_prunable_bones(armature_obj, references)
+    total = len(armature_obj.data.bones)
+    mmd_logging.info(f"{armature_obj.name}: {total} 个骨骼中 {len(prunable)} 个可删除")
+    for name in prunable:
+        mmd_logging.debug(f"  - {name}")
+
+    if prunable and not scene.bone_prune_report_only:
+        delete_bones(context, armature_obj, prunable)
+        remove_bone_references(root, mesh_objects_list, prunable)
+        mmd_logging.info(f"已删除 {len(prunable)} 个骨骼，剩余 {len(armature_obj.data.bones)} 个")
+    context.view_layer.objects.active = active_obj
+    return len(prunable), total
+
+
+# ------------------------------
+# 5. 操作器类
+# ------------------------------
+class HelperBonePruning(bpy.types.Operator):
+    """删除没有权重、没有约束/驱动器引用、没有动画且没有需保留子骨骼的骨骼"""
+    bl_idname = "mmd_tools_helper.helper_bone_pruning"
+    bl_label = "Prune Helper Bones"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Helper Bone Pruning", context.scene):
+                count, total = main(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        if context.scene.bone_prune_report_only:
+            self.report({'INFO'}, f"{count} of {total} bones can be removed (report only)")
+        else:
+            self.report({'INFO'}, f"Removed {count} of {total} bones")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 6. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.bone_prune_weight_threshold = bpy.props.FloatProperty(
+        name="Weight Threshold",
+        description="顶点组权重总和低于此值的骨骼视为没有权重",
+        default=1e-4,
+        min=0.0,
+        precision=5
+    )
+    bpy.types.Scene.bone_prune_report_only = bpy.props.BoolProperty(
+        name="Report Only",
+        description="只输出可删除的骨骼列表，不修改骨架",
+        default=True
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("bone_prune_weight_threshold", "bone_prune_report_only"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(HelperBonePruningPanel)
+    bpy.utils.register_class(HelperBonePruning)
+
+
+def unregister():
+    bpy.utils.unregister_class(HelperBonePruning)
+    bpy.utils.unregister_class(HelperBonePruningPanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()
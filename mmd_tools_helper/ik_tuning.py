@@ -0,0 +1,210 @@
+import bpy
+from . import model
+from . import mmd_logging
+from . import performance_mode
+from . import depsgraph_profiler
+
+# 调整方案：(多骨骼链迭代次数, 单骨骼链迭代次数)
+# QUALITY 与 add_foot_leg_ik / add_hand_arm_ik 生成的默认值相同
+IK_PROFILES = {
+    'MMD': (15, 3),
+    'QUALITY': (48, 6),
+    'FAST': (8, 2),
+}
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class IKTuningPanel(bpy.types.Panel):
+    """列出 MMD 模型中的 IK 约束并批量调整迭代次数"""
+    bl_idname = "OBJECT_PT_mmd_ik_tuning"
+    bl_label = "MMD IK Audit and Tuning"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.prop(scene, "ik_tuning_all_models")
+        row = layout.row()
+        row.prop(scene, "ik_audit_measure")
+        row.prop(scene, "profiler_frame_count", text="Frames")
+        layout.operator("mmd_tools_helper.ik_audit", text="Audit IK Constraints", icon="CON_KINEMATIC")
+        layout.prop(scene, "ik_tuning_profile", text="")
+        layout.operator("mmd_tools_helper.ik_tuning", text="Apply IK Profile")
+
+
+# ------------------------------
+# 2. 收集 IK 约束
+# ------------------------------
+def target_armatures(context):
+    """全部模型或仅当前选中模型的骨架"""
+    if context.scene.ik_tuning_all_models:
+        armatures = [model.armature(root) for root in performance_mode.find_roots(context.scene)]
+    else:
+        active_obj = context.view_layer.objects.active
+        armatures = [model.findArmature(active_obj)] if active_obj else []
+    return [a for a in armatures if a is not None and a.type == 'ARMATURE']
+
+
+def effective_chain_length(pose_bone, chain_count):
+    """chain_count 为 0 时 IK 链一直延伸到根骨骼"""
+    length = 0
+    bone = pose_bone
+    while bone is not None and (chain_count == 0 or length < chain_count):
+        length += 1
+        bone = bone.parent
+    return length
+
+
+def ik_constraints(armature_obj):
+    """返回 [(骨骼, 约束, 有效链长), ...]"""
+    result = []
+    for pose_bone in armature_obj.pose.bones:
+        for con in pose_bone.constraints:
+            if con.type == 'IK':
+                result.append((pose_bone, con, effective_chain_length(pose_bone, con.chain_count)))
+    return result
+
+
+# ------------------------------
+# 3. 审计 / 调整
+# ------------------------------
+def audit(context):
+    scene = context.scene
+    armatures = target_armatures(context)
+    if not armatures:
+        raise Exception("未找到有效的骨架对象")
+    if context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    start = scene.frame_current
+    frames = list(range(start, start + scene.profiler_frame_count))
+    total_count = 0
+    try:
+        full = depsgraph_profiler.time_frames(scene, frames) if scene.ik_audit_measure else None
+        for armature_obj in armatures:
+            entries = ik_constraints(armature_obj)
+            mmd_logging.info(f"{armature_obj.name}: {len(entries)} 个 IK 约束（求解器 {armature_obj.pose.ik_solver}）")
+            for pose_bone, con, length in entries:
+                line = f"  {pose_bone.name} → {con.subtarget or con.target}: 链长 {length}，迭代 {con.iterations}"
+                if con.mute:
+                    line += "（已禁用）"
+                elif full is not None:
+                    # 单个约束的耗时 = 完整耗时 - 禁用该约束后的耗时
+                    cost = full - depsgraph_profiler.time_without(scene, frames, [con], "mute", True)
+                    line += f"，约 {max(cost, 0.0):.3f} ms/帧"
+                mmd_logging.info(line)
+            total_count += len(entries)
+    finally:
+        scene.frame_set(start)
+    return total_count
+
+
+def apply_profile(context):
+    profile = context.scene.ik_tuning_profile
+    multi, single = IK_PROFILES[profile]
+    armatures = target_armatures(context)
+    if not armatures:
+        raise Exception("未找到有效的骨架对象")
+
+    changed = 0
+    for armature_obj in armatures:
+        for pose_bone, con, length in ik_constraints(armature_obj):
+            iterations = multi if length > 1 else single
+            if con.iterations != iterations:
+                mmd_logging.debug(f"{armature_obj.name}/{pose_bone.name}: {con.iterations} → {iterations}")
+                con.iterations = iterations
+                changed += 1
+    mmd_logging.info(f"方案 {profile}：{len(armatures)} 个骨架，修改 {changed} 个 IK 约束")
+    return changed
+
+
+# ------------------------------
+# 4. 操作器类
+# ------------------------------
+class IKAudit(bpy.types.Operator):
+    """列出每个 IK 约束的链长、迭代次数和测得的求解耗时"""
+    bl_idname = "mmd_tools_helper.ik_audit"
+    bl_label = "Audit IK Constraints"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("IK Audit", context.scene):
+                count = audit(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"{count} IK constraints listed in the log")
+        return {'FINISHED'}
+
+
+class IKTuning(bpy.types.Operator):
+    """按所选方案批量设置 IK 约束的迭代次数"""
+    bl_idname = "mmd_tools_helper.ik_tuning"
+    bl_label = "Apply IK Profile"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("IK Tuning", context.scene):
+                changed = apply_profile(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Updated {changed} IK constraints")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 5. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.ik_tuning_profile = bpy.props.EnumProperty(
+        items=[
+            ('MMD', 'MMD-like', '接近 MMD 的低迭代次数（多骨骼链 15，单骨骼 3）'),
+            ('QUALITY', 'Quality', '与添加 IK 工具的默认值相同（多骨骼链 48，单骨骼 6）'),
+            ('FAST', 'Fast', '最低迭代次数，适合多角色预览（多骨骼链 8，单骨骼 2）'),
+        ],
+        name="IK Profile",
+        default='MMD'
+    )
+    bpy.types.Scene.ik_tuning_all_models = bpy.props.BoolProperty(
+        name="All MMD Models in Scene",
+        description="处理场景中的全部 MMD 模型，而不只是当前选中的模型",
+        default=True
+    )
+    bpy.types.Scene.ik_audit_measure = bpy.props.BoolProperty(
+        name="Measure Solve Time",
+        description="逐个禁用 IK 约束测量耗时（每个约束需要重新播放一遍帧范围）",
+        default=False
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("ik_tuning_profile", "ik_tuning_all_models", "ik_audit_measure"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(IKTuningPanel)
+    bpy.utils.register_class(IKAudit)
+    bpy.utils.register_class(IKTuning)
+
+
+def unregister():
+    bpy.utils.unregister_class(IKTuning)
+    bpy.utils.unregister_class(IKAudit)
+    bpy.utils.unregister_class(IKTuningPanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()
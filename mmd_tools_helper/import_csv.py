@@ -1,4 +1,3 @@
-import bpy
 import csv
 
 # Each row read from the csv file is returned as a list of strings.
@@ -42,3 +41,9 @@ def use_csv_translations_dictionary():
 		# print(t , ",")
 
 	return TRANSLATIONS_DICTIONARY
+
+def use_csv_dictionary(path):
+	"""Any dictionary-style csv file (e.g. a user overlay); same format as the shipped files."""
+	with open(path, newline='', encoding='utf-8') as csvfile:
+		CSVreader = csv.reader(csvfile, delimiter=',', skipinitialspace=True)
+		return [tuple(x) for x in CSVreader]
@@ -17,6 +17,7 @@ import bpy
 # --------------------------
 try:
     from . import model  # 骨架/网格查找核心模块
+    from . import mmd_logging
     DEPENDENCIES_LOADED = True
     print("✅ MMD Miscellaneous Tools: 'model.py' loaded successfully")
 except ImportError as e:
@@ -44,7 +45,7 @@ def all_materials_mmd_ambient_white():
                 mat.mmd_material.ambient_color = (1.0, 1.0, 1.0, 1.0)  # 3.6 支持直接赋值元组
                 updated_count += 1
 
-    print(f"\n✅ Set MMD ambient color to white for {updated_count} materials")
+    mmd_logging.info(f"Set MMD ambient color to white for {updated_count} materials")
     return updated_count
 
 
@@ -76,7 +77,7 @@ def combine_2_bones_1_bone(parent_bone_name, child_bone_name):
 
     # 切回姿态模式
     bpy.ops.object.mode_set(mode='POSE')
-    print(f"\n✅ Combined bones: Parent='{parent_bone_name}', Child='{child_bone_name}'")
+    mmd_logging.info(f"Combined bones: Parent='{parent_bone_name}', Child='{child_bone_name}'")
 
 
 def combine_2_vg_1_vg(parent_vg_name, child_vg_name):
@@ -110,12 +111,12 @@ def combine_2_vg_1_vg(parent_vg_name, child_vg_name):
         # 删除子顶点组
         obj.vertex_groups.remove(child_vg)
         merged_count += 1
-        print(f"✅ Merged vertex groups: Object='{obj.name}', Parent='{parent_vg_name}', Child='{child_vg_name}'")
+        mmd_logging.info(f"Merged vertex groups: Object='{obj.name}', Parent='{parent_vg_name}', Child='{child_vg_name}'")
 
     if merged_count == 0:
-        print(f"\n⚠️ No vertex groups merged (check if '{parent_vg_name}' and '{child_vg_name}' exist)")
+        mmd_logging.warning(f"No vertex groups merged (check if '{parent_vg_name}' and '{child_vg_name}' exist)")
     else:
-        print(f"\n✅ Total merged vertex groups across {merged_count} objects")
+        mmd_logging.info(f"Total merged vertex groups across {merged_count} objects")
 
 
 def analyze_selected_parent_child_bone_pair():
@@ -162,17 +163,18 @@ def delete_unused_bones():
     # 遍历编辑模式骨骼（需用 list() 避免遍历中修改集合）
     for bone in list(arm_data.edit_bones):
         if 'unused' in bone.name.lower():
+            bone_name = bone.name  # 删除后 EditBone 引用失效，先保存名称
             arm_data.edit_bones.remove(bone)
             deleted_count += 1
-            print(f"✅ Deleted unused bone: '{bone.name}'")
+            mmd_logging.info(f"Deleted unused bone: '{bone_name}'")
 
     # 切回姿态模式
     bpy.ops.object.mode_set(mode='POSE')
 
     if deleted_count == 0:
-        print("\n⚠️ No unused bones found (look for bones with 'unused' in name)")
+        mmd_logging.warning("No unused bones found (look for bones with 'unused' in name)")
     else:
-        print(f"\n✅ Total deleted unused bones: {deleted_count}")
+        mmd_logging.info(f"Total deleted unused bones: {deleted_count}")
 
 
 def delete_unused_vertex_groups():
@@ -185,14 +187,15 @@ def delete_unused_vertex_groups():
         # 遍历顶点组（需用 list() 避免遍历中修改）
         for vg in list(obj.vertex_groups):
             if 'unused' in vg.name.lower():
+                vg_name = vg.name  # 删除后引用失效，先保存名称
                 obj.vertex_groups.remove(vg)
                 deleted_count += 1
-                print(f"✅ Deleted unused vertex group: Object='{obj.name}', Group='{vg.name}'")
+                mmd_logging.info(f"Deleted unused vertex group: Object='{obj.name}', Group='{vg_name}'")
 
     if deleted_count == 0:
-        print("\n⚠️ No unused vertex groups found (look for groups with 'unused' in name)")
+        mmd_logging.warning("No unused vertex groups found (look for groups with 'unused' in name)")
     else:
-        print(f"\n✅ Total deleted unused vertex groups: {deleted_count}")
+        mmd_logging.info(f"Total deleted unused vertex groups: {deleted_count}")
 
 
 def test_is_mmd_english_armature(armature):
@@ -210,9 +213,9 @@ def test_is_mmd_english_armature(armature):
     missing_bones = [b for b in mmd_english_key_bones if b not in arm_bone_names]
 
     if missing_bones:
-        print(f"\n⚠️ MMD English Armature Test Failed: Missing bones - {', '.join(missing_bones)}")
+        mmd_logging.warning(f"MMD English Armature Test Failed: Missing bones - {', '.join(missing_bones)}")
         return False
-    print("\n✅ MMD English Armature Test Passed: All key bones exist")
+    mmd_logging.info("MMD English Armature Test Passed: All key bones exist")
     return True
 
 
@@ -246,7 +249,7 @@ def correct_root_center():
         if "center" in arm_data.edit_bones:
             arm_data.edit_bones["center"].parent = root_bone
             arm_data.edit_bones["center"].use_connect = False  # 禁用骨骼连接
-        print("✅ Created MMD Root bone")
+        mmd_logging.info("Created MMD Root bone")
         updated = True
 
     # 4. 重命名 Center 为 Lower Body 并调整位置
@@ -254,7 +257,7 @@ def correct_root_center():
     if "center" in arm_data.bones:
         # 重命名 Center → Lower Body
         arm_data.bones["center"].name = "lower body"
-        print("✅ Renamed 'center' bone to 'lower body'")
+        mmd_logging.info("Renamed 'center' bone to 'lower body'")
 
         # 调整 Lower Body 骨骼尾端位置（基于左右腿骨骼）
         bpy.ops.object.mode_set(mode='EDIT')
@@ -262,7 +265,7 @@ def correct_root_center():
             leg_l_head_z = arm_data.edit_bones["leg_L"].head.z
             leg_r_head_z = arm_data.edit_bones["leg_R"].head.z
             arm_data.edit_bones["lower body"].tail.z = 0.5 * (leg_l_head_z + leg_r_head_z)
-            print("✅ Adjusted 'lower body' bone tail position")
+            mmd_logging.info("Adjusted 'lower body' bone tail position")
         updated = True
 
     # 5. 重建 Center 骨骼（若不存在）
@@ -286,13 +289,13 @@ def correct_root_center():
                 arm_data.edit_bones["lower body"].parent = center_bone
             if "upper body" in arm_data.edit_bones:
                 arm_data.edit_bones["upper body"].parent = center_bone
-        print("✅ Created MMD Center bone")
+        mmd_logging.info("Created MMD Center bone")
         updated = True
 
     # 切回对象模式
     bpy.ops.object.mode_set(mode='OBJECT')
     if not updated:
-        print("\n⚠️ No changes made: Root/Center bones are already correct")
+        mmd_logging.warning("No changes made: Root/Center bones are already correct")
 
 
 # --------------------------
@@ -409,17 +412,17 @@ class MiscellaneousTools(bpy.types.Operator):
 
     def execute(self, context):
         try:
-            # 执行主逻辑
-            main(context)
+            # 执行主逻辑（日志在会话结束时统一输出）
+            with mmd_logging.session("Miscellaneous Tools", context.scene):
+                main(context)
             # 状态栏反馈成功
             self.report({'INFO'}, f"Success! Check console for details")
             return {'FINISHED'}
 
         except Exception as e:
-            # 捕获所有异常，状态栏显示精简错误
+            # 捕获所有异常，状态栏显示精简错误（完整错误已由日志会话输出）
             error_msg = str(e)[:100]  # 截取前100字符，避免显示过长
             self.report({'ERROR'}, f"Failed: {error_msg}")
-            print(f"\n❌ Tool Execution Error: {str(e)}")  # 控制台打印完整错误
             return {'CANCELLED'}
 
 
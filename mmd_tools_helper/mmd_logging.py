@@ -0,0 +1,235 @@
+import bpy
+import collections
+import json
+import os
+import time
+
+# ------------------------------
+# 1. 日志级别与全局缓冲
+# ------------------------------
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+# 环形缓冲容量：超出部分只计数不保存，避免长批处理无限占用内存
+BUFFER_SIZE = 2000
+
+
+class _LogState:
+    """单个操作器会话的日志状态（级别、环形缓冲、计数）"""
+
+    def __init__(self):
+        self.level = INFO
+        self.quiet = False
+        self.json_path = ""
+        self.operator = ""
+        self.started = 0.0
+        self.records = collections.deque(maxlen=BUFFER_SIZE)
+        self.counts = collections.Counter()
+        self.dropped = 0
+        self.active = False
+
+    def reset(self, operator):
+        self.operator = operator
+        self.started = time.perf_counter()
+        self.records.clear()
+        self.counts.clear()
+        self.dropped = 0
+        self.active = True
+
+
+_state = _LogState()
+
+
+# ------------------------------
+# 2. 写入接口（会话中仅追加到内存，不做任何 I/O）
+# ------------------------------
+def log(level, msg):
+    """记录一条日志；低于当前级别的消息直接丢弃
+    会话之外（帧切换、依赖图更新等处理函数中）没有 flush，直接输出"""
+    if level < _state.level:
+        return
+    if not _state.active:
+        print(f"{LEVEL_NAMES[level]:<7} {msg}")
+        return
+    _state.counts[level] += 1
+    if len(_state.records) == BUFFER_SIZE:
+        _state.dropped += 1
+    _state.records.append((level, msg))
+
+
+def debug(msg):
+    log(DEBUG, msg)
+
+
+def info(msg):
+    log(INFO, msg)
+
+
+def warning(msg):
+    log(WARNING, msg)
+
+
+def error(msg):
+    log(ERROR, msg)
+
+
+# ------------------------------
+# 3. 会话控制（每个操作器开始一次、结束时汇总输出一次）
+# ------------------------------
+def configure(scene=None, level=None, quiet=None, json_path=None):
+    """从场景属性（或显式参数）读取日志配置"""
+    if scene is not None and hasattr(scene, "mmd_helper_log_level"):
+        _state.level = int(scene.mmd_helper_log_level)
+        _state.quiet = scene.mmd_helper_log_quiet
+        _state.json_path = bpy.path.abspath(scene.mmd_helper_log_json_path)
+    if level is not None:
+        _state.level = level
+    if quiet is not None:
+        _state.quiet = quiet
+    if json_path is not None:
+        _state.json_path = json_path
+
+
+def begin(operator, scene=None):
+    """开始新的日志会话（清空缓冲）"""
+    configure(scene)
+    _state.reset(operator)
+
+
+def summary():
+    """返回当前会话的汇总字符串"""
+    elapsed = time.perf_counter() - _state.started
+    parts = [f"{LEVEL_NAMES[lv]}={_state.counts[lv]}" for lv in sorted(_state.counts)]
+    return f"[{_state.operator}] {', '.join(parts) if parts else 'no messages'} ({elapsed:.3f}s)"
+
+
+def flush():
+    """会话结束：一次性输出缓冲内容、写入可选 JSON 文件，返回汇总"""
+    text = summary()
+
+    if _state.quiet:
+        # 静默模式：只输出一行汇总
+        print(text)
+    else:
+        lines = [f"{LEVEL_NAMES[lv]:<7} {msg}" for lv, msg in _state.records]
+        if _state.dropped:
+            lines.insert(0, f"... {_state.dropped} earlier messages dropped (buffer size {BUFFER_SIZE})")
+        lines.append(text)
+        print("\n".join(lines))
+
+    if _state.json_path:
+        write_json(_state.json_path)
+
+    _state.records.clear()
+    _state.active = False
+    return text
+
+
+def write_json(path):
+    """将当前会话追加写入 JSON Lines 日志文件"""
+    entry = {
+        "operator": _state.operator,
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "elapsed": round(time.perf_counter() - _state.started, 6),
+        "counts": {LEVEL_NAMES[lv]: n for lv, n in _state.counts.items()},
+        "dropped": _state.dropped,
+        "records": [{"level": LEVEL_NAMES[lv], "msg": msg} for lv, msg in _state.records],
+    }
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"警告：无法写入 JSON 日志 {path}：{str(e)}")
+
+
+class session:
+    """上下文管理器：with mmd_logging.session("Bones Renamer", context.scene): ..."""
+
+    def __init__(self, operator, scene=None):
+        self.operator = operator
+        self.scene = scene
+
+    def __enter__(self):
+        begin(self.operator, self.scene)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            error(f"{exc_type.__name__}: {exc}")
+        flush()
+        return False
+
+
+# ------------------------------
+# 4. 面板类（日志设置）
+# ------------------------------
+class MMDHelperLoggingPanel(bpy.types.Panel):
+    """MMD Tools Helper 日志设置"""
+    bl_idname = "OBJECT_PT_mmd_helper_logging"
+    bl_label = "MMD Helper Logging"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.prop(scene, "mmd_helper_log_level", text="Level")
+        layout.prop(scene, "mmd_helper_log_quiet")
+        layout.prop(scene, "mmd_helper_log_json_path", text="JSON Log")
+
+
+# ------------------------------
+# 5. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.mmd_helper_log_level = bpy.props.EnumProperty(
+        items=[
+            (str(DEBUG), "Debug", "记录所有逐项信息"),
+            (str(INFO), "Info", "记录逐项操作结果"),
+            (str(WARNING), "Warning", "仅记录警告和错误"),
+            (str(ERROR), "Error", "仅记录错误"),
+        ],
+        name="Log Level",
+        default=str(INFO),
+        description="MMD Tools Helper 日志级别"
+    )
+    bpy.types.Scene.mmd_helper_log_quiet = bpy.props.BoolProperty(
+        name="Quiet",
+        description="静默模式：每个操作器只在控制台输出一行汇总",
+        default=False
+    )
+    bpy.types.Scene.mmd_helper_log_json_path = bpy.props.StringProperty(
+        name="JSON Log File",
+        description="可选：将每次操作的日志追加写入此 JSON Lines 文件（留空则不写）",
+        default="",
+        subtype='FILE_PATH'
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("mmd_helper_log_level", "mmd_helper_log_quiet", "mmd_helper_log_json_path"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(MMDHelperLoggingPanel)
+
+
+def unregister():
+    bpy.utils.unregister_class(MMDHelperLoggingPanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,197 @@
+# 日文 → 英文名称翻译引擎（最长匹配字典树 + 片段缓存，不依赖 bpy）
+# 翻译表来源（后者覆盖前者）：内置常用片段、骨骼字典的 mmd_japanese/mmd_english 列、
+# translations.csv（如果存在）、用户指定的 CSV（日文,英文）。
+import os
+import re
+import csv
+import unicodedata
+
+try:
+    from . import import_csv
+    from . import rig_detection
+except ImportError:  # 在 Blender 外以顶层模块导入
+    import import_csv
+    import rig_detection
+
+# 常用片段（骨骼、Morph、材质名称中反复出现的部分）
+FRAGMENTS = {
+    "左": "left", "右": "right", "前": "front", "後": "back", "後ろ": "back", "横": "side",
+    "上": "upper", "下": "lower", "中": "middle", "先": "tip", "元": "root", "根": "root",
+    "親": "parent", "全ての親": "root", "操作中心": "view center", "センター": "center",
+    "グルーブ": "groove", "腰": "waist", "上半身": "upper body", "下半身": "lower body",
+    "首": "neck", "頭": "head", "肩": "shoulder", "腕": "arm", "ひじ": "elbow", "肘": "elbow",
+    "手首": "wrist", "手": "hand", "捩": "twist", "足": "leg", "ひざ": "knee", "膝": "knee",
+    "足首": "ankle", "つま先": "toe", "目": "eye", "両目": "eyes", "指": "finger",
+    "親指": "thumb", "人指": "index", "人差指": "index", "中指": "middle", "薬指": "ring",
+    "小指": "little", "胸": "breast", "乳": "breast", "尻": "hip", "髪": "hair", "前髪": "bangs",
+    "後髪": "back hair", "横髪": "side hair", "もみあげ": "sideburn", "アホ毛": "ahoge",
+    "ツインテ": "twintail", "ポニテ": "ponytail", "リボン": "ribbon", "スカート": "skirt",
+    "袖": "sleeve", "襟": "collar", "ネクタイ": "tie", "帽子": "hat", "服": "clothes",
+    "上着": "jacket", "靴": "shoes", "靴下": "socks", "ソックス": "socks", "手袋": "gloves",
+    "帯": "belt", "ベルト": "belt", "紐": "string", "飾り": "ornament", "尻尾": "tail",
+    "しっぽ": "tail", "耳": "ear", "ケモミミ": "kemomimi", "羽": "wing", "翼": "wing",
+    "剣": "sword", "鞘": "sheath", "ダミー": "dummy", "調整": "adjust", "補助": "helper",
+    "揺れ": "sway", "物理": "physics", "IK": "IK", "ＩＫ": "IK", "先端": "tip",
+    # 材质
+    "肌": "skin", "顔": "face", "白目": "eye white", "瞳": "pupil", "眉": "brow", "まつげ": "eyelash",
+    "睫毛": "eyelash", "口": "mouth", "歯": "teeth", "舌": "tongue", "頬": "cheek", "体": "body",
+    "身体": "body", "金属": "metal", "影": "shadow", "ハイライト": "highlight", "透過": "transparent",
+    "表情": "expression", "線": "line", "その他": "other",
+    # Morph
+    "まばたき": "blink", "笑い": "smile", "ウィンク": "wink", "ウィンク右": "wink right",
+    "ウィンク２": "wink 2", "ｳｨﾝｸ": "wink", "はぅ": "hau", "なごみ": "calm", "びっくり": "surprised",
+    "じと目": "jito-eye", "瞳小": "pupil small", "瞳大": "pupil large", "星目": "star eye",
+    "はぁと": "heart", "ハイライト消": "highlight off", "あ": "a", "い": "i", "う": "u",
+    "え": "e", "お": "o", "ワ": "wa", "ω": "omega", "ぺろっ": "tongue out", "にやり": "grin",
+    "真面目": "serious", "困る": "troubled", "怒り": "angry", "照れ": "blush", "涙": "tears",
+    "青ざめ": "pale", "にこり": "smile", "ニヤリ": "grin", "口角上げ": "mouth corner up",
+    "口角下げ": "mouth corner down", "口横広げ": "mouth wide", "眉上": "brow up",
+    "眉下": "brow down", "上げ": "up", "下げ": "down", "広げ": "wide", "縮小": "shrink",
+    "拡大": "enlarge", "消": "off", "非表示": "hide",
+}
+
+# 名称开头的左右前缀 → MMD 英文名称的 _L/_R 后缀
+SIDE_PREFIXES = {"左": "_L", "右": "_R"}
+
+# 分隔数字和文本片段（髪1、スカート_0_1 中的编号单独保留，片段可复用缓存）
+_SPLIT = re.compile(r"(\d+|[\s_.\-]+)")
+
+_END = ""  # 字典树中保存译文的键
+
+
+def normalize(text):
+    """全角英数字、半角片假名统一（ＩＫ → IK，ｳｨﾝｸ → ウィンク）"""
+    return unicodedata.normalize("NFKC", text)
+
+
+def is_translated(text):
+    return text.isascii()
+
+
+class Translator:
+    """最长匹配翻译；整名和片段两级缓存"""
+
+    def __init__(self, table=()):
+        self.trie = {}
+        self.size = 0
+        self._names = {}      # 整名缓存
+        self._fragments = {}  # 片段缓存
+        self.update(table)
+
+    def update(self, table):
+        """加入 (日文, 英文) 条目；后加入的覆盖先加入的"""
+        for source, target in table:
+            source = normalize(source.strip())
+            target = target.strip()
+            if not source or not target:
+                continue
+            node = self.trie
+            for ch in source:
+                node = node.setdefault(ch, {})
+            if _END not in node:
+                self.size += 1
+            node[_END] = target
+        self._names.clear()
+        self._fragments.clear()
+
+    def _longest(self, text, start):
+        node = self.trie
+        best = None
+        for i in range(start, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            if _END in node:
+                best = (i + 1, node[_END])
+        return best
+
+    def _fragment(self, text):
+        cached = self._fragments.get(text)
+        if cached is not None:
+            return cached
+        out = []
+        i = 0
+        while i < len(text):
+            match = self._longest(text, i)
+            if match is None:
+                out.append(text[i])  # 未知字符原样保留
+                i += 1
+                continue
+            i, word = match
+            if out and out[-1][-1:].isalnum():
+                out.append("_")
+            out.append(word)
+        result = "".join(out)
+        self._fragments[text] = result
+        return result
+
+    def translate(self, name):
+        """返回译文；无法完全翻译时保留未知字符（可用 is_translated 判断）"""
+        cached = self._names.get(name)
+        if cached is not None:
+            return cached
+        text = normalize(name)
+        suffix = ""
+        # 整名不在表中时，把开头的 左/右 转为 _L/_R 后缀（左腕捩 → arm twist_L）
+        if text[:1] in SIDE_PREFIXES and len(text) > 1 and self._exact(text) is None:
+            suffix = SIDE_PREFIXES[text[0]]
+            text = text[1:]
+        exact = self._exact(text)
+        if exact is not None:
+            result = exact + suffix
+        else:
+            result = "".join(self._fragment(part) if i % 2 == 0 else part
+                             for i, part in enumerate(_SPLIT.split(text)) if part) + suffix
+        self._names[name] = result
+        return result
+
+    def _exact(self, text):
+        node = self.trie
+        for ch in text:
+            node = node.get(ch)
+            if node is None:
+                return None
+        return node.get(_END)
+
+
+# ------------------------------
+# 翻译表
+# ------------------------------
+def dictionary_table():
+    """骨骼字典中 mmd_japanese → mmd_english 的整名对照"""
+    return list(rig_detection.rename_map("mmd_japanese", "mmd_english").items())
+
+
+def shipped_table():
+    """插件目录中的 translations.csv（没有时返回空表）"""
+    try:
+        return import_csv.use_csv_translations_dictionary()
+    except FileNotFoundError:
+        return []
+
+
+def read_table(path):
+    """用户 CSV：每行 日文,英文"""
+    with open(path, newline='', encoding='utf-8') as csvfile:
+        return [tuple(row[:2]) for row in csv.reader(csvfile, skipinitialspace=True) if len(row) >= 2]
+
+
+_translators = {}
+
+
+def get_translator(user_table=""):
+    """按用户表路径和修改时间缓存编译好的翻译器（骨骼字典重新编译后也会重建）"""
+    rig_detection.dictionaries()  # 先检查骨骼字典是否需要重新编译
+    key = (rig_detection.generation,)
+    if user_table:
+        key += (user_table, os.path.getmtime(user_table))
+    translator = _translators.get(key)
+    if translator is None:
+        translator = Translator(FRAGMENTS.items())
+        translator.update(dictionary_table())
+        translator.update(shipped_table())
+        if user_table:
+            translator.update(read_table(user_table))
+        _translators.clear()
+        _translators[key] = translator
+    return translator
@@ -0,0 +1,335 @@
+import bpy
+import json
+from . import model
+from . import mmd_logging
+
+# 记录修改内容的场景自定义属性（随 .blend 文件保存，重新打开后仍可恢复）
+STATE_KEY = "mmd_helper_performance_state"
+
+# 平面颜色着色节点名称
+FLAT_NODE_NAME = "mmd_helper_flat_color"
+
+# 描边修改器：实体化修改器，或名称包含以下关键字的修改器
+OUTLINE_KEYWORDS = ("edge", "outline", "輪郭")
+
+# 辅助骨骼名称关键字（与 display_panel_groups 的过滤规则一致）
+HELPER_BONE_KEYWORDS = ("dummy", "shadow", "unused")
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class PerformanceModePanel(bpy.types.Panel):
+    """一键切换 MMD 场景的视口播放性能模式"""
+    bl_idname = "OBJECT_PT_mmd_performance_mode"
+    bl_label = "MMD Performance Mode"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        enabled = is_enabled(scene)
+
+        col = layout.column()
+        col.enabled = not enabled  # 启用期间不允许修改选项，保证恢复内容一致
+        col.prop(scene, "perf_mode_physics")
+        col.prop(scene, "perf_mode_outlines")
+        col.prop(scene, "perf_mode_flat_materials")
+        col.prop(scene, "perf_mode_helper_bones")
+        col.prop(scene, "perf_mode_simplify")
+
+        row = layout.row()
+        row.scale_y = 1.2
+        if enabled:
+            row.operator("mmd_tools_helper.performance_mode", text="Restore Original State", icon="LOOP_BACK")
+        else:
+            row.operator("mmd_tools_helper.performance_mode", text="Enable Performance Mode", icon="MOD_TIME")
+
+
+# ------------------------------
+# 2. 修改记录（只记录实际改变的值，恢复时逆序写回）
+# ------------------------------
+def _resolve(ref):
+    """根据记录的引用找回数据；数据已被删除时返回 None"""
+    kind = ref[0]
+    if kind == "scene":
+        scene = bpy.data.scenes.get(ref[1])
+        return getattr(scene, ref[2], None) if scene and len(ref) > 2 else scene
+    if kind == "object":
+        return bpy.data.objects.get(ref[1])
+    if kind == "modifier":
+        obj = bpy.data.objects.get(ref[1])
+        return obj.modifiers.get(ref[2]) if obj else None
+    if kind == "bone":
+        obj = bpy.data.objects.get(ref[1])
+        return obj.data.bones.get(ref[2]) if obj and obj.type == 'ARMATURE' else None
+    if kind == "material":
+        return bpy.data.materials.get(ref[1])
+    return None
+
+
+def _json_value(value):
+    if isinstance(value, (bool, int, float, str)) or value is None:
+        return value
+    return list(value)
+
+
+class ChangeRecorder:
+    """设置属性并记录原值"""
+
+    def __init__(self):
+        self.changes = []
+
+    def set(self, ref, target, attr, value):
+        old = getattr(target, attr)
+        if _json_value(old) == _json_value(value):
+            return False
+        self.changes.append({"ref": ref, "attr": attr, "value": _json_value(old)})
+        setattr(target, attr, value)
+        return True
+
+    def flat_material(self, material, link):
+        self.changes.append({"ref": ["material", material.name], "flat": True, "link": link})
+
+
+def is_enabled(scene):
+    return STATE_KEY in scene.keys()
+
+
+# ------------------------------
+# 3. 各项优化
+# ------------------------------
+def find_roots(scene):
+    return [obj for obj in scene.objects if getattr(obj, "mmd_type", None) == 'ROOT']
+
+
+def disable_physics(recorder, scene, roots):
+    """关闭刚体世界，并隐藏刚体/关节对象（减少视口绘制）"""
+    if scene.rigidbody_world is not None:
+        recorder.set(["scene", scene.name, "rigidbody_world"], scene.rigidbody_world, "enabled", False)
+    for root in roots:
+        for obj in model.find_mmd_rigid_bodies_list(root) + model.find_mmd_joints_list(root):
+            recorder.set(["object", obj.name], obj, "hide_viewport", True)
+
+
+def mute_outlines(recorder, roots):
+    for root in roots:
+        for obj in model.allObjects(None, root):
+            if obj.type != 'MESH':
+                continue
+            for mod in obj.modifiers:
+                name = mod.name.lower()
+                if mod.type == 'SOLIDIFY' or any(k in name for k in OUTLINE_KEYWORDS):
+                    recorder.set(["modifier", obj.name, mod.name], mod, "show_viewport", False)
+
+
+def material_flat_color(material):
+    """MMD 漫反射颜色（无 mmd_tools 时使用材质本身的视口颜色）"""
+    if hasattr(material, "mmd_material"):
+        r, g, b = material.mmd_material.diffuse_color[:3]
+        return (r, g, b, material.mmd_material.alpha)
+    return tuple(material.diffuse_color)
+
+
+def flatten_materials(recorder, roots):
+    """把材质输出改接到一个平面颜色节点；原节点保留但不再参与着色器编译"""
+    done = set()
+    for root in roots:
+        for obj in model.allObjects(None, root):
+            if obj.type != 'MESH':
+                continue
+            for material in obj.data.materials:
+                if material is None or material in done or not material.use_nodes:
+                    continue
+                done.add(material)
+                tree = material.node_tree
+                output = next((n for n in tree.nodes if n.type == 'OUTPUT_MATERIAL' and n.is_active_output), None)
+                if output is None or FLAT_NODE_NAME in tree.nodes:
+                    continue
+                surface = output.inputs["Surface"]
+                link = None
+                if surface.is_linked:
+                    old = surface.links[0]
+                    link = [old.from_node.name, old.from_socket.identifier]
+
+                color = material_flat_color(material)
+                flat = tree.nodes.new("ShaderNodeEmission")
+                flat.name = FLAT_NODE_NAME
+                flat.inputs["Color"].default_value = color
+                flat.location = (output.location.x - 250, output.location.y - 200)
+                tree.links.new(flat.outputs["Emission"], surface)
+                recorder.set(["material", material.name], material, "diffuse_color", color)
+                recorder.flat_material(material, link)
+
+
+def hide_helper_bones(recorder, roots):
+    """隐藏不参与变形的辅助骨骼（dummy/shadow/unused、IK 尖端、MMD 不可见骨骼）"""
+    for root in roots:
+        armature_obj = model.armature(root)
+        if armature_obj is None:
+            continue
+        for bone in armature_obj.data.bones:
+            if bone.use_deform:
+                continue
+            pose_bone = armature_obj.pose.bones.get(bone.name)
+            mmd_bone = getattr(pose_bone, "mmd_bone", None)
+            is_helper = (
+                any(k in bone.name.lower() for k in HELPER_BONE_KEYWORDS)
+                or (mmd_bone is not None and (mmd_bone.is_tip or not mmd_bone.is_visible))
+            )
+            if is_helper:
+                recorder.set(["bone", armature_obj.name, bone.name], bone, "hide", True)
+
+
+def enable_simplify(recorder, scene):
+    """场景简化：视口不计算细分"""
+    render = scene.render
+    recorder.set(["scene", scene.name, "render"], render, "use_simplify", True)
+    recorder.set(["scene", scene.name, "render"], render, "simplify_subdivision", 0)
+
+
+# ------------------------------
+# 4. 启用 / 恢复
+# ------------------------------
+def enable(context):
+    scene = context.scene
+    roots = find_roots(scene)
+    if not roots:
+        raise Exception("场景中没有 MMD 模型")
+
+    recorder = ChangeRecorder()
+    if scene.perf_mode_physics:
+        disable_physics(recorder, scene, roots)
+    if scene.perf_mode_outlines:
+        mute_outlines(recorder, roots)
+    if scene.perf_mode_flat_materials:
+        flatten_materials(recorder, roots)
+    if scene.perf_mode_helper_bones:
+        hide_helper_bones(recorder, roots)
+    if scene.perf_mode_simplify:
+        enable_simplify(recorder, scene)
+
+    scene[STATE_KEY] = json.dumps(recorder.changes, ensure_ascii=False)
+    mmd_logging.info(f"性能模式已启用：{len(roots)} 个 MMD 模型，记录 {len(recorder.changes)} 项修改")
+    return len(recorder.changes)
+
+
+def restore_flat_material(change):
+    material = _resolve(change["ref"])
+    if material is None or material.node_tree is None:
+        return False
+    tree = material.node_tree
+    flat = tree.nodes.get(FLAT_NODE_NAME)
+    output = next((n for n in tree.nodes if n.type == 'OUTPUT_MATERIAL' and n.is_active_output), None)
+    if flat is not None:
+        tree.nodes.remove(flat)
+    link = change["link"]
+    if output is not None and link:
+        from_node = tree.nodes.get(link[0])
+        if from_node is not None:
+            socket = next((s for s in from_node.outputs if s.identifier == link[1]), None)
+            if socket is not None:
+                tree.links.new(socket, output.inputs["Surface"])
+    return True
+
+
+def restore(context):
+    scene = context.scene
+    changes = json.loads(scene[STATE_KEY])
+    missing = 0
+    for change in reversed(changes):
+        if change.get("flat"):
+            ok = restore_flat_material(change)
+        else:
+            target = _resolve(change["ref"])
+            ok = target is not None
+            if ok:
+                setattr(target, change["attr"], change["value"])
+        if not ok:
+            missing += 1
+            mmd_logging.warning(f"无法恢复 {change['ref']}（数据已不存在）")
+    del scene[STATE_KEY]
+    mmd_logging.info(f"已恢复 {len(changes) - missing} 项修改")
+    return len(changes) - missing
+
+
+# ------------------------------
+# 5. 操作器类
+# ------------------------------
+class PerformanceMode(bpy.types.Operator):
+    """切换性能模式：启用时记录全部修改，再次执行时精确恢复"""
+    bl_idname = "mmd_tools_helper.performance_mode"
+    bl_label = "Toggle MMD Performance Mode"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Performance Mode", context.scene):
+                if is_enabled(context.scene):
+                    count = restore(context)
+                    message = f"Restored {count} changes"
+                else:
+                    count = enable(context)
+                    message = f"Performance mode enabled ({count} changes recorded)"
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, message)
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 6. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.perf_mode_physics = bpy.props.BoolProperty(
+        name="Disable Physics",
+        description="关闭刚体世界并隐藏刚体/关节对象",
+        default=True
+    )
+    bpy.types.Scene.perf_mode_outlines = bpy.props.BoolProperty(
+        name="Mute Outlines",
+        description="在视口中关闭描边/实体化修改器",
+        default=True
+    )
+    bpy.types.Scene.perf_mode_flat_materials = bpy.props.BoolProperty(
+        name="Flat Diffuse Materials",
+        description="材质输出改为 MMD 漫反射平面颜色（卡通节点不再编译）",
+        default=True
+    )
+    bpy.types.Scene.perf_mode_helper_bones = bpy.props.BoolProperty(
+        name="Hide Helper Bones",
+        description="隐藏不参与变形的辅助骨骼",
+        default=True
+    )
+    bpy.types.Scene.perf_mode_simplify = bpy.props.BoolProperty(
+        name="Simplify Subdivision",
+        description="启用场景简化，视口细分级别设为 0",
+        default=False
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("perf_mode_physics", "perf_mode_outlines", "perf_mode_flat_materials",
+                 "perf_mode_helper_bones", "perf_mode_simplify"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(PerformanceModePanel)
+    bpy.utils.register_class(PerformanceMode)
+
+
+def unregister():
+    bpy.utils.unregister_class(PerformanceMode)
+    bpy.utils.unregister_class(PerformanceModePanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()
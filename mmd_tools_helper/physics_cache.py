@@ -0,0 +1,450 @@
+import bpy
+import os
+import re
+import json
+import hashlib
+import numpy as np
+from bpy.app.handlers import persistent
+from mathutils import Matrix
+from . import model
+from . import mmd_logging
+from . import performance_mode
+
+# 场景自定义属性：{根对象名称: {"path": 缓存文件, "kinematic": {刚体名称: 原 kinematic 值}}}
+STATE_KEY = "mmd_helper_physics_cache"
+
+# 参与哈希的刚体/关节设置
+RIGID_BODY_PROPS = ("type", "mass", "friction", "restitution", "linear_damping", "angular_damping",
+                    "collision_shape", "collision_margin", "use_margin", "kinematic")
+JOINT_PROPS = ("type", "use_limit_lin_x", "use_limit_lin_y", "use_limit_lin_z",
+               "use_limit_ang_x", "use_limit_ang_y", "use_limit_ang_z",
+               "limit_lin_x_lower", "limit_lin_x_upper", "limit_lin_y_lower", "limit_lin_y_upper",
+               "limit_lin_z_lower", "limit_lin_z_upper", "limit_ang_x_lower", "limit_ang_x_upper",
+               "limit_ang_y_lower", "limit_ang_y_upper", "limit_ang_z_lower", "limit_ang_z_upper",
+               "disable_collisions", "spring_type",
+               "use_spring_x", "use_spring_y", "use_spring_z",
+               "use_spring_ang_x", "use_spring_ang_y", "use_spring_ang_z",
+               "spring_stiffness_x", "spring_stiffness_y", "spring_stiffness_z",
+               "spring_stiffness_ang_x", "spring_stiffness_ang_y", "spring_stiffness_ang_z",
+               "spring_damping_x", "spring_damping_y", "spring_damping_z",
+               "spring_damping_ang_x", "spring_damping_ang_y", "spring_damping_ang_z")
+MMD_JOINT_PROPS = ("spring_linear", "spring_angular")
+# 关键帧插值、手柄和缓动（影响帧之间的动作曲线形状）
+KEYFRAME_FLOAT_PROPS = ("handle_left", "handle_right", "back", "amplitude", "period")
+KEYFRAME_ENUM_PROPS = ("interpolation", "handle_left_type", "handle_right_type", "easing")
+NLA_STRIP_PROPS = ("frame_start", "frame_end", "action_frame_start", "action_frame_end", "scale", "repeat",
+                   "blend_type", "extrapolation", "blend_in", "blend_out", "influence", "use_animated_influence",
+                   "use_reverse", "mute")
+WORLD_PROPS = ("substeps_per_frame", "solver_iterations", "time_scale")
+
+# 已读取的缓存 {文件路径: (起始帧, 刚体名称列表, (F, N, 4, 4) 矩阵)}
+_loaded = {}
+# 帧切换处理函数使用的解析结果：(场景属性原文, 解析后的状态)；读取失败的缓存文件只报告一次
+_parsed_state = (None, {})
+_failed = set()
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class PhysicsCachePanel(bpy.types.Panel):
+    """按模型、动作和帧范围把物理结果缓存到磁盘"""
+    bl_idname = "OBJECT_PT_mmd_physics_cache"
+    bl_label = "MMD Physics Cache"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.prop(scene, "physics_cache_dir")
+        layout.prop(scene, "physics_cache_all_models")
+        layout.prop(scene, "physics_cache_action", text="")
+        layout.operator("mmd_tools_helper.physics_cache", text="Run", icon="PHYSICS")
+
+        state = json.loads(scene[STATE_KEY]) if STATE_KEY in scene.keys() else {}
+        for root_name, entry in state.items():
+            layout.label(text=f"{root_name}: {os.path.basename(entry['path'])}", icon="FILE_CACHE")
+
+
+# ------------------------------
+# 2. 缓存键（模型、动作、帧范围 + 动作和刚体设置的内容哈希）
+# ------------------------------
+def update_action_hash(h, action):
+    if action is None:
+        h.update(b"<no action>")
+        return
+    for fcurve in action.fcurves:
+        h.update(f"{fcurve.data_path}[{fcurve.array_index}]{fcurve.extrapolation}{fcurve.mute}".encode("utf-8"))
+        count = len(fcurve.keyframe_points)
+        points = np.empty(count * 2, dtype=np.float32)
+        fcurve.keyframe_points.foreach_get("co", points)
+        h.update(points.tobytes())
+        for prop in KEYFRAME_FLOAT_PROPS:
+            values = np.empty(count * (2 if prop.startswith("handle") else 1), dtype=np.float32)
+            fcurve.keyframe_points.foreach_get(prop, values)
+            h.update(values.tobytes())
+        for prop in KEYFRAME_ENUM_PROPS:
+            values = np.empty(count, dtype=np.int32)
+            fcurve.keyframe_points.foreach_get(prop, values)
+            h.update(values.tobytes())
+        h.update(repr([m.type for m in fcurve.modifiers if not m.mute]).encode("utf-8"))
+
+
+def update_anim_hash(h, anim):
+    """动作以及 NLA 轨道（片段的动作、范围、混合方式）"""
+    if anim is None:
+        h.update(b"<no animation>")
+        return
+    update_action_hash(h, anim.action)
+    h.update(repr((anim.action_blend_type, round(anim.action_influence, 6), anim.use_nla)).encode("utf-8"))
+    for track in anim.nla_tracks:
+        h.update(repr((track.name, track.mute, track.is_solo)).encode("utf-8"))
+        for strip in track.strips:
+            update_props_hash(h, strip, NLA_STRIP_PROPS)
+            update_action_hash(h, strip.action)
+
+
+def update_props_hash(h, struct, props):
+    for prop in props:
+        value = getattr(struct, prop, None)
+        if hasattr(value, "__len__") and not isinstance(value, str):
+            value = tuple(value)
+        h.update(repr((prop, value)).encode("utf-8"))
+
+
+def model_action(root):
+    armature_obj = model.armature(root)
+    anim = armature_obj.animation_data if armature_obj else None
+    return anim.action if anim else None
+
+
+def cache_hash(scene, root, rigid_bodies, joints):
+    h = hashlib.sha1()
+    armature_obj = model.armature(root)
+    update_anim_hash(h, armature_obj.animation_data if armature_obj else None)
+    update_anim_hash(h, root.animation_data)
+    # 缓存保存世界空间矩阵，根对象和骨架对象的摆放位置改变时缓存失效
+    h.update(np.array(root.matrix_world, dtype=np.float32).tobytes())
+    if armature_obj is not None:
+        h.update(np.array(armature_obj.matrix_world, dtype=np.float32).tobytes())
+        # 静止姿态（刚体初始位置跟随骨骼）；刚体当前矩阵受模拟影响，不参与哈希
+        bones = armature_obj.data.bones
+        rest = np.empty(len(bones) * 6, dtype=np.float32)
+        bones.foreach_get("head_local", rest[:len(bones) * 3])
+        bones.foreach_get("tail_local", rest[len(bones) * 3:])
+        h.update(rest.tobytes())
+    for obj in rigid_bodies:
+        h.update(obj.name.encode("utf-8"))
+        h.update(np.array(obj.dimensions[:], dtype=np.float32).tobytes())
+        if obj.rigid_body is not None:
+            update_props_hash(h, obj.rigid_body, RIGID_BODY_PROPS)
+        if hasattr(obj, "mmd_rigid"):
+            update_props_hash(h, obj.mmd_rigid, ("collision_group_number", "collision_group_mask"))
+    for obj in joints:
+        if obj.rigid_body_constraint is not None:
+            h.update(obj.name.encode("utf-8"))
+            update_props_hash(h, obj.rigid_body_constraint, JOINT_PROPS)
+            if hasattr(obj, "mmd_joint"):
+                update_props_hash(h, obj.mmd_joint, MMD_JOINT_PROPS)
+    world = scene.rigidbody_world
+    update_props_hash(h, world, WORLD_PROPS)
+    update_props_hash(h, scene, ("gravity",))
+    return h.hexdigest()[:12]
+
+
+def safe_name(name):
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", name)
+
+
+def name_key(name):
+    """文件名中的名称：safe_name 会合并不同字符，附加原名称的短哈希避免冲突"""
+    return f"{safe_name(name)}-{hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]}"
+
+
+# 缓存文件名：动作__起始-结束__输入摘要.npz；分组 1 为不含摘要的部分
+CACHE_FILE = re.compile(r"(.+__-?\d+--?\d+__)[0-9a-f]{12}\.npz")
+
+
+def cache_dir(scene, root):
+    """每个模型使用独立的子目录，清除缓存时不会误删名称相近的其它模型"""
+    return os.path.join(bpy.path.abspath(scene.physics_cache_dir), name_key(root.name))
+
+
+def cache_path(scene, root, action, start, end, digest):
+    action_name = name_key(action.name) if action else "none"
+    return os.path.join(cache_dir(scene, root), f"{action_name}__{start}-{end}__{digest}.npz")
+
+
+# ------------------------------
+# 3. 烘焙 / 读取
+# ------------------------------
+def dynamic_rigid_bodies(root):
+    """由物理模拟驱动的刚体（mmd_tools 类型 '0' 跟随骨骼，不需要缓存）"""
+    bodies = []
+    for obj in model.find_mmd_rigid_bodies_list(root):
+        if obj.rigid_body is None:
+            continue
+        mmd_rigid = getattr(obj, "mmd_rigid", None)
+        if mmd_rigid is not None and mmd_rigid.type == '0':
+            continue
+        bodies.append(obj)
+    return bodies
+
+
+def bake(context, roots_bodies, start, end):
+    """逐帧模拟一次，同时记录多个模型的刚体世界矩阵 {根对象: (F, N, 4, 4)}"""
+    scene = context.scene
+    frames = {root: [] for root, bodies in roots_bodies}
+    for frame in range(start, end + 1):
+        scene.frame_set(frame)
+        depsgraph = context.evaluated_depsgraph_get()
+        for root, bodies in roots_bodies:
+            frames[root].append([np.array(obj.evaluated_get(depsgraph).matrix_world, dtype=np.float32)
+                                 for obj in bodies])
+    return {root: np.array(frames[root], dtype=np.float32).reshape(-1, len(bodies), 4, 4)
+            for root, bodies in roots_bodies}
+
+
+def load_cache(path):
+    if path not in _loaded:
+        with np.load(path) as data:
+            _loaded[path] = (int(data["start"]), list(data["names"]), data["matrices"])
+    return _loaded[path]
+
+
+def apply_cached_frame(scene, entry, frame):
+    start, names, matrices = load_cache(entry["path"])
+    index = min(max(frame - start, 0), len(matrices) - 1)
+    for name, matrix in zip(names, matrices[index]):
+        obj = bpy.data.objects.get(name)
+        if obj is not None:
+            obj.matrix_world = Matrix(matrix.tolist())
+
+
+def parsed_state(scene):
+    """场景属性未变化时复用上次的解析结果（帧切换时每帧都会调用）"""
+    global _parsed_state
+    raw = scene[STATE_KEY]
+    if raw != _parsed_state[0]:
+        _parsed_state = (raw, json.loads(raw))
+    return _parsed_state[1]
+
+
+@persistent
+def physics_cache_frame_handler(scene, depsgraph=None):
+    """帧切换前把缓存的刚体矩阵写入（刚体已设为 kinematic，由对象变换驱动骨骼）"""
+    if STATE_KEY not in scene.keys():
+        return
+    for entry in parsed_state(scene).values():
+        try:
+            apply_cached_frame(scene, entry, scene.frame_current)
+        except (OSError, KeyError, ValueError) as e:
+            if entry["path"] not in _failed:
+                _failed.add(entry["path"])
+                mmd_logging.warning(f"读取物理缓存失败 {entry['path']}: {e}")
+
+
+def use_cache(scene, root, bodies, path):
+    state = json.loads(scene[STATE_KEY]) if STATE_KEY in scene.keys() else {}
+    previous = state.get(root.name, {}).get("kinematic", {})
+    kinematic = {}
+    for obj in bodies:
+        kinematic[obj.name] = previous.get(obj.name, obj.rigid_body.kinematic)
+        obj.rigid_body.kinematic = True
+    state[root.name] = {"path": path, "kinematic": kinematic}
+    _failed.discard(path)
+    scene[STATE_KEY] = json.dumps(state, ensure_ascii=False)
+
+
+def release_cache(scene, root):
+    """停止使用缓存，恢复刚体的 kinematic 设置"""
+    if STATE_KEY not in scene.keys():
+        return False
+    state = json.loads(scene[STATE_KEY])
+    entry = state.pop(root.name, None)
+    if entry is None:
+        return False
+    for name, kinematic in entry["kinematic"].items():
+        obj = bpy.data.objects.get(name)
+        if obj is not None and obj.rigid_body is not None:
+            obj.rigid_body.kinematic = kinematic
+    _loaded.pop(entry["path"], None)
+    if state:
+        scene[STATE_KEY] = json.dumps(state, ensure_ascii=False)
+    else:
+        del scene[STATE_KEY]
+    return True
+
+
+def clear_files(scene, root, keep=None):
+    """删除模型的缓存文件；给出 keep（当前输入对应的文件）时，
+    只删除动作和帧范围与 keep 相同、输入摘要不同的过期缓存，其它动作和帧范围的缓存保留"""
+    directory = cache_dir(scene, root)
+    if not os.path.isdir(directory):
+        return 0
+    keep_key = None
+    if keep is not None:
+        match = CACHE_FILE.fullmatch(os.path.basename(keep))
+        keep_key = match.group(1) if match else None
+    removed = 0
+    for filename in os.listdir(directory):
+        match = CACHE_FILE.fullmatch(filename)
+        path = os.path.join(directory, filename)
+        if match is None or path == keep:
+            continue
+        if keep is not None and match.group(1) != keep_key:
+            continue
+        os.remove(path)
+        _loaded.pop(path, None)
+        removed += 1
+    if not os.listdir(directory):
+        os.rmdir(directory)
+    return removed
+
+
+# ------------------------------
+# 4. 主流程
+# ------------------------------
+def target_roots(context):
+    if context.scene.physics_cache_all_models:
+        return performance_mode.find_roots(context.scene)
+    root = model.findRoot(context.view_layer.objects.active)
+    return [root] if root is not None else []
+
+
+def main(context):
+    scene = context.scene
+    action = scene.physics_cache_action
+    roots = target_roots(context)
+    if not roots:
+        raise Exception("未找到 MMD 模型")
+    if action != 'RELEASE' and scene.rigidbody_world is None:
+        raise Exception("场景没有刚体世界")
+
+    start, end = scene.frame_start, scene.frame_end
+    if action == 'RELEASE':
+        return sum(release_cache(scene, root) for root in roots)
+
+    # 先恢复为实时模拟，保证哈希和烘焙基于原始设置
+    for root in roots:
+        release_cache(scene, root)
+
+    targets = []
+    for root in roots:
+        bodies = dynamic_rigid_bodies(root)
+        if not bodies:
+            mmd_logging.warning(f"{root.name}: 没有动态刚体，跳过")
+            continue
+        digest = cache_hash(scene, root, bodies, model.find_mmd_joints_list(root))
+        path = cache_path(scene, root, model_action(root), start, end, digest)
+        targets.append((root, bodies, path))
+
+    if action == 'CLEAR_STALE':
+        removed = sum(clear_files(scene, root, keep=path) for root, bodies, path in targets)
+        mmd_logging.info(f"删除 {removed} 个过期缓存文件")
+        return removed
+    if action == 'CLEAR_ALL':
+        removed = sum(clear_files(scene, root) for root in roots)
+        mmd_logging.info(f"删除 {removed} 个缓存文件")
+        return removed
+
+    # BAKE：已有相同输入的缓存直接使用，其余模型一起模拟一遍
+    missing = [(root, bodies) for root, bodies, path in targets if not os.path.exists(path)]
+    if missing:
+        cache = scene.rigidbody_world.point_cache
+        if start < cache.frame_start or end > cache.frame_end:
+            mmd_logging.warning(f"帧范围 {start}-{end} 超出刚体缓存范围 {cache.frame_start}-{cache.frame_end}")
+        current = scene.frame_current
+        baked = bake(context, missing, start, end)
+        scene.frame_set(current)
+        for root, bodies, path in targets:
+            if root not in baked:
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            np.savez_compressed(path, start=start, names=np.array([obj.name for obj in bodies]),
+                                matrices=baked[root])
+            mmd_logging.info(f"{root.name}: 已烘焙 {end - start + 1} 帧 → {os.path.basename(path)}")
+
+    for root, bodies, path in targets:
+        if not any(root == r for r, b in missing):
+            mmd_logging.info(f"{root.name}: 输入未变，使用已有缓存 {os.path.basename(path)}")
+        use_cache(scene, root, bodies, path)
+    return len(targets)
+
+
+# ------------------------------
+# 5. 操作器类
+# ------------------------------
+class PhysicsCache(bpy.types.Operator):
+    """按模型烘焙、复用、释放或清除磁盘上的物理缓存"""
+    bl_idname = "mmd_tools_helper.physics_cache"
+    bl_label = "MMD Physics Cache"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Physics Cache", context.scene):
+                count = main(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Physics cache: {count} processed")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 6. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.physics_cache_dir = bpy.props.StringProperty(
+        name="Cache Folder",
+        description="物理缓存文件目录（// 开头为相对 .blend 文件的路径）",
+        default="//mmd_physics_cache/",
+        subtype='DIR_PATH'
+    )
+    bpy.types.Scene.physics_cache_all_models = bpy.props.BoolProperty(
+        name="All MMD Models in Scene",
+        description="处理场景中的全部 MMD 模型，而不只是当前选中的模型",
+        default=True
+    )
+    bpy.types.Scene.physics_cache_action = bpy.props.EnumProperty(
+        items=[
+            ('BAKE', 'Bake / Use Cache', '输入未变时直接使用已有缓存，否则重新烘焙'),
+            ('RELEASE', 'Release Cache', '停止使用缓存，恢复实时物理模拟'),
+            ('CLEAR_STALE', 'Clear Stale Caches', '删除当前动作和帧范围下、刚体设置或动画已改变的缓存文件'),
+            ('CLEAR_ALL', 'Clear All Caches', '删除模型的全部缓存文件'),
+        ],
+        name="Physics Cache Action",
+        default='BAKE'
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("physics_cache_dir", "physics_cache_all_models", "physics_cache_action"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(PhysicsCachePanel)
+    bpy.utils.register_class(PhysicsCache)
+    if physics_cache_frame_handler not in bpy.app.handlers.frame_change_pre:
+        bpy.app.handlers.frame_change_pre.append(physics_cache_frame_handler)
+
+
+def unregister():
+    if physics_cache_frame_handler in bpy.app.handlers.frame_change_pre:
+        bpy.app.handlers.frame_change_pre.remove(physics_cache_frame_handler)
+    bpy.utils.unregister_class(PhysicsCache)
+    bpy.utils.unregister_class(PhysicsCachePanel)
+    unregister_scene_properties()
+    _loaded.clear()
+    _failed.clear()
+
+
+if __name__ == "__main__":
+    register()
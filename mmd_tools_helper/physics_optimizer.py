@@ -0,0 +1,296 @@
+import bpy
+import numpy as np
+from . import model
+from . import mmd_logging
+
+# MMD 刚体碰撞组数量
+GROUP_COUNT = 16
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class PhysicsOptimizerPanel(bpy.types.Panel):
+    """分析并精简 MMD 刚体/关节的碰撞设置"""
+    bl_idname = "OBJECT_PT_mmd_physics_optimizer"
+    bl_label = "MMD Physics Optimizer"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.label(text="Rigid Body Collision Optimizer", icon="PHYSICS")
+        layout.prop(scene, "physics_opt_margin")
+        layout.prop(scene, "physics_opt_tiny_size")
+        layout.prop(scene, "physics_opt_tighten_masks")
+        layout.prop(scene, "physics_opt_report_only")
+        row = layout.row()
+        row.operator("mmd_tools_helper.physics_optimizer", text="Optimize Physics")
+        row.enabled = context.active_object is not None
+
+
+# ------------------------------
+# 2. 批量读取刚体数据
+# ------------------------------
+class Bodies:
+    """刚体的包围球、碰撞组和碰撞掩码（掩码为 True 表示不与该组碰撞，与 mmd_tools 一致）"""
+
+    def __init__(self, rigid_bodies):
+        self.objects = rigid_bodies
+        self.index = {obj: i for i, obj in enumerate(rigid_bodies)}
+        n = len(rigid_bodies)
+        self.centers = np.array([obj.matrix_world.translation[:] for obj in rigid_bodies], dtype=np.float64).reshape(n, 3)
+        dims = np.array([obj.dimensions[:] for obj in rigid_bodies], dtype=np.float64).reshape(n, 3)
+        self.radii = np.linalg.norm(dims, axis=1) * 0.5
+        self.groups = np.zeros(n, dtype=np.int64)
+        self.masks = np.zeros((n, GROUP_COUNT), dtype=bool)
+        self.dynamic = np.ones(n, dtype=bool)
+        self.has_mmd = np.zeros(n, dtype=bool)  # 只有 mmd_tools 刚体可以修改碰撞掩码
+        for i, obj in enumerate(rigid_bodies):
+            mmd_rigid = getattr(obj, "mmd_rigid", None)
+            if mmd_rigid is not None:
+                self.has_mmd[i] = True
+                self.groups[i] = mmd_rigid.collision_group_number
+                self.masks[i] = list(mmd_rigid.collision_group_mask)
+                self.dynamic[i] = mmd_rigid.type != '0'  # '0' 为跟随骨骼（静态）
+            elif obj.rigid_body is not None:
+                self.dynamic[i] = not obj.rigid_body.kinematic
+
+    def __len__(self):
+        return len(self.objects)
+
+
+def joint_pairs(bodies, joints):
+    """返回 [(i, j, 关节对象), ...]"""
+    pairs = []
+    for joint in joints:
+        rbc = joint.rigid_body_constraint
+        if rbc is None:
+            continue
+        i = bodies.index.get(rbc.object1)
+        j = bodies.index.get(rbc.object2)
+        if i is not None and j is not None:
+            pairs.append((i, j, joint))
+    return pairs
+
+
+# ------------------------------
+# 3. 向量化检测
+# ------------------------------
+def near_matrix(bodies, margin):
+    """包围球距离小于 margin 的刚体对 (N, N)"""
+    diff = bodies.centers[:, None, :] - bodies.centers[None, :, :]
+    dist = np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+    near = dist < bodies.radii[:, None] + bodies.radii[None, :] + margin
+    np.fill_diagonal(near, False)
+    return near
+
+
+def collision_matrix(bodies):
+    """两个刚体都没有屏蔽对方的碰撞组时才会碰撞"""
+    allowed = ~bodies.masks[:, bodies.groups]  # allowed[i, j]：i 不屏蔽 j 所在的组
+    collide = allowed & allowed.T
+    np.fill_diagonal(collide, False)
+    return collide
+
+
+def contact_pairs(bodies, near, collide, excluded):
+    """估计的接触对：相互接近、允许碰撞、至少一个为动态刚体、且未被关节禁用碰撞"""
+    pairs = near & collide & (bodies.dynamic[:, None] | bodies.dynamic[None, :])
+    for i, j in excluded:
+        pairs[i, j] = pairs[j, i] = False
+    return np.triu(pairs, 1)
+
+
+def excluded_joint_pairs(pairs):
+    return [(i, j) for i, j, joint in pairs if joint.rigid_body_constraint.disable_collisions]
+
+
+def redundant_group_pairs(bodies, near, collide):
+    """允许碰撞、但在 margin 范围内没有任何刚体对的碰撞组组合 [(a, b), ...]"""
+    groups = bodies.groups
+    result = []
+    for a in np.unique(groups):
+        for b in np.unique(groups):
+            if b < a:
+                continue
+            in_a = groups == a
+            in_b = groups == b
+            block = collide[np.ix_(in_a, in_b)]
+            if block.any() and not (near[np.ix_(in_a, in_b)] & block).any():
+                result.append((int(a), int(b)))
+    return result
+
+
+def report_contacts(label, bodies, contacts):
+    mmd_logging.info(f"{label}：{len(bodies)} 个刚体，估计接触对 {int(contacts.sum())}")
+
+
+# ------------------------------
+# 4. 优化操作
+# ------------------------------
+def disable_overlapping_joint_collisions(bodies, pairs, overlap, collide):
+    """关节连接且静止时已经重叠的刚体对：在关节上禁用碰撞（只影响这一对）"""
+    changed = []
+    for i, j, joint in pairs:
+        rbc = joint.rigid_body_constraint
+        if overlap[i, j] and collide[i, j] and not rbc.disable_collisions:
+            changed.append((i, j, joint))
+    return changed
+
+
+def tiny_bodies(bodies, tiny_size):
+    return np.flatnonzero(bodies.has_mmd & bodies.dynamic & (bodies.radii < tiny_size) & ~bodies.masks.all(axis=1))
+
+
+def apply_changes(bodies, joint_changes, tiny, group_pairs):
+    for i, j, joint in joint_changes:
+        joint.rigid_body_constraint.disable_collisions = True
+    for i in tiny:
+        bodies.objects[i].mmd_rigid.collision_group_mask = [True] * GROUP_COUNT
+    for a, b in group_pairs:
+        for i in np.flatnonzero(bodies.has_mmd & (bodies.groups == a)):
+            bodies.objects[i].mmd_rigid.collision_group_mask[b] = True
+        for i in np.flatnonzero(bodies.has_mmd & (bodies.groups == b)):
+            bodies.objects[i].mmd_rigid.collision_group_mask[a] = True
+
+
+# ------------------------------
+# 5. 主流程
+# ------------------------------
+def main(context):
+    scene = context.scene
+    root = model.findRoot(context.view_layer.objects.active)
+    if root is None:
+        raise Exception("未找到 MMD 模型的根对象")
+    rigid_bodies = model.find_mmd_rigid_bodies_list(root)
+    if not rigid_bodies:
+        raise Exception("模型没有刚体")
+
+    bodies = Bodies(rigid_bodies)
+    pairs = joint_pairs(bodies, model.find_mmd_joints_list(root))
+    overlap = near_matrix(bodies, 0.0)
+    near = near_matrix(bodies, scene.physics_opt_margin)
+    collide = collision_matrix(bodies)
+    before = contact_pairs(bodies, near, collide, excluded_joint_pairs(pairs))
+    report_contacts("优化前", bodies, before)
+
+    # 1. 关节连接且重叠的刚体对
+    joint_changes = disable_overlapping_joint_collisions(bodies, pairs, overlap, collide)
+    mmd_logging.info(f"关节连接且重叠的碰撞刚体对：{len(joint_changes)}")
+    for i, j, joint in joint_changes:
+        mmd_logging.debug(f"  {joint.name}: {bodies.objects[i].name} ↔ {bodies.objects[j].name}")
+
+    # 2. 过小的动态刚体（不再参与碰撞，仍由关节驱动）
+    tiny = tiny_bodies(bodies, scene.physics_opt_tiny_size)
+    mmd_logging.info(f"过小的动态刚体：{len(tiny)}")
+    for i in tiny:
+        mmd_logging.debug(f"  {bodies.objects[i].name}: 半径 {bodies.radii[i]:.4f}")
+
+    # 3. 范围内从不接近的碰撞组组合
+    group_pairs = redundant_group_pairs(bodies, near, collide)
+    mmd_logging.info(f"无接近刚体的碰撞组组合：{len(group_pairs)}")
+    for a, b in group_pairs:
+        mmd_logging.debug(f"  组 {a + 1} ↔ 组 {b + 1}")
+    if not scene.physics_opt_tighten_masks:
+        group_pairs = []
+
+    # 估算优化后的接触对
+    masks_before = bodies.masks.copy()
+    bodies.masks[tiny] = True
+    for a, b in group_pairs:
+        bodies.masks[np.ix_(bodies.has_mmd & (bodies.groups == a), [b])] = True
+        bodies.masks[np.ix_(bodies.has_mmd & (bodies.groups == b), [a])] = True
+    excluded = excluded_joint_pairs(pairs) + [(i, j) for i, j, joint in joint_changes]
+    after = contact_pairs(bodies, near, collision_matrix(bodies), excluded)
+    bodies.masks = masks_before
+    report_contacts("优化后", bodies, after)
+
+    if scene.physics_opt_report_only:
+        return int(before.sum()), int(after.sum())
+
+    apply_changes(bodies, joint_changes, tiny, group_pairs)
+    if len(tiny) or group_pairs:
+        mmd_logging.warning("碰撞掩码已修改，需要用 mmd_tools 重新构建刚体（Physics → Build）后生效")
+    return int(before.sum()), int(after.sum())
+
+
+# ------------------------------
+# 6. 操作器类
+# ------------------------------
+class PhysicsOptimizer(bpy.types.Operator):
+    """检测重叠刚体、过小刚体和多余的碰撞组组合，并估计优化前后的接触对数量"""
+    bl_idname = "mmd_tools_helper.physics_optimizer"
+    bl_label = "Optimize MMD Physics"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Physics Optimizer", context.scene):
+                before, after = main(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Estimated contact pairs: {before} → {after}")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 7. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.physics_opt_margin = bpy.props.FloatProperty(
+        name="Reach Margin",
+        description="刚体运动时可能接近的距离；包围球间距小于此值的刚体对视为可能接触",
+        default=0.1,
+        min=0.0,
+        unit='LENGTH'
+    )
+    bpy.types.Scene.physics_opt_tiny_size = bpy.props.FloatProperty(
+        name="Tiny Body Radius",
+        description="包围球半径小于此值的动态刚体不再参与碰撞",
+        default=0.005,
+        min=0.0,
+        precision=4,
+        unit='LENGTH'
+    )
+    bpy.types.Scene.physics_opt_tighten_masks = bpy.props.BoolProperty(
+        name="Tighten Collision Masks",
+        description="屏蔽在接近范围内没有任何刚体对的碰撞组组合",
+        default=False
+    )
+    bpy.types.Scene.physics_opt_report_only = bpy.props.BoolProperty(
+        name="Report Only",
+        description="只输出分析结果，不修改刚体和关节",
+        default=True
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("physics_opt_margin", "physics_opt_tiny_size", "physics_opt_tighten_masks", "physics_opt_report_only"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(PhysicsOptimizerPanel)
+    bpy.utils.register_class(PhysicsOptimizer)
+
+
+def unregister():
+    bpy.utils.unregister_class(PhysicsOptimizer)
+    bpy.utils.unregister_class(PhysicsOptimizerPanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,201 @@
+import bpy
+import os
+from . import mmd_logging
+from . import pmx_index
+from . import bone_dictionaries
+
+# 面板中显示的查询结果条数
+PANEL_ROWS = 20
+
+# 最近一次查询结果（不保存到 .blend 文件）
+_results = []
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class PMXCatalogPanel(bpy.types.Panel):
+    """扫描 PMX 模型库并按骨架类型、手指骨骼、材质数等条件查询"""
+    bl_idname = "OBJECT_PT_mmd_pmx_catalog"
+    bl_label = "PMX Library Catalog"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.prop(scene, "pmx_catalog_db")
+        layout.prop(scene, "pmx_catalog_dir")
+        row = layout.row()
+        row.prop(scene, "pmx_catalog_workers")
+        row.operator("mmd_tools_helper.pmx_catalog_scan", text="Scan", icon="FILE_REFRESH")
+
+        box = layout.box()
+        box.prop(scene, "pmx_catalog_rig_type")
+        box.prop(scene, "pmx_catalog_full_fingers")
+        box.prop(scene, "pmx_catalog_max_materials")
+        box.prop(scene, "pmx_catalog_bone")
+        box.operator("mmd_tools_helper.pmx_catalog_query", text="Query", icon="VIEWZOOM")
+        for row in _results[:PANEL_ROWS]:
+            box.label(text=f"{os.path.basename(row['path'])}  {row['rig_type']}  mat {row['material_count']}")
+        if len(_results) > PANEL_ROWS:
+            box.label(text=f"... {len(_results) - PANEL_ROWS} more (see console)")
+
+
+# ------------------------------
+# 2. 核心逻辑
+# ------------------------------
+def catalog_path(scene):
+    """未指定索引文件时使用 Blender 用户配置目录"""
+    if scene.pmx_catalog_db:
+        return bpy.path.abspath(scene.pmx_catalog_db)
+    directory = bpy.utils.user_resource('CONFIG', path="mmd_tools_helper", create=True)
+    return os.path.join(directory, "pmx_catalog.sqlite")
+
+
+def scan(context):
+    scene = context.scene
+    directory = bpy.path.abspath(scene.pmx_catalog_dir)
+    if not directory or not os.path.isdir(directory):
+        raise Exception("请选择有效的模型目录")
+    db_path = catalog_path(scene)
+    wm = context.window_manager
+    wm.progress_begin(0, 100)
+    try:
+        updated, unchanged, removed = pmx_index.update_index(
+            db_path, [directory], scene.pmx_catalog_workers or None,
+            progress=lambda done, total: wm.progress_update(done * 100 // total),
+        )
+    finally:
+        wm.progress_end()
+    mmd_logging.info(f"{db_path}: 更新 {updated}，未变化 {unchanged}，删除 {removed}")
+    return updated, unchanged, removed
+
+
+def run_query(context):
+    scene = context.scene
+    rig_type = scene.pmx_catalog_rig_type
+    rows = pmx_index.query(
+        catalog_path(scene),
+        rig_type=None if rig_type == 'ANY' else rig_type,
+        full_fingers=True if scene.pmx_catalog_full_fingers else None,
+        max_materials=scene.pmx_catalog_max_materials or None,
+        bone_name=scene.pmx_catalog_bone or None,
+        limit=10000,
+    )
+    _results[:] = rows
+    for row in rows:
+        mmd_logging.info(f"{row['path']}  {row['rig_type']}  骨骼 {row['bone_count']}  材质 {row['material_count']}  "
+                         f"Morph {row['morph_count']}  刚体 {row['rigid_body_count']}")
+    return len(rows)
+
+
+# ------------------------------
+# 3. 操作器类
+# ------------------------------
+class PMXCatalogScan(bpy.types.Operator):
+    """并行扫描目录中的 PMX 文件并增量更新索引（只处理大小或修改时间变化的文件）"""
+    bl_idname = "mmd_tools_helper.pmx_catalog_scan"
+    bl_label = "Scan PMX Library"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("PMX Catalog Scan", context.scene):
+                updated, unchanged, removed = scan(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Indexed {updated} files ({unchanged} unchanged, {removed} removed)")
+        return {'FINISHED'}
+
+
+class PMXCatalogQuery(bpy.types.Operator):
+    """按条件查询 PMX 索引"""
+    bl_idname = "mmd_tools_helper.pmx_catalog_query"
+    bl_label = "Query PMX Library"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("PMX Catalog Query", context.scene):
+                count = run_query(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"{count} models found")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 4. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.pmx_catalog_db = bpy.props.StringProperty(
+        name="Index File",
+        description="SQLite 索引文件（留空时保存在 Blender 用户配置目录）",
+        default="",
+        subtype='FILE_PATH'
+    )
+    bpy.types.Scene.pmx_catalog_dir = bpy.props.StringProperty(
+        name="Library Folder",
+        description="要扫描的模型目录（含子目录）",
+        default="",
+        subtype='DIR_PATH'
+    )
+    bpy.types.Scene.pmx_catalog_workers = bpy.props.IntProperty(
+        name="Workers",
+        description="并行进程数（0 为 CPU 核心数）",
+        default=0,
+        min=0,
+        max=64
+    )
+    bpy.types.Scene.pmx_catalog_rig_type = bpy.props.EnumProperty(
+        items=bone_dictionaries.rig_type_items_with_any,
+        name="Rig Type",
+        default=0
+    )
+    bpy.types.Scene.pmx_catalog_full_fingers = bpy.props.BoolProperty(
+        name="Full Finger Bones",
+        description="只显示手指骨骼完整的模型",
+        default=False
+    )
+    bpy.types.Scene.pmx_catalog_max_materials = bpy.props.IntProperty(
+        name="Max Materials",
+        description="只显示材质数少于此值的模型（0 为不限）",
+        default=0,
+        min=0
+    )
+    bpy.types.Scene.pmx_catalog_bone = bpy.props.StringProperty(
+        name="Has Bone",
+        description="只显示包含此骨骼的模型",
+        default=""
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("pmx_catalog_db", "pmx_catalog_dir", "pmx_catalog_workers", "pmx_catalog_rig_type",
+                 "pmx_catalog_full_fingers", "pmx_catalog_max_materials", "pmx_catalog_bone"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(PMXCatalogPanel)
+    bpy.utils.register_class(PMXCatalogScan)
+    bpy.utils.register_class(PMXCatalogQuery)
+
+
+def unregister():
+    bpy.utils.unregister_class(PMXCatalogQuery)
+    bpy.utils.unregister_class(PMXCatalogScan)
+    bpy.utils.unregister_class(PMXCatalogPanel)
+    unregister_scene_properties()
+    _results.clear()
+
+
+if __name__ == "__main__":
+    register()
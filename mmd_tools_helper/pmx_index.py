@@ -0,0 +1,247 @@
+# PMX 模型库编目（SQLite 索引，不依赖 bpy）
+# 以 路径 + 大小 + 修改时间 判断文件是否变化，重新扫描时只处理变化的文件；
+# 解析在进程池中并行执行。骨骼字典变化时由已索引的骨骼名称重新计算骨架类型，不重新解析文件。也可在命令行运行：
+#   python pmx_index.py index.sqlite D:/models E:/more_models --workers 8
+import os
+import sqlite3
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from . import pmx_reader
+    from . import rig_detection
+except ImportError:  # 命令行中以顶层模块导入
+    import pmx_reader
+    import rig_detection
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 子进程初始化（以 exec 执行：初始化函数本身不能按插件包路径反序列化）。
+# 子进程中没有 bpy，只注册插件包的路径而不执行包的 __init__，
+# 之后 scan_file 按包路径导入；不修改 sys.path，避免顶层模块名与其他插件冲突。
+_WORKER_BOOTSTRAP = """
+import sys, types, importlib
+if package and package not in sys.modules:
+    module = types.ModuleType(package)
+    module.__path__ = [path]
+    sys.modules[package] = module
+if overlay_dirs:  # 子进程使用与主进程相同的覆盖字典
+    importlib.import_module(package + ".rig_detection" if package else "rig_detection").set_overlay_dirs(overlay_dirs)
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    name TEXT,
+    name_e TEXT,
+    rig_type TEXT,
+    rig_score REAL,
+    full_fingers INTEGER,
+    bone_count INTEGER,
+    vertex_count INTEGER,
+    material_count INTEGER,
+    morph_count INTEGER,
+    rigid_body_count INTEGER,
+    joint_count INTEGER,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS bones (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS bones_name ON bones(name);
+CREATE INDEX IF NOT EXISTS bones_path ON bones(path);
+CREATE INDEX IF NOT EXISTS files_rig_type ON files(rig_type);
+"""
+
+# 由骨骼字典计算的列
+RIG_COLUMNS = ("rig_type", "rig_score", "full_fingers")
+
+FILE_COLUMNS = ("path", "size", "mtime", "name", "name_e", "rig_type", "rig_score", "full_fingers",
+                "bone_count", "vertex_count", "material_count", "morph_count", "rigid_body_count",
+                "joint_count", "error")
+
+
+def connect(db_path):
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    con = sqlite3.connect(db_path)
+    con.execute("PRAGMA foreign_keys = ON")
+    con.executescript(SCHEMA)
+    return con
+
+
+# ------------------------------
+# 1. 单个文件（在子进程中执行）
+# ------------------------------
+def rig_columns(bone_names):
+    """{rig_type, rig_score, full_fingers}；没有任何骨骼匹配时骨架类型留空"""
+    ranked = rig_detection.detect_rig_type(bone_names)
+    if not ranked or ranked[0][1] <= 0:
+        return dict.fromkeys(RIG_COLUMNS)
+    rig_type, matched, total = ranked[0]
+    return {"rig_type": rig_type, "rig_score": matched / total,
+            "full_fingers": int(rig_detection.has_full_fingers(bone_names, rig_type))}
+
+
+def scan_file(args):
+    """返回 (files 行字典, 骨骼名称列表)"""
+    path, size, mtime = args
+    row = dict.fromkeys(FILE_COLUMNS)
+    row.update(path=path, size=size, mtime=mtime)
+    try:
+        info = pmx_reader.read_pmx(path, counts=True)
+    except (OSError, pmx_reader.PMXError) as e:
+        row["error"] = str(e)
+        return row, []
+    bone_names = info.bone_names
+    row.update(rig_columns(bone_names))
+    row.update(name=info.name, name_e=info.name_e, bone_count=len(bone_names),
+               vertex_count=info.vertex_count, material_count=info.material_count,
+               morph_count=info.morph_count, rigid_body_count=info.rigid_body_count,
+               joint_count=info.joint_count)
+    return row, bone_names
+
+
+# ------------------------------
+# 2. 增量更新
+# ------------------------------
+def find_files(directories):
+    """{路径: (大小, 修改时间)}"""
+    found = {}
+    for directory in directories:
+        for dirpath, dirnames, filenames in os.walk(directory):
+            for filename in filenames:
+                if filename.lower().endswith(".pmx"):
+                    path = os.path.abspath(os.path.join(dirpath, filename))
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    found[path] = (st.st_size, st.st_mtime)
+    return found
+
+
+def refresh_rig_columns(con, skip=()):
+    """由 bones 表重新计算骨架类型等派生列（骨骼字典变化后）；skip 为刚扫描过的文件"""
+    bones = {}
+    for path, name in con.execute("SELECT path, name FROM bones ORDER BY rowid"):
+        bones.setdefault(path, []).append(name)
+    skip = set(skip)
+    rows = []
+    for (path,) in con.execute("SELECT path FROM files WHERE error IS NULL").fetchall():
+        if path not in skip:
+            columns = rig_columns(bones.get(path, []))
+            rows.append([columns[c] for c in RIG_COLUMNS] + [path])
+    with con:
+        con.executemany(f"UPDATE files SET {', '.join(c + ' = ?' for c in RIG_COLUMNS)} WHERE path = ?", rows)
+    return len(rows)
+
+
+def update_index(db_path, directories, workers=None, progress=None):
+    """扫描目录并更新索引，返回 (新增或更新数, 未变化数, 删除数)"""
+    con = connect(db_path)
+    try:
+        found = find_files(directories)
+        roots = tuple(os.path.join(os.path.abspath(d), "") for d in directories)
+        known = {path: (size, mtime) for path, size, mtime in con.execute("SELECT path, size, mtime FROM files")}
+
+        changed = [(path, size, mtime) for path, (size, mtime) in found.items() if known.get(path) != (size, mtime)]
+        removed = [path for path in known if path.startswith(roots) and path not in found]
+
+        with con:
+            con.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in removed])
+
+        if changed:
+            context = multiprocessing.get_context("spawn")  # Blender 进程不能安全 fork
+            bootstrap = {"package": __package__, "path": _HERE, "overlay_dirs": rig_detection.overlay_dirs()}
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=exec, initargs=(_WORKER_BOOTSTRAP, bootstrap)) as executor:
+                chunksize = max(1, len(changed) // ((workers or os.cpu_count() or 1) * 8))
+                done = 0
+                with con:
+                    for row, bone_names in executor.map(scan_file, changed, chunksize=chunksize):
+                        con.execute("DELETE FROM files WHERE path = ?", (row["path"],))
+                        con.execute(
+                            f"INSERT INTO files ({', '.join(FILE_COLUMNS)}) VALUES ({', '.join('?' * len(FILE_COLUMNS))})",
+                            [row[c] for c in FILE_COLUMNS],
+                        )
+                        con.executemany("INSERT INTO bones (path, name) VALUES (?, ?)",
+                                        [(row["path"], name) for name in bone_names])
+                        done += 1
+                        if progress is not None:
+                            progress(done, len(changed))
+
+        digest = rig_detection.dictionary_digest()
+        stored = con.execute("SELECT value FROM meta WHERE key = 'dictionary_digest'").fetchone()
+        if digest is None or stored is None or stored[0] != digest:
+            refresh_rig_columns(con, skip=[path for path, size, mtime in changed])
+            if digest is not None:
+                with con:
+                    con.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dictionary_digest', ?)", (digest,))
+        return len(changed), len(found) - len(changed), len(removed)
+    finally:
+        con.close()
+
+
+# ------------------------------
+# 3. 查询
+# ------------------------------
+def query(db_path, rig_type=None, full_fingers=None, max_materials=None, bone_name=None, name=None, limit=200):
+    """按条件查询，返回 files 行字典列表"""
+    sql = f"SELECT {', '.join(FILE_COLUMNS)} FROM files WHERE error IS NULL"
+    params = []
+    if rig_type:
+        sql += " AND rig_type = ?"
+        params.append(rig_type)
+    if full_fingers is not None:
+        sql += " AND full_fingers = ?"
+        params.append(int(full_fingers))
+    if max_materials is not None:
+        sql += " AND material_count < ?"
+        params.append(max_materials)
+    if bone_name:
+        sql += " AND path IN (SELECT path FROM bones WHERE name = ?)"
+        params.append(bone_name)
+    if name:
+        sql += " AND (name LIKE ? OR name_e LIKE ? OR path LIKE ?)"
+        params.extend([f"%{name}%"] * 3)
+    sql += " ORDER BY path LIMIT ?"
+    params.append(limit)
+    con = connect(db_path)
+    try:
+        return [dict(zip(FILE_COLUMNS, row)) for row in con.execute(sql, params)]
+    finally:
+        con.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PMX 模型库编目")
+    parser.add_argument("index", help="SQLite 索引文件")
+    parser.add_argument("directories", nargs="*", help="要扫描的目录")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rig-type")
+    parser.add_argument("--full-fingers", action="store_true")
+    parser.add_argument("--max-materials", type=int)
+    parser.add_argument("--bone")
+    args = parser.parse_args(argv)
+
+    if args.directories:
+        updated, unchanged, removed = update_index(args.index, args.directories, args.workers)
+        print(f"更新 {updated}，未变化 {unchanged}，删除 {removed}")
+    if args.rig_type or args.full_fingers or args.max_materials is not None or args.bone:
+        for row in query(args.index, args.rig_type, True if args.full_fingers else None,
+                         args.max_materials, args.bone, limit=10000):
+            print(f"{row['path']}\t{row['rig_type']}\t{row['material_count']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+# PMX 流式读取（纯 Python，不依赖 bpy）
+# 只解析文件头和骨骼段，顶点、面等数据按大小直接跳过；
+# 可在 Blender 外（例如编目子进程）作为顶层模块导入。
+import os
+import mmap
+import struct
+
+# 骨骼标志位
+BONE_TAIL_IS_BONE = 0x0001
+BONE_IS_IK = 0x0020
+BONE_INHERIT_ROTATION = 0x0100
+BONE_INHERIT_TRANSLATION = 0x0200
+BONE_FIXED_AXIS = 0x0400
+BONE_LOCAL_AXIS = 0x0800
+BONE_EXTERNAL_PARENT = 0x2000
+
+# 顶点权重类型对应的数据大小（不含骨骼索引）：BDEF1, BDEF2, BDEF4, SDEF, QDEF
+WEIGHT_BONE_COUNTS = (1, 2, 4, 2, 4)
+WEIGHT_EXTRA_BYTES = (0, 4, 16, 4 + 36, 16)
+
+# 材质 Morph 每项的数据大小（不含材质索引）
+MATERIAL_MORPH_BYTES = 1 + 16 + 12 + 4 + 12 + 16 + 4 + 16 + 16 + 16
+
+
+class PMXError(Exception):
+    pass
+
+
+class PMXBone:
+    def __init__(self, name, name_e, parent, flags, position=(0.0, 0.0, 0.0), tail=(0.0, 0.0, 0.0)):
+        self.name = name
+        self.name_e = name_e
+        self.parent = parent      # 父骨骼索引，-1 表示无父骨骼
+        self.flags = flags
+        self.position = position
+        self.tail = tail          # BONE_TAIL_IS_BONE 时为尾部骨骼索引，否则为相对头部的偏移
+
+    @property
+    def tail_is_bone(self):
+        return bool(self.flags & BONE_TAIL_IS_BONE)
+
+    @property
+    def is_ik(self):
+        return bool(self.flags & BONE_IS_IK)
+
+
+class PMXInfo:
+    """读取结果：模型名称、各段数量和骨骼列表"""
+
+    def __init__(self, path):
+        self.path = path
+        self.version = 0.0
+        self.name = ""
+        self.name_e = ""
+        self.vertex_count = 0
+        self.face_count = 0
+        self.texture_count = 0
+        self.material_count = 0
+        self.bones = []
+        self.morph_count = None         # 只有 read_pmx(..., counts=True) 时才读取
+        self.rigid_body_count = None
+        self.joint_count = None
+
+    @property
+    def bone_names(self):
+        return [b.name for b in self.bones]
+
+
+class _Reader:
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.pos = 0
+        self.encoding = "utf-16-le"
+        self.sizes = {}
+
+    def unpack(self, fmt, size):
+        if self.pos + size > len(self.buffer):
+            raise PMXError("文件意外结束")
+        values = struct.unpack_from(fmt, self.buffer, self.pos)
+        self.pos += size
+        return values
+
+    def skip(self, size):
+        self.pos += size
+        if self.pos > len(self.buffer):
+            raise PMXError("文件意外结束")
+
+    def byte(self):
+        return self.unpack("<B", 1)[0]
+
+    def int32(self):
+        return self.unpack("<i", 4)[0]
+
+    def text(self):
+        length = self.int32()
+        if length < 0 or self.pos + length > len(self.buffer):
+            raise PMXError("文本长度无效")
+        raw = self.buffer[self.pos:self.pos + length]
+        self.pos += length
+        return bytes(raw).decode(self.encoding, errors="replace")
+
+    def skip_text(self):
+        self.skip(self.int32())
+
+    def index(self, kind):
+        size = self.sizes[kind]
+        fmt = {1: "<b", 2: "<h", 4: "<i"}[size]
+        if kind == "vertex":  # 顶点索引为无符号（4 字节除外）
+            fmt = {1: "<B", 2: "<H", 4: "<i"}[size]
+        return self.unpack(fmt, size)[0]
+
+
+# ------------------------------
+# 各段解析
+# ------------------------------
+def _read_header(r, info):
+    if bytes(r.buffer[:4]) != b"PMX ":
+        raise PMXError("不是 PMX 文件")
+    r.pos = 4
+    info.version = round(r.unpack("<f", 4)[0], 2)
+    count = r.byte()
+    globals_ = r.unpack(f"<{count}B", count)
+    if count < 8:
+        raise PMXError("文件头格式无效")
+    r.encoding = "utf-8" if globals_[0] == 1 else "utf-16-le"
+    r.additional_uv = globals_[1]
+    r.sizes = {
+        "vertex": globals_[2], "texture": globals_[3], "material": globals_[4],
+        "bone": globals_[5], "morph": globals_[6], "rigid": globals_[7],
+    }
+    info.name = r.text()
+    info.name_e = r.text()
+    r.skip_text()  # 注释
+    r.skip_text()
+
+
+def _skip_vertices(r, info):
+    """顶点大小取决于权重类型，只读取每个顶点的类型字节"""
+    info.vertex_count = r.int32()
+    fixed = 12 + 12 + 8 + 16 * r.additional_uv
+    bone_size = r.sizes["bone"]
+    buffer = r.buffer
+    pos = r.pos
+    try:
+        for _ in range(info.vertex_count):
+            pos += fixed
+            weight_type = buffer[pos]
+            if weight_type > 4:
+                raise PMXError(f"未知的顶点权重类型 {weight_type}")
+            pos += 1 + WEIGHT_BONE_COUNTS[weight_type] * bone_size + WEIGHT_EXTRA_BYTES[weight_type] + 4
+    except IndexError:
+        raise PMXError("文件意外结束")
+    r.pos = pos
+    if r.pos > len(buffer):
+        raise PMXError("文件意外结束")
+
+
+def _skip_faces(r, info):
+    info.face_count = r.int32() // 3
+    r.skip(info.face_count * 3 * r.sizes["vertex"])
+
+
+def _skip_textures(r, info):
+    info.texture_count = r.int32()
+    for _ in range(info.texture_count):
+        r.skip_text()
+
+
+def _skip_materials(r, info):
+    info.material_count = r.int32()
+    texture_size = r.sizes["texture"]
+    for _ in range(info.material_count):
+        r.skip_text()
+        r.skip_text()
+        r.skip(16 + 12 + 4 + 12 + 1 + 16 + 4 + texture_size * 2 + 1)
+        shared_toon = r.byte()
+        r.skip(1 if shared_toon else texture_size)
+        r.skip_text()  # 备注
+        r.skip(4)      # 面数
+
+
+def _read_bones(r, info):
+    count = r.int32()
+    bone_size = r.sizes["bone"]
+    for _ in range(count):
+        name = r.text()
+        name_e = r.text()
+        position = r.unpack("<3f", 12)
+        parent = r.index("bone")
+        r.skip(4)
+        flags = r.unpack("<H", 2)[0]
+        tail = r.index("bone") if flags & BONE_TAIL_IS_BONE else r.unpack("<3f", 12)
+        if flags & (BONE_INHERIT_ROTATION | BONE_INHERIT_TRANSLATION):
+            r.skip(bone_size + 4)
+        if flags & BONE_FIXED_AXIS:
+            r.skip(12)
+        if flags & BONE_LOCAL_AXIS:
+            r.skip(24)
+        if flags & BONE_EXTERNAL_PARENT:
+            r.skip(4)
+        if flags & BONE_IS_IK:
+            r.skip(bone_size + 8)
+            for _ in range(r.int32()):
+                r.skip(bone_size)
+                if r.byte():
+                    r.skip(24)
+        info.bones.append(PMXBone(name, name_e, parent, flags, position, tail))
+
+
+def _skip_morphs(r, info):
+    info.morph_count = r.int32()
+    sizes = r.sizes
+    offset_sizes = {
+        0: sizes["morph"] + 4,                      # 组
+        1: sizes["vertex"] + 12,                    # 顶点
+        2: sizes["bone"] + 12 + 16,                 # 骨骼
+        8: sizes["material"] + MATERIAL_MORPH_BYTES,
+        9: sizes["morph"] + 4,                      # 翻转
+        10: sizes["rigid"] + 1 + 24,                # 冲量
+    }
+    for uv_type in range(3, 8):                     # UV / 追加 UV
+        offset_sizes[uv_type] = sizes["vertex"] + 16
+    for _ in range(info.morph_count):
+        r.skip_text()
+        r.skip_text()
+        r.skip(1)
+        morph_type = r.byte()
+        if morph_type not in offset_sizes:
+            raise PMXError(f"未知的 Morph 类型 {morph_type}")
+        r.skip(r.int32() * offset_sizes[morph_type])
+
+
+def _skip_display_frames(r, info):
+    for _ in range(r.int32()):
+        r.skip_text()
+        r.skip_text()
+        r.skip(1)
+        for _ in range(r.int32()):
+            kind = r.byte()
+            r.skip(r.sizes["morph"] if kind else r.sizes["bone"])
+
+
+def _skip_rigid_bodies(r, info):
+    info.rigid_body_count = r.int32()
+    for _ in range(info.rigid_body_count):
+        r.skip_text()
+        r.skip_text()
+        r.skip(r.sizes["bone"] + 1 + 2 + 1 + 12 * 3 + 4 * 5 + 1)
+
+
+def _read_joint_count(r, info):
+    info.joint_count = r.int32() if r.pos < len(r.buffer) else 0
+
+
+# ------------------------------
+# 入口
+# ------------------------------
+def read_pmx(path, counts=False):
+    """读取 PMX 文件头和骨骼；counts=True 时继续跳读 Morph、显示框和刚体以统计数量"""
+    info = PMXInfo(path)
+    if os.path.getsize(path) < 4:
+        raise PMXError("不是 PMX 文件")
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            r = _Reader(buffer)
+            _read_header(r, info)
+            _skip_vertices(r, info)
+            _skip_faces(r, info)
+            _skip_textures(r, info)
+            _skip_materials(r, info)
+            _read_bones(r, info)
+            if counts:
+                _skip_morphs(r, info)
+                _skip_display_frames(r, info)
+                _skip_rigid_bodies(r, info)
+                _read_joint_count(r, info)
+    return info
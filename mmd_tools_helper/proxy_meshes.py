@@ -0,0 +1,333 @@
+import bpy
+import numpy as np
+from mathutils import kdtree
+from . import model
+from . import mmd_logging
+from . import vertex_weights
+
+# 代理网格与原网格互相记录对方名称的自定义属性
+PROXY_KEY = "mmd_proxy"
+SOURCE_KEY = "mmd_proxy_source"
+# 传递权重时的量化级数：相同 (顶点组, 量化权重) 的顶点一次写入
+WEIGHT_LEVELS = 256
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class ProxyMeshesPanel(bpy.types.Panel):
+    """生成保留权重和形态键的低精度代理网格，并在完整/代理之间切换"""
+    bl_idname = "OBJECT_PT_mmd_proxy_meshes"
+    bl_label = "MMD Proxy Meshes"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.label(text="Level of Detail Proxies", icon="MOD_DECIM")
+        layout.prop(scene, "proxy_decimate_ratio")
+        layout.prop(scene, "proxy_shape_key_threshold")
+        layout.operator("mmd_tools_helper.generate_proxy_meshes", text="Generate Proxies")
+        row = layout.row(align=True)
+        row.operator("mmd_tools_helper.swap_proxy_meshes", text="Swap Full/Proxy", icon="FILE_REFRESH")
+        row.operator("mmd_tools_helper.remove_proxy_meshes", text="", icon="TRASH")
+
+
+# ------------------------------
+# 2. 辅助函数
+# ------------------------------
+def source_meshes(obj):
+    """MMD 模型的原始网格（排除已生成的代理）；选中代理时按其原网格查找模型"""
+    if obj is not None and SOURCE_KEY in obj.keys():
+        obj = bpy.data.objects.get(obj[SOURCE_KEY])
+    meshes = model.find_MMD_MeshesList(obj) or []
+    return [m for m in meshes if SOURCE_KEY not in m.keys()]
+
+
+def proxy_pairs(obj):
+    """[(原网格, 代理网格), ...]"""
+    pairs = []
+    for mesh_obj in source_meshes(obj):
+        proxy = bpy.data.objects.get(mesh_obj.get(PROXY_KEY, ""))
+        if proxy is not None:
+            pairs.append((mesh_obj, proxy))
+    return pairs
+
+
+def read_coords(collection, attr="co"):
+    coords = np.empty(len(collection) * 3, dtype=np.float32)
+    collection.foreach_get(attr, coords)
+    return coords.reshape(-1, 3)
+
+
+def decimated_mesh(context, mesh_obj, ratio):
+    """在临时对象上计算塌陷减面结果（基础形状，不含形态键和其它修改器）"""
+    temp_mesh = mesh_obj.data.copy()
+    temp_obj = bpy.data.objects.new(mesh_obj.name + "_decimate_tmp", temp_mesh)
+    context.scene.collection.objects.link(temp_obj)
+    try:
+        if temp_mesh.shape_keys:
+            temp_obj.shape_key_clear()
+        temp_obj.vertex_groups.clear()  # 权重稍后按最近顶点重新传递
+        decimate = temp_obj.modifiers.new("Decimate", 'DECIMATE')
+        decimate.decimate_type = 'COLLAPSE'
+        decimate.ratio = ratio
+        depsgraph = context.evaluated_depsgraph_get()
+        return bpy.data.meshes.new_from_object(temp_obj.evaluated_get(depsgraph))
+    finally:
+        bpy.data.objects.remove(temp_obj)
+        bpy.data.meshes.remove(temp_mesh)
+
+
+def nearest_source_vertices(source_co, proxy_co):
+    """每个代理顶点在原网格中最近的顶点索引"""
+    tree = kdtree.KDTree(len(source_co))
+    for i, co in enumerate(source_co.tolist()):
+        tree.insert(co, i)
+    tree.balance()
+    return np.array([tree.find(co)[1] for co in proxy_co.tolist()], dtype=np.int64)
+
+
+def transfer_weights(source_obj, proxy_obj, nearest):
+    """按最近顶点复制顶点组权重；权重量化为 WEIGHT_LEVELS 级，相同 (顶点组, 量化权重) 的顶点一次 add 调用写入"""
+    counts, groups, weights = vertex_weights.read_weights(source_obj)
+    for vg in source_obj.vertex_groups:
+        proxy_obj.vertex_groups.new(name=vg.name)
+    if len(groups) == 0:
+        return 0
+
+    # 展开：代理顶点 p 继承原顶点 nearest[p] 的全部分配
+    offsets = vertex_weights.vertex_offsets(counts)
+    per_proxy = counts[nearest]
+    proxy_vert = np.repeat(np.arange(len(nearest)), per_proxy)
+    starts = np.repeat(offsets[nearest], per_proxy)
+    within = np.arange(len(proxy_vert)) - np.repeat(vertex_weights.vertex_offsets(per_proxy)[:-1], per_proxy)
+    src = starts + within
+    p_groups = groups[src]
+    p_weights = weights[src]
+
+    levels = np.rint(np.clip(p_weights, 0.0, 1.0) * WEIGHT_LEVELS).astype(np.int64)
+    keys = p_groups.astype(np.int64) * (WEIGHT_LEVELS + 1) + levels
+    unique, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.ravel()
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.flatnonzero(np.diff(inverse[order])) + 1
+    for key, verts in zip(unique.tolist(), np.split(proxy_vert[order], bounds)):
+        grp, level = divmod(key, WEIGHT_LEVELS + 1)
+        proxy_obj.vertex_groups[grp].add(verts.tolist(), level / WEIGHT_LEVELS, 'REPLACE')
+    return len(p_groups)
+
+
+def transfer_shape_keys(source_obj, proxy_obj, nearest, threshold):
+    """把每个形态键相对 Basis 的位移按最近顶点搬到代理网格；位移低于阈值的形态键跳过"""
+    key = source_obj.data.shape_keys
+    if key is None:
+        return 0, 0
+    blocks = key.key_blocks
+    basis = read_coords(key.reference_key.data)
+    proxy_basis = read_coords(proxy_obj.data.vertices)
+
+    proxy_obj.shape_key_add(name=key.reference_key.name, from_mix=False)
+    kept = 0
+    for block in blocks:
+        if block == key.reference_key:
+            continue
+        delta = read_coords(block.data) - basis
+        if not np.any(np.abs(delta) > threshold):
+            continue
+        new_block = proxy_obj.shape_key_add(name=block.name, from_mix=False)
+        new_block.data.foreach_set("co", (proxy_basis + delta[nearest]).ravel())
+        new_block.slider_min = block.slider_min
+        new_block.slider_max = block.slider_max
+        new_block.value = block.value
+        new_block.mute = block.mute
+        kept += 1
+    return kept, len(blocks) - 1
+
+
+# ------------------------------
+# 3. 主流程
+# ------------------------------
+def generate(context):
+    scene = context.scene
+    active_obj = context.view_layer.objects.active
+    meshes = source_meshes(active_obj)
+    if not meshes:
+        raise Exception("未找到关联的 MMD 模型，请确保选中 MMD 模型对象")
+
+    remove(context)  # 重新生成前删除旧代理
+    for mesh_obj in meshes:
+        proxy_mesh = decimated_mesh(context, mesh_obj, scene.proxy_decimate_ratio)
+        proxy_mesh.name = mesh_obj.data.name + "_proxy"
+        proxy = bpy.data.objects.new(mesh_obj.name + "_proxy", proxy_mesh)
+        for collection in mesh_obj.users_collection:
+            collection.objects.link(proxy)
+        # 不挂在模型层级下：其它工具和 mmd_tools 导出都按层级查找网格，代理不能被当作模型网格。
+        # 变形由骨架修改器完成，骨架对象移动时代理同样跟随
+        proxy.matrix_world = mesh_obj.matrix_world.copy()
+        proxy.hide_render = True  # 渲染始终使用完整网格
+
+        # 复制骨架修改器（代理跟随同一骨架变形）
+        for mod in mesh_obj.modifiers:
+            if mod.type == 'ARMATURE':
+                new_mod = proxy.modifiers.new(mod.name, 'ARMATURE')
+                new_mod.object = mod.object
+                new_mod.use_vertex_groups = mod.use_vertex_groups
+                new_mod.use_bone_envelopes = mod.use_bone_envelopes
+                new_mod.use_deform_preserve_volume = mod.use_deform_preserve_volume
+
+        source_co = read_coords(mesh_obj.data.vertices)
+        proxy_co = read_coords(proxy_mesh.vertices)
+        nearest = nearest_source_vertices(source_co, proxy_co)
+        assignments = transfer_weights(mesh_obj, proxy, nearest)
+        kept, total = transfer_shape_keys(mesh_obj, proxy, nearest, scene.proxy_shape_key_threshold)
+
+        mesh_obj[PROXY_KEY] = proxy.name
+        proxy[SOURCE_KEY] = mesh_obj.name
+        mmd_logging.info(
+            f"{mesh_obj.name}: 顶点 {len(source_co)} → {len(proxy_co)}，"
+            f"权重分配 {assignments}，形态键 {kept}/{total}"
+        )
+
+    # 生成后默认显示代理
+    swap(context, show_proxy=True)
+    return len(meshes)
+
+
+def swap(context, show_proxy=None):
+    """在完整网格和代理网格之间切换视口显示（隐藏的对象不参与每帧求值）"""
+    pairs = proxy_pairs(context.view_layer.objects.active)
+    if not pairs:
+        raise Exception("当前模型没有代理网格，请先生成")
+    if show_proxy is None:
+        show_proxy = pairs[0][1].hide_viewport
+    for mesh_obj, proxy in pairs:
+        mesh_obj.hide_viewport = show_proxy
+        proxy.hide_viewport = not show_proxy
+    mmd_logging.info(f"显示{'代理' if show_proxy else '完整'}网格（{len(pairs)} 个）")
+    return show_proxy
+
+
+def remove(context):
+    """删除当前模型的全部代理网格并恢复原网格显示"""
+    removed = 0
+    for mesh_obj, proxy in proxy_pairs(context.view_layer.objects.active):
+        proxy_mesh = proxy.data
+        bpy.data.objects.remove(proxy)
+        if proxy_mesh.users == 0:
+            bpy.data.meshes.remove(proxy_mesh)
+        del mesh_obj[PROXY_KEY]
+        mesh_obj.hide_viewport = False
+        removed += 1
+    return removed
+
+
+# ------------------------------
+# 4. 操作器类
+# ------------------------------
+class GenerateProxyMeshes(bpy.types.Operator):
+    """为 MMD 模型的网格生成减面代理（保留顶点组权重和形态键）"""
+    bl_idname = "mmd_tools_helper.generate_proxy_meshes"
+    bl_label = "Generate Proxy Meshes"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None and context.mode == 'OBJECT'
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Generate Proxy Meshes", context.scene):
+                count = generate(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Generated {count} proxy meshes")
+        return {'FINISHED'}
+
+
+class SwapProxyMeshes(bpy.types.Operator):
+    """在完整网格和代理网格之间切换"""
+    bl_idname = "mmd_tools_helper.swap_proxy_meshes"
+    bl_label = "Swap Full/Proxy Meshes"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Swap Proxy Meshes", context.scene):
+                show_proxy = swap(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, "Showing proxy meshes" if show_proxy else "Showing full meshes")
+        return {'FINISHED'}
+
+
+class RemoveProxyMeshes(bpy.types.Operator):
+    """删除代理网格（导出模型前执行）"""
+    bl_idname = "mmd_tools_helper.remove_proxy_meshes"
+    bl_label = "Remove Proxy Meshes"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None
+
+    def execute(self, context):
+        count = remove(context)
+        self.report({'INFO'}, f"Removed {count} proxy meshes")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 5. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.proxy_decimate_ratio = bpy.props.FloatProperty(
+        name="Decimate Ratio",
+        description="代理网格保留的面比例",
+        default=0.2,
+        min=0.01,
+        max=1.0
+    )
+    bpy.types.Scene.proxy_shape_key_threshold = bpy.props.FloatProperty(
+        name="Shape Key Threshold",
+        description="最大位移低于此值的形态键不复制到代理网格",
+        default=1e-4,
+        min=0.0,
+        precision=5
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("proxy_decimate_ratio", "proxy_shape_key_threshold"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(ProxyMeshesPanel)
+    bpy.utils.register_class(GenerateProxyMeshes)
+    bpy.utils.register_class(SwapProxyMeshes)
+    bpy.utils.register_class(RemoveProxyMeshes)
+
+
+def unregister():
+    bpy.utils.unregister_class(RemoveProxyMeshes)
+    bpy.utils.unregister_class(SwapProxyMeshes)
+    bpy.utils.unregister_class(GenerateProxyMeshes)
+    bpy.utils.unregister_class(ProxyMeshesPanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,149 @@
+import bpy
+import re
+from . import model
+from . import mmd_logging
+
+# 驱动器目标路径中的骨骼：pose.bones["name"]
+POSE_BONE_PATH = re.compile(r'pose\.bones\["((?:[^"\\]|\\.)*)"\]')
+
+
+# ------------------------------
+# 骨骼重命名引用索引
+# Blender 只修正骨架自身、其子对象和部分动画路径中的骨骼名称；
+# 其他对象的约束、驱动器变量、经其他父级变形的网格顶点组，
+# 以及 mmd_root 中以字符串保存的骨骼名称（骨骼 Morph、显示框、刚体、付与亲）都会失效。
+# 每批重命名前扫描一次场景建立 {骨骼名称: [引用]}，改名后一次性应用。
+# ------------------------------
+class BoneReferenceIndex:
+    """引用为 (所有者, 属性名)；属性值为完整骨骼名称，或 data_path 中包含 pose.bones["名称"]"""
+
+    def __init__(self, armature_obj, root=None):
+        self.armature_obj = armature_obj
+        self.root = root if root is not None else model.findRoot(armature_obj)
+        self.names = {}   # {骨骼名称: [(所有者, 属性名)]}
+        self.paths = {}   # {骨骼名称: [(所有者, 属性名)]}，data_path 中的骨骼
+        self._build()
+
+    def _add(self, name, owner, attr):
+        if name:
+            self.names.setdefault(name, []).append((owner, attr))
+
+    def _add_path(self, path, owner, attr):
+        for match in POSE_BONE_PATH.finditer(path or ""):
+            self.paths.setdefault(bpy.utils.unescape_identifier(match.group(1)), []).append((owner, attr))
+
+    # ------------------------------
+    # 建立索引（整个场景只遍历一次）
+    # ------------------------------
+    def _build(self):
+        armature_obj = self.armature_obj
+        for obj in bpy.data.objects:
+            self._constraints(obj.constraints)
+            if obj.type == 'ARMATURE' and obj.pose is not None:
+                for pose_bone in obj.pose.bones:
+                    self._constraints(pose_bone.constraints)
+            self._drivers(obj)
+            if obj.data is not None:
+                self._drivers(obj.data)
+                self._drivers(getattr(obj.data, "shape_keys", None))
+            if obj.type == 'MESH' and self._deformed_by_armature(obj):
+                for vertex_group in obj.vertex_groups:
+                    self._add(vertex_group.name, vertex_group, "name")
+            if obj.parent == armature_obj and obj.parent_type == 'BONE':
+                self._add(obj.parent_bone, obj, "parent_bone")
+        for material in bpy.data.materials:
+            self._drivers(material)
+        self._mmd_data()
+
+    def _deformed_by_armature(self, obj):
+        if obj.parent == self.armature_obj:
+            return True
+        return any(m.type == 'ARMATURE' and m.object == self.armature_obj for m in obj.modifiers)
+
+    def _constraints(self, constraints):
+        for con in constraints:
+            if getattr(con, "target", None) == self.armature_obj:
+                self._add(getattr(con, "subtarget", ""), con, "subtarget")
+            if getattr(con, "pole_target", None) == self.armature_obj:
+                self._add(con.pole_subtarget, con, "pole_subtarget")
+            for t in getattr(con, "targets", []):  # 骨架约束有多个目标
+                if t.target == self.armature_obj:
+                    self._add(t.subtarget, t, "subtarget")
+
+    def _drivers(self, id_data):
+        anim = getattr(id_data, "animation_data", None)
+        if anim is None:
+            return
+        for fcurve in anim.drivers:
+            for var in fcurve.driver.variables:
+                for t in var.targets:
+                    if t.id != self.armature_obj:
+                        continue
+                    self._add(t.bone_target, t, "bone_target")
+                    self._add_path(t.data_path, t, "data_path")
+
+    def _mmd_data(self):
+        for pose_bone in self.armature_obj.pose.bones:
+            mmd_bone = getattr(pose_bone, "mmd_bone", None)
+            if mmd_bone is not None and getattr(mmd_bone, "additional_transform_bone", ""):
+                self._add(mmd_bone.additional_transform_bone, mmd_bone, "additional_transform_bone")
+        root = self.root
+        if root is None or not hasattr(root, "mmd_root"):
+            return
+        for morph in root.mmd_root.bone_morphs:
+            for item in morph.data:
+                self._add(item.bone, item, "bone")
+        for frame in root.mmd_root.display_item_frames:
+            for item in getattr(frame, 'data', frame.items):
+                if item.type == 'BONE':
+                    self._add(item.name, item, "name")
+        for rigid in model.find_mmd_rigid_bodies_list(root):
+            mmd_rigid = getattr(rigid, "mmd_rigid", None)
+            if mmd_rigid is not None:
+                self._add(getattr(mmd_rigid, "bone", ""), mmd_rigid, "bone")
+
+    # ------------------------------
+    # 应用
+    # ------------------------------
+    def apply(self, renames):
+        """renames 为 {旧名称: 新名称}（同时生效，a→b、b→c 不会连锁）；返回更新的引用数"""
+        updated = 0
+        done = set()
+        for old, new in renames.items():
+            for owner, attr in self.names.get(old, ()):
+                key = (owner.as_pointer(), attr)
+                if key in done or getattr(owner, attr) != old:
+                    continue  # 已由 Blender 自动修正，或已按其他映射改过
+                setattr(owner, attr, new)
+                done.add(key)
+                updated += 1
+            # data_path 中的名称是转义后的（" 和 \ 前加反斜杠），索引键为原名称
+            old_path = f'pose.bones["{bpy.utils.escape_identifier(old)}"]'
+            new_path = f'pose.bones["{bpy.utils.escape_identifier(new)}"]'
+            for owner, attr in self.paths.get(old, ()):
+                key = (owner.as_pointer(), attr, old)
+                value = getattr(owner, attr)
+                if key in done or old_path not in value:
+                    continue
+                setattr(owner, attr, value.replace(old_path, new_path))
+                done.add(key)
+                updated += 1
+        return updated
+
+
+def snapshot(armature_obj):
+    """重命名前的骨骼名称（按骨骼顺序，改名不会改变顺序）"""
+    return [bone.name for bone in armature_obj.data.bones]
+
+
+def renames_since(armature_obj, before):
+    """与 snapshot 比较，返回 {旧名称: 新名称}"""
+    return {old: bone.name for old, bone in zip(before, armature_obj.data.bones) if old != bone.name}
+
+
+def propagate(index, armature_obj, before):
+    """改名后把变化应用到索引中的全部引用，返回 (改名骨骼数, 更新引用数)"""
+    renames = renames_since(armature_obj, before)
+    updated = index.apply(renames) if renames else 0
+    mmd_logging.info(f"骨骼改名 {len(renames)} 个，更新外部引用 {updated} 处")
+    return len(renames), updated
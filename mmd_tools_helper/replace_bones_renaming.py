@@ -1,5 +1,7 @@
 import bpy
 from . import model
+from . import mmd_logging
+from . import rename_index
 
 # 定义场景属性
 def register_props():
@@ -64,10 +66,13 @@ def main(context):
         replace_str = context.scene.replace_bone_string
         
         if find_str:  # 只有当查找字符串不为空时才执行替换
+            reference_index = rename_index.BoneReferenceIndex(armature)
+            before = rename_index.snapshot(armature)
             for bone in bones_to_process:
                 # 跳过包含特定关键词的骨骼
                 if 'dummy' not in bone.name and 'shadow' not in bone.name:
                     bone.name = bone.name.replace(find_str, replace_str)
+            rename_index.propagate(reference_index, armature, before)
 
 class ReplaceBonesRenaming(bpy.types.Operator):
     """批量查找并替换骨骼名称"""
@@ -80,7 +85,8 @@ class ReplaceBonesRenaming(bpy.types.Operator):
         return context.active_object is not None
 
     def execute(self, context):
-        main(context)
+        with mmd_logging.session("Replace Bones Renaming", context.scene):
+            main(context)
         self.report({'INFO'}, "骨骼名称替换完成")
         return {'FINISHED'}
 
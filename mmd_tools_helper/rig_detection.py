@@ -0,0 +1,310 @@
+# 根据骨骼名称列表检测骨架类型、查找缺失骨骼（不依赖 bpy，供骨架诊断和 PMX 编目共用）
+import os
+import csv
+import time
+
+try:
+    from . import import_csv
+    from . import bone_name_matcher
+    from . import dictionary_cache
+except ImportError:  # 在 Blender 外（例如编目子进程）以顶层模块导入
+    import import_csv
+    import bone_name_matcher
+    import dictionary_cache
+
+# MMD 半标准骨骼，不计入缺失骨骼
+OPTIONAL_BONES = {"upper body 2", "上半身2"}
+OPTIONAL_FINGER_BONES = {"thumb0_L", "thumb0_R", "左親指0", "親指0.L", "右親指0", "親指0.R"}
+
+# 模糊匹配的默认置信度下限
+FUZZY_THRESHOLD = 0.75
+
+# ------------------------------
+# 字典：内置 CSV + 用户覆盖字典（额外的骨架类型列和行）
+# 覆盖字典目录下的 *.csv 首行为骨架类型；文件名含 "finger" 的并入手指骨骼字典，其余并入普通骨骼字典。
+# 行按与内置字典共有的列（依次尝试）对应到已有行，找不到时追加为新行；非空值覆盖内置值。
+# ------------------------------
+OVERLAY_ENV = "MMD_TOOLS_HELPER_DICTIONARIES"  # 批处理时用环境变量指定覆盖字典目录（os.pathsep 分隔）
+
+# 检查源文件是否变化的最短间隔（秒）；变化后自动重新编译
+CHECK_INTERVAL = 1.0
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+BASE_FILES = (os.path.join(_HERE, "bones_dictionary.csv"), os.path.join(_HERE, "bones_fingers_dictionary.csv"))
+
+_overlay_dirs = []
+_dictionaries = None
+_required = {}    # {骨架类型: 检测骨架类型时计入的全部骨骼名称}
+_stamp = None
+_checked = 0.0
+_matchers = {}
+generation = 0  # 每次重新编译加一，依赖字典的缓存以此判断是否过期
+
+
+def set_overlay_dirs(directories):
+    """设置覆盖字典目录（环境变量中的目录始终生效）；下次访问字典时重新编译"""
+    global _checked
+    _overlay_dirs[:] = [d for d in directories if d]
+    _checked = 0.0
+
+
+def overlay_dirs():
+    env = [d for d in os.environ.get(OVERLAY_ENV, "").split(os.pathsep) if d]
+    return list(dict.fromkeys(_overlay_dirs + env))
+
+
+def overlay_files():
+    """[(路径, 是否手指骨骼字典), ...]"""
+    files = []
+    for directory in overlay_dirs():
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            if filename.lower().endswith(".csv"):
+                files.append((os.path.join(directory, filename), "finger" in filename.lower()))
+    return files
+
+
+def source_stamp(files):
+    stamp = []
+    for path in list(BASE_FILES) + [f[0] for f in files]:
+        try:
+            st = os.stat(path)
+            stamp.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append((path, None, None))
+    return tuple(stamp)
+
+
+def merge_dictionary(base, overlay):
+    """把覆盖字典并入 base，返回新字典（元组列表，首行为合并后的骨架类型）"""
+    if not overlay:
+        return base
+    base_header = list(base[0])
+    header = list(base_header)
+    overlay_header = [h.strip() for h in overlay[0]]
+    for rig_type in overlay_header:
+        if rig_type and rig_type not in header:
+            header.append(rig_type)
+    width = len(header)
+    rows = [list(row) + [""] * (width - len(row)) for row in base[1:]]
+    columns = [header.index(t) if t else None for t in overlay_header]
+
+    # 共有列的 {名称: 行号}，用于把覆盖行对应到已有行
+    keys = [(i, header.index(t)) for i, t in enumerate(overlay_header) if t in base_header]
+    lookup = {col: {} for _, col in keys}
+    for r, row in enumerate(rows):
+        for _, col in keys:
+            if row[col]:
+                lookup[col].setdefault(row[col], r)
+
+    for entry in overlay[1:]:
+        target = None
+        for i, col in keys:
+            if i < len(entry) and entry[i] and entry[i] in lookup[col]:
+                target = lookup[col][entry[i]]
+                break
+        if target is None:
+            if not any(entry):
+                continue
+            rows.append([""] * width)
+            target = len(rows) - 1
+        for i, value in enumerate(entry):
+            col = columns[i] if i < len(columns) else None
+            if col is not None and value:
+                rows[target][col] = value
+                if col in lookup:
+                    lookup[col].setdefault(value, target)
+    return [tuple(header)] + [tuple(row) for row in rows]
+
+
+def _warn(message):
+    """插件中经 mmd_logging 输出；Blender 外（命令行、编目子进程）直接打印"""
+    try:
+        from . import mmd_logging
+    except ImportError:
+        print(f"WARNING {message}")
+        return
+    mmd_logging.warning(message)
+
+
+def compile_dictionaries(files):
+    """返回 (骨骼字典, 手指骨骼字典, 跳过的覆盖字典数)；无法读取或合并的覆盖字典跳过，不影响内置字典"""
+    bones = import_csv.use_csv_bones_dictionary()
+    fingers = import_csv.use_csv_bones_fingers_dictionary()
+    skipped = 0
+    for path, is_finger in files:
+        try:
+            overlay = import_csv.use_csv_dictionary(path)
+            if is_finger:
+                fingers = merge_dictionary(fingers, overlay)
+            else:
+                bones = merge_dictionary(bones, overlay)
+        except (OSError, ValueError, IndexError, csv.Error) as e:  # UnicodeDecodeError 属于 ValueError
+            _warn(f"跳过无法读取的覆盖字典 {path}: {e}")
+            skipped += 1
+    # 两个字典的骨架类型保持一致：只出现在一边的类型在另一边补为空列
+    header = list(dict.fromkeys(list(bones[0]) + list(fingers[0])))
+    return align_columns(bones, header), align_columns(fingers, header), skipped
+
+
+def align_columns(dictionary, header):
+    if list(dictionary[0]) == header:
+        return dictionary
+    index = {t: i for i, t in enumerate(dictionary[0])}
+    return [tuple(header)] + [
+        tuple(row[index[t]] if t in index and index[t] < len(row) else "" for t in header)
+        for row in dictionary[1:]
+    ]
+
+
+def build_required(bones, fingers):
+    return {
+        rig_type: sorted(set(column(bones, rig_type, OPTIONAL_BONES)) | set(column(fingers, rig_type, OPTIONAL_FINGER_BONES)))
+        for rig_type in bones[0]
+    }
+
+
+def source_digest(files):
+    """内置字典和覆盖字典内容的摘要；文件无法读取时为 None"""
+    sources = [(path, "bones") for path in BASE_FILES[:1]] + [(path, "fingers") for path in BASE_FILES[1:]]
+    sources += [(path, "fingers" if is_finger else "bones") for path, is_finger in files]
+    try:
+        return dictionary_cache.source_digest(sources)
+    except OSError:
+        return None
+
+
+def dictionary_digest():
+    """当前生效的字典摘要（模型库索引以此判断骨架类型等派生数据是否过期）"""
+    return source_digest(overlay_files())
+
+
+def load_compiled(files):
+    """(骨骼字典, 手指骨骼字典, 检测索引)：源 CSV 内容未变时从磁盘缓存载入，否则编译并写入缓存"""
+    digest = source_digest(files)
+    if digest is not None:
+        cached = dictionary_cache.load(digest)
+        if cached is not None:
+            return cached
+    bones, fingers, skipped = compile_dictionaries(files)
+    compiled = (bones, fingers, build_required(bones, fingers))
+    if digest is not None and not skipped:  # 有跳过的文件时不缓存，下次重新编译时再次报告
+        dictionary_cache.save(digest, compiled)
+    return compiled
+
+
+def reload(force=True):
+    """源文件（内置字典或覆盖字典）变化时重新编译；返回是否重新编译"""
+    global _dictionaries, _required, _stamp, _checked, generation
+    files = overlay_files()
+    stamp = source_stamp(files)
+    _checked = time.monotonic()
+    if not force and stamp == _stamp and _dictionaries is not None:
+        return False
+    bones, fingers, required = load_compiled(files)
+    _dictionaries = (bones, fingers)
+    _required = {rig_type: frozenset(names) for rig_type, names in required.items()}
+    _stamp = stamp
+    _matchers.clear()
+    generation += 1
+    return True
+
+
+def dictionaries():
+    """(骨骼字典, 手指骨骼字典)，首行为骨架类型；源文件变化后自动重新编译"""
+    if _dictionaries is None or time.monotonic() - _checked > CHECK_INTERVAL:
+        reload(force=False)
+    return _dictionaries
+
+
+def rig_types():
+    return list(dictionaries()[0][0])
+
+
+def column(dictionary, rig_type, optional=()):
+    """骨架类型在字典中的全部非空骨骼名称"""
+    if rig_type not in dictionary[0]:
+        return []
+    index = dictionary[0].index(rig_type)
+    return [row[index] for row in dictionary[1:]
+            if len(row) > index and row[index] != "" and row[index] not in optional]
+
+
+def missing_bones(bone_names, rig_type):
+    """返回 (缺失的普通骨骼, 缺失的手指骨骼)"""
+    bone_names = set(bone_names)
+    bones, fingers = dictionaries()
+    return (
+        [name for name in column(bones, rig_type, OPTIONAL_BONES) if name not in bone_names],
+        [name for name in column(fingers, rig_type, OPTIONAL_FINGER_BONES) if name not in bone_names],
+    )
+
+
+def has_full_fingers(bone_names, rig_type):
+    return not missing_bones(bone_names, rig_type)[1]
+
+
+def detect_rig_type(bone_names, fuzzy=False):
+    """按匹配比例排序的 [(骨架类型, 匹配数, 总数), ...]；第一项为最可能的类型
+    fuzzy=True 时按规范化名称比较（忽略全角/半角、大小写、分隔符和左右写法差异）"""
+    if fuzzy:
+        bone_names = {bone_name_matcher.split_side(n) for n in bone_names}
+    else:
+        bone_names = set(bone_names)
+    dictionaries()
+    scores = []
+    for rig_type, names in _required.items():
+        if not names:
+            continue
+        if fuzzy:
+            names = {bone_name_matcher.split_side(n) for n in names}
+        matched = len(names & bone_names)
+        scores.append((rig_type, matched, len(names)))
+    scores.sort(key=lambda s: (-s[1] / s[2], -s[1]))
+    return scores
+
+
+def rename_map(source_type, target_type):
+    """{源骨架类型骨骼名称: 目标骨架类型骨骼名称}（普通骨骼 + 手指骨骼，两边都非空的行）"""
+    mapping = {}
+    for dictionary in dictionaries():
+        header = dictionary[0]
+        if source_type not in header or target_type not in header:
+            continue
+        source_idx = header.index(source_type)
+        target_idx = header.index(target_type)
+        for row in dictionary[1:]:
+            if len(row) <= max(source_idx, target_idx):
+                continue
+            if row[source_idx] != "" and row[target_idx] != "":
+                mapping.setdefault(row[source_idx], row[target_idx])
+    return mapping
+
+
+def matcher(rig_type):
+    """骨架类型全部骨骼名称（普通 + 手指）的模糊匹配索引；按类型缓存"""
+    result = _matchers.get(rig_type)
+    if result is None:
+        bones, fingers = dictionaries()
+        result = bone_name_matcher.BoneNameMatcher(column(bones, rig_type) + column(fingers, rig_type))
+        _matchers[rig_type] = result
+    return result
+
+
+def resolve_bone_names(bone_names, rig_type, threshold=FUZZY_THRESHOLD):
+    """把骨架中的骨骼名称对应到字典列中的名称：{字典名称: (实际名称, 置信度)}
+    字典名称已存在于骨架中时直接对应；同一字典名称有多个候选时取置信度最高的"""
+    bone_names = list(bone_names)
+    index = matcher(rig_type)
+    present = set(bone_names) & index.exact
+    resolved = {name: (name, bone_name_matcher.EXACT) for name in present}
+    for name in bone_names:
+        if name in present:
+            continue
+        canonical, confidence = index.match(name, threshold)
+        if canonical is None or canonical in present:
+            continue
+        if canonical not in resolved or resolved[canonical][1] < confidence:
+            resolved[canonical] = (name, confidence)
+    return resolved
@@ -0,0 +1,244 @@
+# 按骨架结构匹配骨骼（骨骼名称不可用时：编号名称、乱码、未知语言），只依赖 numpy
+# 每根骨骼的层级签名：深度、子骨骼数、子树大小、单链长度、归一化头部位置、骨骼方向、左右侧；
+# 参考骨架按广度优先逐根匹配，候选只取已匹配父骨骼之下几层内的骨骼，
+# 因此总耗时与骨骼数近似线性，并能跳过未知骨架中多出的中间骨骼（捩、D 骨骼等）。
+import numpy as np
+
+# 候选骨骼最多位于已匹配父骨骼之下几层（允许跳过多出的中间骨骼）
+MAX_SKIP = 3
+
+# 代价权重
+POSITION_WEIGHT = 1.0
+DIRECTION_WEIGHT = 0.3
+SUBTREE_WEIGHT = 0.05
+SUBTREE_CAP = 2.0
+CHAIN_WEIGHT = 0.1
+SKIP_PENALTY = 0.05
+MIRROR_BONUS = 0.05
+# 子骨骼比本骨骼至少好这么多时，认为源骨架缺少本骨骼
+SKIP_MARGIN = 0.02
+
+# 高于此代价不匹配；置信度 = 1 - 代价 / MAX_COST
+MAX_COST = 0.6
+
+# |x| 小于骨架高度的此比例视为中心骨骼（不分左右）
+CENTER_TOLERANCE = 0.02
+
+
+class Skeleton:
+    """骨架的数组快照：names、parents（-1 为无父骨骼）、heads/tails（N×3，骨架空间）、rolls（可选，弧度）"""
+
+    def __init__(self, names, parents, heads, tails, rolls=None):
+        self.names = list(names)
+        self.parents = np.asarray(parents, dtype=np.int64)
+        self.heads = np.asarray(heads, dtype=np.float64).reshape(-1, 3)
+        self.tails = np.asarray(tails, dtype=np.float64).reshape(-1, 3)
+        self.rolls = None if rolls is None else np.asarray(rolls, dtype=np.float64)
+        self._signatures = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def children(self):
+        """每根骨骼的子骨骼序号列表"""
+        result = [[] for _ in range(len(self))]
+        for index, parent in enumerate(self.parents):
+            if parent >= 0:
+                result[parent].append(index)
+        return result
+
+    def order(self):
+        """广度优先顺序（父骨骼在前）"""
+        children = self.children()
+        queue = [i for i, p in enumerate(self.parents) if p < 0]
+        for index in queue:
+            queue.extend(children[index])
+        return queue
+
+    def signatures(self):
+        if self._signatures is None:
+            self._signatures = Signatures(self)
+        return self._signatures
+
+
+class Signatures:
+    """层级签名（全部为长度 N 的数组）"""
+
+    def __init__(self, skeleton):
+        n = len(skeleton)
+        children = skeleton.children()
+        order = skeleton.order()
+
+        self.depth = np.zeros(n, dtype=np.int64)
+        for index in order:
+            parent = skeleton.parents[index]
+            if parent >= 0:
+                self.depth[index] = self.depth[parent] + 1
+        self.child_count = np.array([len(c) for c in children], dtype=np.int64)
+
+        # 子树大小、单链长度：自底向上
+        self.subtree = np.ones(n, dtype=np.int64)
+        self.chain = np.ones(n, dtype=np.int64)
+        for index in reversed(order):
+            parent = skeleton.parents[index]
+            if parent >= 0:
+                self.subtree[parent] += self.subtree[index]
+            if len(children[index]) == 1:
+                self.chain[index] += self.chain[children[index][0]]
+
+        # 位置按自身包围盒归一化：水平居中、脚底为 0、高度为 1（与模型缩放无关）
+        points = np.vstack([skeleton.heads, skeleton.tails]) if n else np.zeros((1, 3))
+        low, high = points.min(axis=0), points.max(axis=0)
+        height = max(high[2] - low[2], 1e-6)
+        center = np.array([(low[0] + high[0]) / 2, (low[1] + high[1]) / 2, low[2]])
+        self.heads = (skeleton.heads - center) / height
+        self.tails = (skeleton.tails - center) / height
+        vectors = self.tails - self.heads
+        lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.directions = np.divide(vectors, lengths, out=np.zeros_like(vectors), where=lengths > 1e-9)
+
+        self.side = np.where(np.abs(self.heads[:, 0]) < CENTER_TOLERANCE, 0, np.sign(self.heads[:, 0])).astype(np.int64)
+        self.mirror = mirror_pairs(self)
+
+
+def rolls_from_matrices(matrices):
+    """由骨骼矩阵（N×3×3，按行存储）计算扭转角 roll，与 Blender 的 mat3_to_vec_roll 相同"""
+    y_axes = matrices[:, :, 1]
+    y_axes = y_axes / np.maximum(np.linalg.norm(y_axes, axis=1, keepdims=True), 1e-12)
+    x, y, z = y_axes[:, 0], y_axes[:, 1], y_axes[:, 2]
+    # 无扭转时把 +Y 转到骨骼方向的矩阵；骨骼接近 -Y 时改用级数近似避免除零
+    theta = 1.0 + y
+    theta_alt = x * x + z * z
+    theta = np.where(theta > 1e-5, theta, theta_alt * 0.5 + theta_alt * theta_alt * 0.125)
+    theta = np.maximum(theta, 1e-12)
+    zero_roll = np.zeros_like(matrices)
+    zero_roll[:, 0, 0] = 1.0 - x * x / theta
+    zero_roll[:, 0, 1] = x
+    zero_roll[:, 0, 2] = -x * z / theta
+    zero_roll[:, 1, 0] = -x
+    zero_roll[:, 1, 1] = y
+    zero_roll[:, 1, 2] = -z
+    zero_roll[:, 2, 0] = -x * z / theta
+    zero_roll[:, 2, 1] = z
+    zero_roll[:, 2, 2] = 1.0 - z * z / theta
+    roll_matrices = np.transpose(zero_roll, (0, 2, 1)) @ matrices
+    return np.arctan2(roll_matrices[:, 0, 2], roll_matrices[:, 2, 2])
+
+
+def mirror_pairs(signatures):
+    """左右对称骨骼：同深度骨骼中，镜像头部位置最近的另一侧骨骼；无对称骨骼为 -1"""
+    n = len(signatures.depth)
+    mirror = np.full(n, -1, dtype=np.int64)
+    heads = signatures.heads
+    for depth in np.unique(signatures.depth):
+        left = np.flatnonzero((signatures.depth == depth) & (signatures.side > 0))
+        right = np.flatnonzero((signatures.depth == depth) & (signatures.side < 0))
+        if len(left) == 0 or len(right) == 0:
+            continue
+        mirrored = heads[left] * np.array([-1.0, 1.0, 1.0])
+        distances = np.linalg.norm(mirrored[:, None, :] - heads[right][None, :, :], axis=2)
+        nearest = distances.argmin(axis=1)
+        for i, j in enumerate(nearest):
+            # 双向最近才算一对
+            if distances[:, j].argmin() == i and distances[i, j] < 0.05:
+                mirror[left[i]] = right[j]
+                mirror[right[j]] = left[i]
+    return mirror
+
+
+def descendants_within(children, index, max_depth):
+    """[(骨骼序号, 相对深度)]，相对深度 1 为直接子骨骼"""
+    result = []
+    frontier = [index]
+    for level in range(1, max_depth + 1):
+        frontier = [c for f in frontier for c in children[f]]
+        if not frontier:
+            break
+        result.extend((c, level) for c in frontier)
+    return result
+
+
+def _costs(src, ref, r, index, levels, expected, anchor, result):
+    """参考骨骼 r 与候选源骨骼 index 的匹配代价；anchor 为 (源祖先, 参考祖先) 或 None（根骨骼）"""
+    if anchor is None:
+        offset = src.heads[index] - ref.heads[r]
+    else:
+        # 位置比较相对于已匹配的祖先（不受附加骨骼改变包围盒中心的影响）
+        offset = (src.heads[index] - src.heads[anchor[0]]) - (ref.heads[r] - ref.heads[anchor[1]])
+    cost = POSITION_WEIGHT * np.linalg.norm(offset, axis=1)
+    cost += DIRECTION_WEIGHT * (1.0 - src.directions[index] @ ref.directions[r]) / 2.0
+    # 子树大小只作弱约束（未知骨架常带大量头发、裙子等附加骨骼）
+    cost += SUBTREE_WEIGHT * np.minimum(np.abs(np.log(src.subtree[index] / ref.subtree[r])), SUBTREE_CAP)
+    cost += CHAIN_WEIGHT * np.abs(src.chain[index] - ref.chain[r]) / np.maximum(src.chain[index], ref.chain[r])
+    cost += SKIP_PENALTY * np.abs(levels - expected)
+    # 左右侧不同的骨骼不能匹配
+    if ref.side[r] != 0:
+        cost[src.side[index] == -ref.side[r]] = np.inf
+    # 对称骨骼已匹配时，优先选择其匹配骨骼的对称骨骼
+    partner = ref.mirror[r]
+    if partner >= 0 and partner in result:
+        cost[index == src.mirror[result[partner][0]]] -= MIRROR_BONUS
+    return cost
+
+
+def match_skeletons(source, reference):
+    """把未知骨架 source 对齐到参考骨架 reference
+    返回 {参考骨骼序号: (源骨骼序号, 置信度)}"""
+    if len(source) == 0 or len(reference) == 0:
+        return {}
+    src, ref = source.signatures(), reference.signatures()
+    src_children = source.children()
+    ref_children = reference.children()
+    used = np.zeros(len(source), dtype=bool)
+    result = {}
+
+    for r in reference.order():
+        parent = reference.parents[r]
+        if parent < 0:
+            # 根骨骼：在源骨架的全部根骨骼及其下几层中查找
+            expected, anchor = 0, None
+            candidates = [(i, 0) for i, p in enumerate(source.parents) if p < 0]
+            for root, _ in list(candidates):
+                candidates.extend(descendants_within(src_children, root, MAX_SKIP))
+        else:
+            # 父骨骼未匹配时向上找最近的已匹配祖先，按跳过的层数放宽查找深度
+            expected = 1
+            while parent >= 0 and parent not in result:
+                parent = reference.parents[parent]
+                expected += 1
+            if parent < 0:
+                continue
+            anchor = (result[parent][0], parent)
+            candidates = descendants_within(src_children, anchor[0], MAX_SKIP + expected - 1)
+
+        candidates = [(i, level) for i, level in candidates if not used[i]]
+        if not candidates:
+            continue
+        index = np.array([c[0] for c in candidates])
+        levels = np.array([c[1] for c in candidates])
+        cost = _costs(src, ref, r, index, levels, expected, anchor, result)
+        best = int(cost.argmin())
+        if cost[best] > MAX_COST:
+            continue
+
+        # 前瞻：最佳候选与某个子骨骼更吻合时，说明源骨架缺少 r（例如没有 上半身2），跳过 r
+        if ref_children[r]:
+            child_costs = [
+                _costs(src, ref, child, index[best:best + 1], levels[best:best + 1], expected + 1, anchor, result)[0]
+                for child in ref_children[r]
+            ]
+            if min(child_costs) + SKIP_MARGIN < cost[best]:
+                continue
+
+        used[index[best]] = True
+        result[r] = (int(index[best]), float(max(0.0, min(1.0, 1.0 - cost[best] / MAX_COST))))
+    return result
+
+
+def propose_mapping(source, reference, min_confidence=0.0):
+    """{源骨骼名称: (参考骨骼名称, 置信度)}，供按名称重命名使用"""
+    return {
+        source.names[s]: (reference.names[r], confidence)
+        for r, (s, confidence) in match_skeletons(source, reference).items()
+        if confidence >= min_confidence
+    }
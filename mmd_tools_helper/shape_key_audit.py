@@ -0,0 +1,402 @@
+import bpy
+import hashlib
+import numpy as np
+from . import model
+from . import mmd_logging
+from . import action_retarget
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class ShapeKeyAuditPanel(bpy.types.Panel):
+    """分析 MMD 顶点 Morph（形态键）的稀疏程度并清理"""
+    bl_idname = "OBJECT_PT_mmd_shape_key_audit"
+    bl_label = "MMD Shape Key Audit"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.label(text="Shape Key Audit", icon="SHAPEKEY_DATA")
+        layout.prop(scene, "shape_key_audit_threshold")
+        layout.prop(scene, "shape_key_audit_action", text="")
+        row = layout.row()
+        row.operator("mmd_tools_helper.shape_key_audit", text="Run")
+        row.enabled = context.active_object is not None
+
+
+# ------------------------------
+# 2. 分析（逐个形态键批量读取坐标，避免一次性占用 K×V×3 内存）
+# ------------------------------
+def read_coords(collection):
+    coords = np.empty(len(collection) * 3, dtype=np.float32)
+    collection.foreach_get("co", coords)
+    return coords.reshape(-1, 3)
+
+
+class KeyStats:
+    """单个形态键的统计结果"""
+
+    def __init__(self, name, affected, digest):
+        self.name = name
+        self.affected = affected        # 受影响顶点的布尔掩码
+        self.count = int(affected.sum())
+        self.digest = digest            # 位移内容哈希（用于查找完全相同的形态键）
+
+
+def analyze_mesh(mesh_obj, threshold):
+    """返回 [KeyStats, ...]（不含参考键）"""
+    key = mesh_obj.data.shape_keys
+    if key is None:
+        return []
+    basis = read_coords(key.reference_key.data)
+    stats = []
+    for block in key.key_blocks:
+        if block == key.reference_key:
+            continue
+        delta = read_coords(block.data) - basis
+        affected = (np.abs(delta) > threshold).any(axis=1)
+        # 量化后再哈希，浮点噪声以内的差异视为相同
+        quantized = np.round(delta / max(threshold, 1e-9)).astype(np.int64)
+        quantized[~affected] = 0
+        digest = hashlib.sha1(quantized.tobytes()).hexdigest() if affected.any() else None
+        stats.append(KeyStats(block.name, affected, digest))
+    return stats
+
+
+def relative_key_names(mesh_obj):
+    """被其它形态键作为相对键引用的形态键不能删除"""
+    key = mesh_obj.data.shape_keys
+    return {b.relative_key.name for b in key.key_blocks if b.relative_key != b}
+
+
+def key_block_path(name):
+    return f'key_blocks["{bpy.utils.escape_identifier(name)}"]'
+
+
+def driven_key_names(mesh_obj):
+    """数值由驱动器控制的形态键不能合并（合并后驱动器无处可去）"""
+    key = mesh_obj.data.shape_keys
+    anim = key.animation_data
+    if anim is None or not anim.drivers:
+        return set()
+    paths = {fcurve.data_path for fcurve in anim.drivers}
+    return {b.name for b in key.key_blocks if key_block_path(b.name) + ".value" in paths}
+
+
+def duplicate_aliases(stats, protected):
+    """{重复形态键: 保留的形态键}；完全相同的形态键只保留第一个，受保护的形态键不合并"""
+    canonical = {}
+    aliases = {}
+    for s in stats:
+        if s.digest is None:
+            continue
+        if s.digest in canonical and s.name not in protected:
+            aliases[s.name] = canonical[s.digest]
+        else:
+            canonical.setdefault(s.digest, s.name)
+    return aliases
+
+
+def report(mesh_obj, stats):
+    vertex_count = len(mesh_obj.data.vertices)
+    dense = vertex_count * 12 * len(stats)
+    sparse = sum(s.count for s in stats) * 16  # 顶点索引 + 位移
+    empty = sum(1 for s in stats if s.count == 0)
+    duplicates = len(duplicate_aliases(stats, relative_key_names(mesh_obj) | driven_key_names(mesh_obj)))
+    mmd_logging.info(
+        f"{mesh_obj.name}: {len(stats)} 个形态键，空 {empty}，重复 {duplicates}，"
+        f"密集存储 {dense / 1048576:.1f} MB，实际位移约 {sparse / 1048576:.2f} MB"
+    )
+    for s in sorted(stats, key=lambda s: -s.count):
+        mmd_logging.debug(f"  {s.name}: {s.count}/{vertex_count} 顶点，{vertex_count * 12 / 1024:.0f} KB")
+    return empty, duplicates
+
+
+# ------------------------------
+# 3. 清理操作
+# ------------------------------
+def remove_shape_keys(mesh_obj, names):
+    key = mesh_obj.data.shape_keys
+    for name in names:
+        block = key.key_blocks.get(name)
+        if block is not None:
+            mesh_obj.shape_key_remove(block)
+
+
+def remaining_key_names(root):
+    remaining = set()
+    for mesh_obj in model.meshes(root):
+        if mesh_obj.data.shape_keys:
+            remaining.update(mesh_obj.data.shape_keys.key_blocks.keys())
+    return remaining
+
+
+def remove_vertex_morph_entries(root, removed_names):
+    """删除不再有任何网格提供形态键的 mmd_tools 顶点 Morph 条目"""
+    if root is None or not hasattr(root, "mmd_root") or not removed_names:
+        return
+    remaining = remaining_key_names(root)
+    morphs = root.mmd_root.vertex_morphs
+    for i in range(len(morphs) - 1, -1, -1):
+        if morphs[i].name in removed_names and morphs[i].name not in remaining:
+            morphs.remove(i)
+
+
+def retarget_vertex_morph_entries(root, aliases):
+    """合并后的 mmd_tools 顶点 Morph：组 Morph 和显示框改指向保留的 Morph；
+    保留的形态键没有自己的条目时把原条目改名，否则删除重复条目并提示 VMD 中的名称"""
+    if root is None or not hasattr(root, "mmd_root") or not aliases:
+        return
+    mmd_root = root.mmd_root
+    remaining = remaining_key_names(root)
+    aliases = {old: new for old, new in aliases.items() if old not in remaining}
+    for morph in mmd_root.group_morphs:
+        for item in morph.data:
+            if item.morph_type == 'vertex_morphs' and item.name in aliases:
+                item.name = aliases[item.name]
+    for frame in mmd_root.display_item_frames:
+        for item in getattr(frame, 'data', frame.items):
+            if item.type == 'MORPH' and item.morph_type == 'vertex_morphs' and item.name in aliases:
+                item.name = aliases[item.name]
+    morphs = mmd_root.vertex_morphs
+    for i in range(len(morphs) - 1, -1, -1):
+        old = morphs[i].name
+        if old not in aliases:
+            continue
+        new = aliases[old]
+        if morphs.get(new) is None:
+            morphs[i].name = new
+        else:
+            morphs.remove(i)
+            mmd_logging.warning(f"  顶点 Morph {old} 已合并到 {new}，VMD 中 {old} 的轨道需改用 {new}")
+
+
+def delete_empty(mesh_obj, stats):
+    protected = relative_key_names(mesh_obj)
+    names = [s.name for s in stats if s.count == 0 and s.name not in protected]
+    remove_shape_keys(mesh_obj, names)
+    return names
+
+
+def retarget_key_paths(id_data, aliases, mesh_obj):
+    """动画曲线和驱动器变量中的 key_blocks["旧"] 改指向保留的形态键
+    （驱动器目标可以是形态键数据块本身，也可以是网格对象或网格数据：data.shape_keys.key_blocks[...]）"""
+    key = mesh_obj.data.shape_keys
+    owners = (key, mesh_obj, mesh_obj.data)
+    replacements = {key_block_path(old): key_block_path(new) for old, new in aliases.items()}
+
+    def retarget(path):
+        for old, new in replacements.items():
+            if old in path:  # 名称带右引号，不会误匹配前缀相同的名称
+                return path.replace(old, new)
+        return path
+
+    anim = getattr(id_data, "animation_data", None)
+    if anim is None:
+        return
+    if id_data == key and anim.action:
+        action = anim.action
+        # 保留的形态键已有同一通道的 F 曲线时合并关键帧（同一通道的两条曲线只有一条生效）
+        index = {(fc.data_path, fc.array_index): fc for fc in action.fcurves}
+        for fcurve in list(action.fcurves):
+            path = retarget(fcurve.data_path)
+            if path == fcurve.data_path:
+                continue
+            existing = index.get((path, fcurve.array_index))
+            if existing is not None:
+                action_retarget.merge_fcurve(action, fcurve, existing)
+            else:
+                fcurve.data_path = path
+                index[(path, fcurve.array_index)] = fcurve
+    for fcurve in anim.drivers:
+        for var in fcurve.driver.variables:
+            for t in var.targets:
+                if t.id in owners and t.data_path:
+                    t.data_path = retarget(t.data_path)
+
+
+def merge_duplicates(mesh_obj, stats):
+    """完全相同的形态键只保留第一个；动画曲线和驱动器改指向保留的形态键"""
+    aliases = duplicate_aliases(stats, relative_key_names(mesh_obj) | driven_key_names(mesh_obj))
+    if not aliases:
+        return {}
+    owners = [*bpy.data.materials, *bpy.data.shape_keys]
+    for obj in bpy.data.objects:
+        owners.extend((obj, obj.data))
+    for id_data in {o for o in owners if o is not None}:
+        retarget_key_paths(id_data, aliases, mesh_obj)
+    for old, new in aliases.items():
+        mmd_logging.info(f"  合并 {old} → {new}")
+    remove_shape_keys(mesh_obj, list(aliases))
+    return aliases
+
+
+def split_morph_region(context, mesh_obj, stats):
+    """把受任一形态键影响的面分离为独立网格（保留形态键），其余部分删除全部形态键"""
+    if not stats:
+        return None
+    mesh = mesh_obj.data
+    affected = np.zeros(len(mesh.vertices), dtype=bool)
+    for s in stats:
+        affected |= s.affected
+    if affected.all() or not affected.any():
+        return None
+
+    # 含受影响顶点的面全部划入形态区域
+    loop_vert = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vert)
+    loop_start = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_start)
+    poly_sel = np.maximum.reduceat(affected[loop_vert], loop_start) if len(loop_start) else np.zeros(0, dtype=bool)
+    vert_sel = np.zeros(len(mesh.vertices), dtype=bool)
+    loop_total = np.diff(np.r_[loop_start, len(loop_vert)])
+    vert_sel[loop_vert[np.repeat(poly_sel, loop_total)]] = True
+    edge_vert = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edge_vert)
+    edge_sel = vert_sel[edge_vert.reshape(-1, 2)].all(axis=1)
+
+    mesh.vertices.foreach_set("select", vert_sel)
+    mesh.edges.foreach_set("select", edge_sel)
+    mesh.polygons.foreach_set("select", poly_sel)
+
+    view_layer = context.view_layer
+    for obj in view_layer.objects.selected:
+        obj.select_set(False)
+    mesh_obj.select_set(True)
+    view_layer.objects.active = mesh_obj
+    bpy.ops.object.mode_set(mode='EDIT')
+    bpy.ops.mesh.separate(type='SELECTED')
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+    morph_obj = next((o for o in view_layer.objects.selected if o != mesh_obj), None)
+    if morph_obj is None:
+        return None
+    morph_obj.name = mesh_obj.name + "_morphs"
+    mesh_obj.shape_key_clear()  # 剩余部分没有任何顶点受形态键影响
+    return morph_obj
+
+
+# ------------------------------
+# 4. 主流程
+# ------------------------------
+def main(context):
+    scene = context.scene
+    action = scene.shape_key_audit_action
+    threshold = scene.shape_key_audit_threshold
+    active_obj = context.view_layer.objects.active
+
+    mesh_objects_list = model.find_MMD_MeshesList(active_obj)
+    if not mesh_objects_list:
+        raise Exception("未找到关联的 MMD 模型，请确保选中 MMD 模型对象")
+    root = model.findRoot(active_obj)
+    if context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    changed = 0
+    removed_names = set()
+    merged = {}
+    for mesh_obj in mesh_objects_list:
+        stats = analyze_mesh(mesh_obj, threshold)
+        if not stats:
+            continue
+        report(mesh_obj, stats)
+        if action == 'DELETE_EMPTY':
+            names = delete_empty(mesh_obj, stats)
+            removed_names.update(names)
+            changed += len(names)
+        elif action == 'MERGE_DUPLICATES':
+            aliases = merge_duplicates(mesh_obj, stats)
+            merged.update(aliases)
+            changed += len(aliases)
+        elif action == 'SPLIT':
+            morph_obj = split_morph_region(context, mesh_obj, stats)
+            if morph_obj is not None:
+                mmd_logging.info(
+                    f"  分离形态区域 {morph_obj.name}: {len(morph_obj.data.vertices)} 个顶点，"
+                    f"{mesh_obj.name} 剩余 {len(mesh_obj.data.vertices)} 个顶点（无形态键）"
+                )
+                changed += 1
+
+    remove_vertex_morph_entries(root, removed_names)
+    retarget_vertex_morph_entries(root, merged)
+    view_layer = context.view_layer
+    view_layer.objects.active = active_obj
+    return changed
+
+
+# ------------------------------
+# 5. 操作器类
+# ------------------------------
+class ShapeKeyAudit(bpy.types.Operator):
+    """分析形态键的受影响顶点数和内存，并按选择删除空形态键、合并重复形态键或分离形态区域"""
+    bl_idname = "mmd_tools_helper.shape_key_audit"
+    bl_label = "Shape Key Audit"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Shape Key Audit", context.scene):
+                changed = main(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        if context.scene.shape_key_audit_action == 'ANALYZE':
+            self.report({'INFO'}, "Shape key report written to console")
+        else:
+            self.report({'INFO'}, f"{changed} shape keys/meshes changed")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 6. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.shape_key_audit_action = bpy.props.EnumProperty(
+        items=[
+            ('ANALYZE', 'Analyze Only', '只输出每个形态键的受影响顶点数和内存'),
+            ('DELETE_EMPTY', 'Delete Empty Morphs', '删除没有任何位移的形态键'),
+            ('MERGE_DUPLICATES', 'Merge Duplicate Morphs', '删除与其它形态键位移完全相同的形态键，动画、驱动器和 MMD Morph 引用改指向保留的形态键'),
+            ('SPLIT', 'Split Morph Region', '把受形态键影响的面分离为独立网格，其余部分不再保存形态键'),
+        ],
+        name="Shape Key Action",
+        default='ANALYZE'
+    )
+    bpy.types.Scene.shape_key_audit_threshold = bpy.props.FloatProperty(
+        name="Threshold",
+        description="位移小于此值的顶点视为不受影响",
+        default=1e-5,
+        min=0.0,
+        precision=6
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("shape_key_audit_action", "shape_key_audit_threshold"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(ShapeKeyAuditPanel)
+    bpy.utils.register_class(ShapeKeyAudit)
+
+
+def unregister():
+    bpy.utils.unregister_class(ShapeKeyAudit)
+    bpy.utils.unregister_class(ShapeKeyAuditPanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,392 @@
+import bpy
+import numpy as np
+from . import model
+from . import mmd_logging
+from . import datablock_dedup
+
+# 漫反射纹理节点：mmd_tools 的 mmd_base_tex，或 toon_textures_to_node_editor_shader 生成的“漫反射纹理”
+DIFFUSE_NODE_NAMES = ("mmd_base_tex",)
+DIFFUSE_NODE_LABELS = ("漫反射纹理",)
+
+# UV 超出 [0, 1] 的容差；超出更多的材质依赖纹理平铺，不能放入图集
+UV_TOLERANCE = 1e-3
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class TextureAtlasPanel(bpy.types.Panel):
+    """把 MMD 模型的漫反射纹理打包成图集并合并兼容材质"""
+    bl_idname = "OBJECT_PT_mmd_texture_atlas"
+    bl_label = "MMD Texture Atlas"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.label(text="Bake Texture Atlas", icon="TEXTURE")
+        layout.prop(scene, "texture_atlas_max_size")
+        layout.prop(scene, "texture_atlas_padding")
+        row = layout.row()
+        row.operator("mmd_tools_helper.texture_atlas", text="Build Atlas and Merge Materials")
+        row.enabled = context.active_object is not None
+
+
+# ------------------------------
+# 2. 材质分析
+# ------------------------------
+def find_diffuse_node(material):
+    """查找材质的漫反射纹理节点"""
+    if not material.use_nodes or material.node_tree is None:
+        return None
+    nodes = material.node_tree.nodes
+    for name in DIFFUSE_NODE_NAMES:
+        node = nodes.get(name)
+        if node is not None and node.type == 'TEX_IMAGE':
+            return node
+    for node in nodes:
+        if node.type == 'TEX_IMAGE' and node.label in DIFFUSE_NODE_LABELS:
+            return node
+    return None
+
+
+def atlas_group_key(material, diffuse_node):
+    """除漫反射纹理外全部参数相同（toon/sphere/颜色/混合方式）的材质才能合并"""
+    sig = [datablock_dedup.rna_signature(material)]
+    if hasattr(material, "mmd_material"):
+        sig.append(datablock_dedup.rna_signature(material.mmd_material))
+    sig.append(datablock_dedup.node_tree_signature(material.node_tree, ignore_image_node=diffuse_node))
+    return repr(sig)
+
+
+def material_morph_names(root):
+    """被材质 Morph 引用的材质需要独立控制，不参与合并"""
+    names = set()
+    if root is None or not hasattr(root, "mmd_root"):
+        return names
+    for morph in root.mmd_root.material_morphs:
+        for data in morph.data:
+            # material 只是按 material_id 查找的 getter，直接读取指针
+            material = getattr(data, "material_data", None)
+            name = material.name if material is not None else getattr(data, "material", "")
+            if name:
+                names.add(name)
+    return names
+
+
+def next_material_id():
+    """mmd_tools 按 material_id 查找材质（材质 Morph、导出），复制的材质必须使用新的 id"""
+    ids = [mat.mmd_material.material_id for mat in bpy.data.materials if hasattr(mat, "mmd_material")]
+    return max(ids, default=-1) + 1
+
+
+def loop_uvs_and_materials(mesh):
+    """批量读取活动 UV 层的全部 UV 以及每个环（loop）所属面的材质索引"""
+    uv_layer = mesh.uv_layers.active
+    uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+    uv_layer.data.foreach_get("uv", uvs)
+    poly_mat = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", poly_mat)
+    loop_total = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+    # 面的环按顺序连续存放，按 loop_total 展开即得每个环的材质索引
+    loop_mat = np.repeat(poly_mat, loop_total)
+    return uvs.reshape(-1, 2), loop_mat
+
+
+def tiled_slots(uvs, loop_mat):
+    """UV 超出 [0, 1]（依赖平铺）的材质槽索引集合"""
+    outside = ((uvs < -UV_TOLERANCE) | (uvs > 1.0 + UV_TOLERANCE)).any(axis=1)
+    return set(np.unique(loop_mat[outside]).tolist())
+
+
+def collect_candidates(mesh_objects_list, excluded_names, max_size, padding):
+    """返回 {材质: 漫反射节点}，只包含可以放入图集的材质"""
+    candidates = {}
+    rejected = set()
+    for mesh_obj in mesh_objects_list:
+        mesh = mesh_obj.data
+        if mesh.uv_layers.active is None:
+            rejected.update(m for m in mesh.materials if m)
+            continue
+        uvs, loop_mat = loop_uvs_and_materials(mesh)
+        bad_slots = tiled_slots(uvs, loop_mat)
+        for idx, mat in enumerate(mesh.materials):
+            if mat is None or mat in rejected:
+                continue
+            node = find_diffuse_node(mat)
+            image = node.image if node else None
+            if (
+                idx in bad_slots
+                or image is None
+                or mat.name in excluded_names
+                or image.size[0] == 0
+                or max(image.size) + 2 * padding > max_size
+            ):
+                rejected.add(mat)
+                candidates.pop(mat, None)
+                continue
+            candidates[mat] = node
+    return candidates
+
+
+# ------------------------------
+# 3. 矩形打包与像素拷贝（NumPy）
+# ------------------------------
+def pack_rects(sizes, max_size, padding):
+    """货架（shelf）打包：按高度降序逐行摆放，放不下时开新页
+
+    sizes 为 (n, 2) 的 (宽, 高) 数组；返回 (pages, positions, page_sizes)，
+    positions 为不含边距的左下角像素坐标，page_sizes 为每页的 2 的幂尺寸。
+    """
+    n = len(sizes)
+    pages = np.zeros(n, dtype=np.int32)
+    positions = np.zeros((n, 2), dtype=np.int32)
+    padded = sizes + 2 * padding
+    order = np.lexsort((-padded[:, 0], -padded[:, 1]))
+
+    page = x = y = shelf_h = 0
+    used = [[0, 0]]
+    for i in order.tolist():
+        w, h = int(padded[i, 0]), int(padded[i, 1])
+        if x + w > max_size:
+            x, y, shelf_h = 0, y + shelf_h, 0
+        if y + h > max_size:
+            page += 1
+            x = y = shelf_h = 0
+            used.append([0, 0])
+        pages[i] = page
+        positions[i] = (x + padding, y + padding)
+        x += w
+        shelf_h = max(shelf_h, h)
+        used[page][0] = max(used[page][0], x)
+        used[page][1] = max(used[page][1], y + h)
+
+    page_sizes = np.array([[_next_pow2(u[0]), _next_pow2(u[1])] for u in used], dtype=np.int32)
+    return pages, positions, page_sizes
+
+
+def _next_pow2(v):
+    return 1 << max(0, int(v) - 1).bit_length()
+
+
+def read_image_pixels(image):
+    """批量读取图像像素，返回 (高, 宽, 4) 数组（行序自下而上，与 UV 方向一致）"""
+    width, height = image.size
+    channels = image.channels
+    buf = np.empty(width * height * channels, dtype=np.float32)
+    image.pixels.foreach_get(buf)
+    pixels = buf.reshape(height, width, channels)
+    if channels == 4:
+        return pixels
+    rgba = np.ones((height, width, 4), dtype=np.float32)
+    rgba[:, :, :min(channels, 3)] = pixels[:, :, :3]
+    return rgba
+
+
+def blit(atlas, pixels, x, y, padding):
+    """把纹理拷贝到图集，边距用边缘像素外扩以避免采样渗色"""
+    h, w = pixels.shape[:2]
+    if padding:
+        pixels = np.pad(pixels, ((padding, padding), (padding, padding), (0, 0)), mode="edge")
+    atlas[y - padding:y + h + padding, x - padding:x + w + padding] = pixels
+
+
+# ------------------------------
+# 4. 主流程
+# ------------------------------
+def build_atlases(model_name, images, max_size, padding):
+    """把图像列表打包到若干图集页，返回 (图集图像列表, {图像: (页, x, y, 宽, 高)})"""
+    sizes = np.array([img.size[:] for img in images], dtype=np.int32).reshape(-1, 2)
+    pages, positions, page_sizes = pack_rects(sizes, max_size, padding)
+
+    buffers = [np.zeros((h, w, 4), dtype=np.float32) for w, h in page_sizes.tolist()]
+    placement = {}
+    for i, img in enumerate(images):
+        x, y = positions[i].tolist()
+        w, h = sizes[i].tolist()
+        blit(buffers[pages[i]], read_image_pixels(img), x, y, padding)
+        placement[img] = (int(pages[i]), x, y, w, h)
+
+    atlases = []
+    for p, buf in enumerate(buffers):
+        h, w = buf.shape[:2]
+        atlas = bpy.data.images.new(f"{model_name}_atlas_{p}", w, h, alpha=True)
+        atlas.pixels.foreach_set(buf.ravel())
+        atlas.pack()
+        atlases.append(atlas)
+        mmd_logging.info(f"图集 {atlas.name}: {w}x{h}")
+    return atlases, placement
+
+
+def remap_mesh(mesh_obj, slot_transform, slot_material):
+    """批量变换 UV 并把材质槽替换为合并后的材质（重复的槽合并为一个）"""
+    mesh = mesh_obj.data
+    uvs, loop_mat = loop_uvs_and_materials(mesh)
+    slot_count = len(mesh.materials)
+
+    # 每个槽的 UV 变换：uv' = uv * scale + offset（未参与图集的槽保持不变）
+    scale = np.ones((max(slot_count, 1), 2), dtype=np.float32)
+    offset = np.zeros((max(slot_count, 1), 2), dtype=np.float32)
+    for idx, (s, o) in slot_transform.items():
+        scale[idx] = s
+        offset[idx] = o
+    if slot_transform:
+        # 容差内的越界 UV 先夹到 [0, 1]，避免采样到相邻纹理
+        moved = np.isin(loop_mat, list(slot_transform))
+        uvs = np.where(moved[:, None], np.clip(uvs, 0.0, 1.0), uvs)
+        uvs = uvs * scale[loop_mat] + offset[loop_mat]
+        mesh.uv_layers.active.data.foreach_set("uv", uvs.ravel())
+
+    # 材质槽去重并重映射面的材质索引
+    new_materials = []
+    remap = np.zeros(max(slot_count, 1), dtype=np.int32)
+    for idx in range(slot_count):
+        mat = slot_material.get(idx, mesh.materials[idx])
+        if mat in new_materials:
+            remap[idx] = new_materials.index(mat)
+        else:
+            remap[idx] = len(new_materials)
+            new_materials.append(mat)
+
+    poly_mat = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", poly_mat)
+    mesh.materials.clear()
+    for mat in new_materials:
+        mesh.materials.append(mat)
+    mesh.polygons.foreach_set("material_index", remap[poly_mat])
+    mesh.update()
+
+
+def main(context):
+    scene = context.scene
+    active_obj = context.view_layer.objects.active
+    max_size = int(scene.texture_atlas_max_size)
+    padding = scene.texture_atlas_padding
+
+    mesh_objects_list = model.find_MMD_MeshesList(active_obj)
+    if not mesh_objects_list:
+        raise Exception("未找到关联的 MMD 模型，请确保选中 MMD 模型对象")
+    root = model.findRoot(active_obj)
+    model_name = root.name if root else active_obj.name
+
+    material_count_before = len({m for o in mesh_objects_list for m in o.data.materials if m})
+    candidates = collect_candidates(mesh_objects_list, material_morph_names(root), max_size, padding)
+    if not candidates:
+        raise Exception("没有可以放入图集的材质（需有漫反射纹理且 UV 在 0~1 范围内）")
+
+    # 1. 打包全部漫反射纹理
+    images = list(dict.fromkeys(node.image for node in candidates.values()))
+    atlases, placement = build_atlases(model_name, images, max_size, padding)
+
+    # 2. 按 (兼容分组, 图集页) 合并材质
+    merged = {}
+    material_map = {}
+    uv_transform = {}
+    for mat, node in candidates.items():
+        page, x, y, w, h = placement[node.image]
+        atlas = atlases[page]
+        aw, ah = atlas.size
+        uv_transform[mat] = ((w / aw, h / ah), (x / aw, y / ah))
+
+        key = (atlas_group_key(mat, node), page)
+        if key not in merged:
+            new_mat = mat.copy()
+            new_mat.name = f"{model_name}_atlas_mat_{len(merged)}"
+            if hasattr(new_mat, "mmd_material"):
+                new_mat.mmd_material.material_id = next_material_id()
+            find_diffuse_node(new_mat).image = atlas
+            merged[key] = new_mat
+        material_map[mat] = merged[key]
+
+    # 3. 批量重写每个网格的 UV 和材质槽
+    for mesh_obj in mesh_objects_list:
+        mesh = mesh_obj.data
+        slot_transform = {}
+        slot_material = {}
+        for idx, mat in enumerate(mesh.materials):
+            if mat in material_map:
+                slot_transform[idx] = uv_transform[mat]
+                slot_material[idx] = material_map[mat]
+        if slot_material:
+            remap_mesh(mesh_obj, slot_transform, slot_material)
+
+    material_count_after = len({m for o in mesh_objects_list for m in o.data.materials if m})
+    mmd_logging.info(
+        f"{len(images)} 张纹理 → {len(atlases)} 张图集，材质 {material_count_before} → {material_count_after}"
+    )
+    return len(atlases), material_count_before, material_count_after
+
+
+# ------------------------------
+# 5. 操作器类
+# ------------------------------
+class TextureAtlas(bpy.types.Operator):
+    """把 MMD 模型的漫反射纹理打包为图集，重映射 UV 并合并兼容材质"""
+    bl_idname = "mmd_tools_helper.texture_atlas"
+    bl_label = "Build Texture Atlas"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Texture Atlas", context.scene):
+                atlas_count, before, after = main(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"{atlas_count} atlas image(s), materials {before} → {after}")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 6. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.texture_atlas_max_size = bpy.props.EnumProperty(
+        items=[
+            ('1024', '1024', '图集最大边长 1024'),
+            ('2048', '2048', '图集最大边长 2048'),
+            ('4096', '4096', '图集最大边长 4096'),
+            ('8192', '8192', '图集最大边长 8192'),
+        ],
+        name="Max Atlas Size",
+        default='4096',
+        description="单张图集的最大边长，放不下时生成多张图集"
+    )
+    bpy.types.Scene.texture_atlas_padding = bpy.props.IntProperty(
+        name="Padding",
+        description="纹理之间的边距像素（用边缘像素填充，防止 mipmap 渗色）",
+        default=4,
+        min=0,
+        max=64
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("texture_atlas_max_size", "texture_atlas_padding"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(TextureAtlasPanel)
+    bpy.utils.register_class(TextureAtlas)
+
+
+def unregister():
+    bpy.utils.unregister_class(TextureAtlas)
+    bpy.utils.unregister_class(TextureAtlasPanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()
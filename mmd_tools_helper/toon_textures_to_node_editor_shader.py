@@ -1,28 +1,33 @@
 import bpy
+import numpy as np
 from . import model
 
 # ------------------------------
 # 1. 卡通纹理转颜色梯度工具函数
 # ------------------------------
-def toon_image_to_color_ramp(toon_color_ramp_node, toon_image):
-    """从卡通纹理图像提取颜色信息并配置ColorRamp节点"""
+def toon_gradient_samples(toon_image, sample_count=32):
+    """从卡通纹理图像按像素顺序均匀采样颜色（N×4 数组，从暗到亮）"""
     if not toon_image or not toon_image.pixels:
         raise Warning("卡通纹理图像无效或为空")
 
-    # 提取像素数据（每4个值为一个RGBA像素）
-    pixel_list = []
-    for i in range(0, len(toon_image.pixels), 4):
-        rgba = toon_image.pixels[i:i+4]
-        pixel_list.append(rgba)
+    # 批量读取像素数据（每4个值为一个RGBA像素）
+    pixels = np.empty(len(toon_image.pixels), dtype=np.float32)
+    toon_image.pixels.foreach_get(pixels)
+    pixel_list = pixels.reshape(-1, 4)
 
-    # 采样32个梯度点（平衡精度与性能）
-    sample_count = 32
+    # 默认采样32个梯度点（平衡精度与性能）
     step = max(1, len(pixel_list) // sample_count)
-    gradient_samples = [pixel_list[i] for i in range(0, len(pixel_list), step)]
-    
+    gradient_samples = pixel_list[::step]
+
     # 确保至少有2个采样点（ColorRamp需要首尾）
     if len(gradient_samples) < 2:
-        gradient_samples = [pixel_list[0], pixel_list[-1]]
+        gradient_samples = pixel_list[[0, -1]]
+    return gradient_samples
+
+
+def toon_image_to_color_ramp(toon_color_ramp_node, toon_image):
+    """从卡通纹理图像提取颜色信息并配置ColorRamp节点"""
+    gradient_samples = toon_gradient_samples(toon_image).tolist()
 
     # 清除现有中间控制点（保留首尾）
     while len(toon_color_ramp_node.color_ramp.elements) > 2:
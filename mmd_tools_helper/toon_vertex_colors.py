@@ -0,0 +1,338 @@
+import bpy
+import json
+import numpy as np
+from bpy.app.handlers import persistent
+from . import model
+from . import mmd_logging
+from .toon_textures_to_node_editor_shader import toon_gradient_samples
+
+# 烘焙结果写入的颜色属性（面拐角域，保留硬边法线）
+ATTRIBUTE_NAME = "mmd_toon_lit"
+
+# 已烘焙对象及烘焙时的物体空间灯光方向（场景自定义属性，随 .blend 文件保存）
+STATE_KEY = "mmd_helper_toon_bake_state"
+
+# 灯光方向变化小于此值（单位向量之差的长度）时不重新烘焙
+DIRECTION_TOLERANCE = 1e-4
+
+# 没有卡通纹理时使用的两级明暗
+DEFAULT_RAMP = np.array([[0.5, 0.5, 0.5, 1.0], [1.0, 1.0, 1.0, 1.0]], dtype=np.float32)
+
+# 卡通纹理节点：mmd_tools 的 mmd_toon_tex
+TOON_NODE_NAMES = ("mmd_toon_tex",)
+
+# 网格法线和材质序号的缓存（灯光变化时只重算点积和查表）
+_mesh_cache = {}
+# 写入颜色属性本身也会触发依赖图更新，烘焙期间忽略
+_baking = False
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class ToonVertexColorsPanel(bpy.types.Panel):
+    """把卡通光照烘焙到顶点颜色，在实体模式下全帧率预览"""
+    bl_idname = "OBJECT_PT_mmd_toon_vertex_colors"
+    bl_label = "Baked Toon Vertex Colors"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.label(text="Toon Shading in Solid Mode", icon="SHADING_SOLID")
+        layout.prop(scene, "toon_bake_lamp")
+        layout.prop(scene, "toon_bake_auto_update")
+        layout.prop(scene, "toon_bake_set_shading")
+        layout.prop(scene, "toon_bake_action")
+        row = layout.row()
+        row.operator("mmd_tools_helper.toon_vertex_colors", text="Apply")
+        row.enabled = context.active_object is not None
+
+
+# ------------------------------
+# 2. 卡通明暗计算（纯 numpy）
+# ------------------------------
+def toon_factors(normals, light):
+    """与 create_toon_nodes 的节点链相同：(N·L + 1) / 2（不计阴影）"""
+    return (normals @ light + 1.0) * 0.5
+
+
+def shade(factors, loop_materials, ramps, base_colors):
+    """每个面拐角的颜色：卡通梯度颜色 × 材质漫反射颜色；ramps/base_colors 按材质槽排列
+    全部材质的梯度预先乘以漫反射颜色后拼接成一张表，一次查表完成"""
+    tables = []
+    for slot, ramp in enumerate(list(ramps) + [DEFAULT_RAMP]):  # 末尾为材质槽缺失时的默认梯度
+        base = np.asarray(base_colors[slot] if slot < len(base_colors) else (1.0, 1.0, 1.0, 1.0), dtype=np.float32)
+        table = np.empty((len(ramp), 4), dtype=np.float32)
+        table[:, :3] = ramp[:, :3] * base[:3]
+        table[:, 3] = base[3]
+        tables.append(table)
+    lengths = np.array([len(t) for t in tables], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    slots = np.where((loop_materials >= 0) & (loop_materials < len(ramps)), loop_materials, len(ramps))
+    steps = lengths[slots] - 1
+    # ColorRamp 的 CONSTANT 插值：取位置不大于 factor 的最后一个采样点
+    index = np.clip(np.floor(factors * steps).astype(np.int64), 0, steps)
+    return np.concatenate(tables)[offsets[slots] + index]
+
+
+# ------------------------------
+# 3. 数据读取
+# ------------------------------
+def find_toon_image(material):
+    """材质的卡通纹理：旧版纹理槽 1，或 mmd_tools 的卡通纹理节点"""
+    if material is None:
+        return None
+    slots = getattr(material, "texture_slots", None)
+    if slots and len(slots) > 1 and slots[1] and slots[1].texture and slots[1].texture.type == 'IMAGE':
+        return slots[1].texture.image
+    if material.use_nodes and material.node_tree is not None:
+        for name in TOON_NODE_NAMES:
+            node = material.node_tree.nodes.get(name)
+            if node is not None and node.type == 'TEX_IMAGE' and node.image is not None:
+                return node.image
+    return None
+
+
+def material_ramps(mesh):
+    ramps, base_colors = [], []
+    for material in mesh.materials:
+        image = find_toon_image(material)
+        try:
+            ramps.append(toon_gradient_samples(image) if image is not None else DEFAULT_RAMP)
+        except Warning:
+            ramps.append(DEFAULT_RAMP)
+        base_colors.append(tuple(material.diffuse_color) if material is not None else (1.0, 1.0, 1.0, 1.0))
+    return ramps, base_colors
+
+
+def mesh_arrays(mesh):
+    """面拐角法线（物体空间，含自定义拆分法线）和所属材质槽；网格拓扑变化时重新读取"""
+    key = mesh.as_pointer()
+    cached = _mesh_cache.get(key)
+    if cached is not None and len(cached[0]) == len(mesh.loops):
+        return cached
+    mesh.calc_normals_split()
+    normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+    mesh.loops.foreach_get("normal", normals)
+    polygon_materials = np.empty(len(mesh.polygons), dtype=np.int64)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int64)
+    mesh.polygons.foreach_get("material_index", polygon_materials)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    cached = (normals.reshape(-1, 3), np.repeat(polygon_materials, loop_totals))
+    _mesh_cache[key] = cached
+    return cached
+
+
+def find_lamp(scene):
+    lamp_obj = scene.toon_bake_lamp
+    if lamp_obj is None:
+        lamp_obj = next((obj for obj in scene.objects if obj.type == 'LIGHT' and obj.data.type == 'SUN'), None)
+    return lamp_obj
+
+
+def object_light_direction(obj, lamp_obj):
+    """物体空间中指向灯光的单位向量（太阳光取灯光 +Z 轴，其他灯光取物体原点到灯光的方向）"""
+    if lamp_obj.data.type == 'SUN':
+        direction = lamp_obj.matrix_world.to_3x3().col[2]
+    else:
+        direction = lamp_obj.matrix_world.translation - obj.matrix_world.translation
+    local = obj.matrix_world.to_3x3().inverted_safe() @ direction
+    if local.length < 1e-9:
+        return np.array([0.0, 0.0, 1.0])
+    local.normalize()
+    return np.array(local[:])
+
+
+# ------------------------------
+# 4. 烘焙与状态
+# ------------------------------
+def bake_object(obj, light):
+    mesh = obj.data
+    normals, loop_materials = mesh_arrays(mesh)
+    ramps, base_colors = material_ramps(mesh)
+    colors = shade(toon_factors(normals, light.astype(np.float32)), loop_materials, ramps, base_colors)
+    attribute = mesh.color_attributes.get(ATTRIBUTE_NAME)
+    if attribute is None or attribute.domain != 'CORNER':
+        if attribute is not None:
+            mesh.color_attributes.remove(attribute)
+        attribute = mesh.color_attributes.new(ATTRIBUTE_NAME, 'BYTE_COLOR', 'CORNER')
+    attribute.data.foreach_set("color", colors.ravel())
+    mesh.color_attributes.active_color = attribute
+    mesh.update()
+
+
+def load_state(scene):
+    return json.loads(scene[STATE_KEY]) if STATE_KEY in scene.keys() else {}
+
+
+def save_state(scene, state):
+    if state:
+        scene[STATE_KEY] = json.dumps(state, ensure_ascii=False)
+    elif STATE_KEY in scene.keys():
+        del scene[STATE_KEY]
+
+
+def rebake_changed(scene, state, force=()):
+    """只重新烘焙物体空间灯光方向发生变化的对象（force 中的对象总是烘焙）；返回烘焙的对象数"""
+    global _baking
+    lamp_obj = find_lamp(scene)
+    if lamp_obj is None:
+        return 0
+    baked = 0
+    _baking = True
+    try:
+        for name in list(state):
+            obj = bpy.data.objects.get(name)
+            if obj is None or obj.type != 'MESH':
+                del state[name]
+                continue
+            light = object_light_direction(obj, lamp_obj)
+            if name not in force and np.linalg.norm(light - state[name]) < DIRECTION_TOLERANCE:
+                continue
+            bake_object(obj, light)
+            state[name] = light.tolist()
+            baked += 1
+    finally:
+        _baking = False
+    return baked
+
+
+def clear_object(obj):
+    attribute = obj.data.color_attributes.get(ATTRIBUTE_NAME)
+    if attribute is not None:
+        obj.data.color_attributes.remove(attribute)
+    _mesh_cache.pop(obj.data.as_pointer(), None)
+
+
+@persistent
+def toon_bake_update_handler(scene, depsgraph=None):
+    """灯光（或模型朝向）变化时重新烘焙；其余依赖图更新只比较方向向量"""
+    if _baking or STATE_KEY not in scene.keys() or not scene.toon_bake_auto_update:
+        return
+    state = load_state(scene)
+    if rebake_changed(scene, state):
+        save_state(scene, state)
+
+
+def set_solid_attribute_shading(context):
+    for area in context.screen.areas if context.screen else ():
+        if area.type != 'VIEW_3D':
+            continue
+        for space in area.spaces:
+            if space.type == 'VIEW_3D':
+                space.shading.type = 'SOLID'
+                space.shading.color_type = 'VERTEX'
+                space.shading.light = 'FLAT'
+
+
+def main(context):
+    scene = context.scene
+    mesh_objects = [obj for obj in model.findMeshesList(context.active_object) if obj.type == 'MESH']
+    if not mesh_objects:
+        raise Exception("未找到MMD模型的网格对象，请先选择MMD模型")
+    state = load_state(scene)
+
+    if scene.toon_bake_action == 'CLEAR':
+        for obj in mesh_objects:
+            clear_object(obj)
+            state.pop(obj.name, None)
+        save_state(scene, state)
+        mmd_logging.info(f"已清除 {len(mesh_objects)} 个网格的卡通顶点颜色")
+        return len(mesh_objects)
+
+    if find_lamp(scene) is None:
+        raise Exception("场景中没有太阳灯，请先添加灯光或指定灯光")
+    for obj in mesh_objects:
+        _mesh_cache.pop(obj.data.as_pointer(), None)  # 手动烘焙时重新读取网格
+        state[obj.name] = [0.0, 0.0, 0.0]
+    baked = rebake_changed(scene, state, force={obj.name for obj in mesh_objects})
+    save_state(scene, state)
+    if scene.toon_bake_set_shading:
+        set_solid_attribute_shading(context)
+    loops = sum(len(obj.data.loops) for obj in mesh_objects)
+    mmd_logging.info(f"已烘焙 {baked} 个网格（{loops} 个面拐角）到颜色属性 {ATTRIBUTE_NAME}")
+    return baked
+
+
+# ------------------------------
+# 5. 操作器类
+# ------------------------------
+class ToonVertexColors(bpy.types.Operator):
+    """按灯光方向、法线和卡通纹理梯度计算每个面拐角的卡通明暗，写入颜色属性"""
+    bl_idname = "mmd_tools_helper.toon_vertex_colors"
+    bl_label = "Baked Toon Vertex Colors"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Toon Vertex Colors", context.scene):
+                count = main(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Toon vertex colors: {count} meshes processed")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 6. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.toon_bake_lamp = bpy.props.PointerProperty(
+        type=bpy.types.Object,
+        name="Lamp",
+        description="用于烘焙的灯光（留空则使用场景中的第一个太阳灯）",
+        poll=lambda self, obj: obj.type == 'LIGHT'
+    )
+    bpy.types.Scene.toon_bake_auto_update = bpy.props.BoolProperty(
+        name="Re-bake When Lamp Changes",
+        description="灯光方向或模型朝向变化时自动重新烘焙",
+        default=True
+    )
+    bpy.types.Scene.toon_bake_set_shading = bpy.props.BoolProperty(
+        name="Switch Viewport to Attribute",
+        description="烘焙后把 3D 视图切换为实体模式并显示颜色属性",
+        default=True
+    )
+    bpy.types.Scene.toon_bake_action = bpy.props.EnumProperty(
+        items=[
+            ('BAKE', 'Bake', '计算卡通明暗并写入颜色属性'),
+            ('CLEAR', 'Clear', '删除烘焙的颜色属性并停止自动重新烘焙'),
+        ],
+        name="Action",
+        default='BAKE'
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("toon_bake_lamp", "toon_bake_auto_update", "toon_bake_set_shading", "toon_bake_action"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(ToonVertexColorsPanel)
+    bpy.utils.register_class(ToonVertexColors)
+    for handlers in (bpy.app.handlers.depsgraph_update_post, bpy.app.handlers.frame_change_post):
+        if toon_bake_update_handler not in handlers:
+            handlers.append(toon_bake_update_handler)
+
+
+def unregister():
+    for handlers in (bpy.app.handlers.depsgraph_update_post, bpy.app.handlers.frame_change_post):
+        if toon_bake_update_handler in handlers:
+            handlers.remove(toon_bake_update_handler)
+    bpy.utils.unregister_class(ToonVertexColors)
+    bpy.utils.unregister_class(ToonVertexColorsPanel)
+    unregister_scene_properties()
+    _mesh_cache.clear()
+
+
+if __name__ == "__main__":
+    register()
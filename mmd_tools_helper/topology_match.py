@@ -0,0 +1,160 @@
+import bpy
+import numpy as np
+from . import model
+from . import mmd_logging
+from . import rename_index
+from . import rig_topology
+from . import boneMaps_renamer
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class TopologyMatchPanel(bpy.types.Panel):
+    """骨骼名称无法使用时，按骨架结构把骨骼对应到参考骨架并改为参考骨架的名称"""
+    bl_idname = "OBJECT_PT_mmd_topology_match"
+    bl_label = "Match Bones by Structure"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.label(text="Align Unknown Rig to Reference", icon="OUTLINER_OB_ARMATURE")
+        layout.prop(scene, "topology_reference")
+        layout.prop(scene, "topology_min_confidence")
+        layout.prop(scene, "topology_report_only")
+        row = layout.row()
+        row.operator("mmd_tools_helper.topology_match", text="Match Bones by Structure")
+        row.enabled = context.active_object is not None and scene.topology_reference is not None
+
+
+# ------------------------------
+# 2. 核心逻辑
+# ------------------------------
+def skeleton_from_armature(armature_obj, rolls=False):
+    """批量读取骨骼的名称、父骨骼、头尾位置（骨架空间）；rolls=True 时由 matrix_local 计算扭转角"""
+    return skeleton_from_bones(armature_obj.data.bones, rolls)
+
+
+def skeleton_from_bones(bones, rolls=False):
+    """同 skeleton_from_armature，直接读取骨架数据块的 bones（不需要对象）"""
+    count = len(bones)
+    heads = np.empty(count * 3, dtype=np.float32)
+    tails = np.empty(count * 3, dtype=np.float32)
+    bones.foreach_get("head_local", heads)
+    bones.foreach_get("tail_local", tails)
+    names = bones.keys()
+    index = {name: i for i, name in enumerate(names)}
+    parents = [index[bone.parent.name] if bone.parent else -1 for bone in bones]
+    roll_values = None
+    if rolls:
+        matrices = np.empty(count * 16, dtype=np.float32)
+        bones.foreach_get("matrix_local", matrices)
+        # foreach_get 按列展开矩阵，转置为按行存储后取旋转部分
+        matrices = matrices.reshape(count, 4, 4).transpose(0, 2, 1)[:, :3, :3].astype(np.float64)
+        roll_values = rig_topology.rolls_from_matrices(matrices)
+    return rig_topology.Skeleton(names, parents, heads, tails, roll_values)
+
+
+def propose_mapping(armature_obj, reference_obj, min_confidence=0.0):
+    """{骨骼名称: (参考骨骼名称, 置信度)}；名称已相同的骨骼不列出"""
+    mapping = rig_topology.propose_mapping(
+        skeleton_from_armature(armature_obj), skeleton_from_armature(reference_obj), min_confidence
+    )
+    return {name: target for name, target in mapping.items() if name != target[0]}
+
+
+def main(context):
+    scene = context.scene
+    armature_obj = model.findArmature(context.active_object)
+    reference_obj = scene.topology_reference
+    if armature_obj is None or armature_obj.type != 'ARMATURE':
+        raise Exception("未找到骨架对象")
+    if reference_obj is None or reference_obj.type != 'ARMATURE':
+        raise Exception("请选择参考骨架")
+    if reference_obj == armature_obj:
+        raise Exception("参考骨架不能是要处理的骨架")
+
+    mapping = propose_mapping(armature_obj, reference_obj, scene.topology_min_confidence)
+    for name, (target, confidence) in sorted(mapping.items(), key=lambda m: -m[1][1]):
+        mmd_logging.info(f"{name} → {target}（置信度 {confidence:.2f}）")
+    mmd_logging.info(f"{armature_obj.name}: {len(armature_obj.data.bones)} 个骨骼，"
+                     f"对应到 {reference_obj.name} 的 {len(mapping)} 个")
+    if scene.topology_report_only or not mapping:
+        return len(mapping), 0
+
+    reference_index = rename_index.BoneReferenceIndex(armature_obj)
+    before = rename_index.snapshot(armature_obj)
+    renamed = boneMaps_renamer.rename_from_mapping(armature_obj, {n: t for n, (t, c) in mapping.items()})
+    rename_index.propagate(reference_index, armature_obj, before)
+    return len(mapping), renamed
+
+
+# ------------------------------
+# 3. 操作器类
+# ------------------------------
+class TopologyMatch(bpy.types.Operator):
+    """按层级签名（子骨骼数、链长、相对位置、左右对称）把当前骨架对齐到参考骨架"""
+    bl_idname = "mmd_tools_helper.topology_match"
+    bl_label = "Match Bones by Structure"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Topology Match", context.scene):
+                matched, renamed = main(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Matched {matched} bones, renamed {renamed}")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 4. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.topology_reference = bpy.props.PointerProperty(
+        type=bpy.types.Object,
+        name="Reference",
+        description="命名规范的参考骨架（例如标准 MMD 模型）",
+        poll=lambda self, obj: obj.type == 'ARMATURE'
+    )
+    bpy.types.Scene.topology_min_confidence = bpy.props.FloatProperty(
+        name="Min Confidence",
+        description="低于此置信度的对应不重命名",
+        default=0.5,
+        min=0.0,
+        max=1.0
+    )
+    bpy.types.Scene.topology_report_only = bpy.props.BoolProperty(
+        name="Report Only",
+        description="只在控制台列出对应关系，不重命名",
+        default=True
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("topology_reference", "topology_min_confidence", "topology_report_only"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(TopologyMatchPanel)
+    bpy.utils.register_class(TopologyMatch)
+
+
+def unregister():
+    bpy.utils.unregister_class(TopologyMatch)
+    bpy.utils.unregister_class(TopologyMatchPanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()
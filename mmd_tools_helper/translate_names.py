@@ -0,0 +1,170 @@
+import bpy
+from . import model
+from . import mmd_logging
+from . import performance_mode
+from . import name_translation
+
+# mmd_root 中的 Morph 集合
+MORPH_COLLECTIONS = ("vertex_morphs", "bone_morphs", "material_morphs", "uv_morphs", "group_morphs")
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class TranslateNamesPanel(bpy.types.Panel):
+    """按翻译表批量填写骨骼、Morph 和材质的英文名称（name_e）"""
+    bl_idname = "OBJECT_PT_mmd_translate_names"
+    bl_label = "Translate Names"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.label(text="Fill English Names", icon="TEXT")
+        layout.prop(scene, "translation_table_path")
+        layout.prop(scene, "translation_all_models")
+        row = layout.row()
+        row.prop(scene, "translation_overwrite")
+        row.prop(scene, "translation_allow_partial")
+        layout.operator("mmd_tools_helper.translate_names", text="Translate Names")
+
+
+# ------------------------------
+# 2. 核心逻辑
+# ------------------------------
+def target_roots(context):
+    if context.scene.translation_all_models:
+        return performance_mode.find_roots(context.scene)
+    root = model.findRoot(context.view_layer.objects.active)
+    return [root] if root is not None else []
+
+
+def name_pairs(root):
+    """[(日文名称, 保存英文名称的对象), ...]：骨骼、Morph、材质"""
+    pairs = []
+    armature_obj = model.armature(root)
+    if armature_obj is not None:
+        for pose_bone in armature_obj.pose.bones:
+            mmd_bone = getattr(pose_bone, "mmd_bone", None)
+            if mmd_bone is not None:
+                pairs.append((mmd_bone.name_j or pose_bone.name, mmd_bone))
+    for attr in MORPH_COLLECTIONS:
+        for morph in getattr(root.mmd_root, attr, ()):
+            pairs.append((morph.name, morph))
+    seen = set()
+    for mesh_obj in model.meshes(root):
+        for material in mesh_obj.data.materials:
+            if material is None or material.name in seen or not hasattr(material, "mmd_material"):
+                continue
+            seen.add(material.name)
+            pairs.append((material.mmd_material.name_j or material.name, material.mmd_material))
+    return pairs
+
+
+def translate_root(translator, root, overwrite, allow_partial):
+    """返回 (已填写, 部分翻译未填写, 已有英文名称跳过)"""
+    filled = partial = skipped = 0
+    for name, owner in name_pairs(root):
+        if owner.name_e and not overwrite:
+            skipped += 1
+            continue
+        result = translator.translate(name)
+        if not name_translation.is_translated(result):
+            partial += 1
+            mmd_logging.debug(f"{root.name}: 未能完全翻译 {name} → {result}")
+            if not allow_partial:
+                continue
+        owner.name_e = result
+        filled += 1
+    return filled, partial, skipped
+
+
+def main(context):
+    scene = context.scene
+    roots = target_roots(context)
+    if not roots:
+        raise Exception("未找到 MMD 模型")
+    table_path = bpy.path.abspath(scene.translation_table_path) if scene.translation_table_path else ""
+    translator = name_translation.get_translator(table_path)
+    mmd_logging.info(f"翻译表 {translator.size} 条")
+
+    totals = [0, 0, 0]
+    for root in roots:
+        result = translate_root(translator, root, scene.translation_overwrite, scene.translation_allow_partial)
+        totals = [t + r for t, r in zip(totals, result)]
+        mmd_logging.info(f"{root.name}: 填写 {result[0]}，未完全翻译 {result[1]}，跳过 {result[2]}")
+    return totals
+
+
+# ------------------------------
+# 3. 操作器类
+# ------------------------------
+class TranslateNames(bpy.types.Operator):
+    """用最长匹配翻译表为整个模型填写英文名称"""
+    bl_idname = "mmd_tools_helper.translate_names"
+    bl_label = "Translate Names"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Translate Names", context.scene):
+                filled, partial, skipped = main(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Filled {filled} English names ({partial} incomplete, {skipped} kept)")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 4. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.translation_table_path = bpy.props.StringProperty(
+        name="Table",
+        description="额外的翻译表 CSV（每行 日文,英文），覆盖内置条目",
+        default="",
+        subtype='FILE_PATH'
+    )
+    bpy.types.Scene.translation_all_models = bpy.props.BoolProperty(
+        name="All Models",
+        description="处理场景中全部 MMD 模型",
+        default=False
+    )
+    bpy.types.Scene.translation_overwrite = bpy.props.BoolProperty(
+        name="Overwrite",
+        description="覆盖已有的英文名称",
+        default=False
+    )
+    bpy.types.Scene.translation_allow_partial = bpy.props.BoolProperty(
+        name="Allow Partial",
+        description="未能完全翻译的名称也写入（保留未知字符）",
+        default=False
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("translation_table_path", "translation_all_models", "translation_overwrite",
+                 "translation_allow_partial"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(TranslateNamesPanel)
+    bpy.utils.register_class(TranslateNames)
+
+
+def unregister():
+    bpy.utils.unregister_class(TranslateNames)
+    bpy.utils.unregister_class(TranslateNamesPanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()
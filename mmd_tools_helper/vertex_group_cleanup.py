@@ -0,0 +1,190 @@
+import bpy
+import numpy as np
+from . import model
+from . import mmd_logging
+from . import vertex_weights
+
+# mmd_tools 自身使用的顶点组（边缘缩放、顶点顺序等），即使没有对应骨骼也不能删除
+PROTECTED_PREFIXES = ("mmd_",)
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class VertexGroupCleanupPanel(bpy.types.Panel):
+    """删除无权重或无对应骨骼的顶点组"""
+    bl_idname = "OBJECT_PT_mmd_vertex_group_cleanup"
+    bl_label = "MMD Vertex Group Cleanup"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.label(text="Prune Vertex Groups", icon="GROUP_VERTEX")
+        layout.prop(scene, "vg_cleanup_weight_threshold")
+        layout.prop(scene, "vg_cleanup_remove_empty")
+        layout.prop(scene, "vg_cleanup_remove_orphans")
+        row = layout.row()
+        row.operator("mmd_tools_helper.vertex_group_cleanup", text="Prune Vertex Groups")
+        row.enabled = context.active_object is not None
+
+
+# ------------------------------
+# 2. 核心逻辑
+# ------------------------------
+def protected_group_names(mesh_obj):
+    """被修改器引用的顶点组（实体化、遮罩等），不参与清理"""
+    names = set()
+    for mod in mesh_obj.modifiers:
+        for attr in ("vertex_group", "vertex_group_a", "vertex_group_b", "shell_vertex_group", "rim_vertex_group"):
+            name = getattr(mod, attr, "")
+            if name:
+                names.add(name)
+    return names
+
+
+def find_prunable_groups(mesh_obj, bone_names, threshold, remove_empty, remove_orphans):
+    """返回 (待删除的顶点组索引数组, 对应的分配条数)"""
+    group_count = len(mesh_obj.vertex_groups)
+    if group_count == 0:
+        return np.zeros(0, dtype=np.int32), 0
+
+    counts, groups, weights = vertex_weights.read_weights(mesh_obj)
+    totals = vertex_weights.group_totals(mesh_obj, groups, weights)
+    assigned = vertex_weights.group_assignment_counts(mesh_obj, groups)
+
+    names = [vg.name for vg in mesh_obj.vertex_groups]
+    protected = protected_group_names(mesh_obj)
+    keep_always = np.array(
+        [n in protected or n.startswith(PROTECTED_PREFIXES) for n in names], dtype=bool
+    )
+
+    prune = np.zeros(group_count, dtype=bool)
+    if remove_empty:
+        prune |= totals < threshold
+    if remove_orphans and bone_names is not None:
+        prune |= np.array([n not in bone_names for n in names], dtype=bool)
+    prune &= ~keep_always
+
+    indices = np.flatnonzero(prune)
+    return indices, int(assigned[indices].sum())
+
+
+def prune_vertex_groups(mesh_obj, indices):
+    """一次性删除指定索引的顶点组，返回删除的名称列表"""
+    doomed = [mesh_obj.vertex_groups[int(i)] for i in indices]
+    removed = [vg.name for vg in doomed]
+    for vg in doomed:
+        mesh_obj.vertex_groups.remove(vg)
+    return removed
+
+
+def main(context):
+    scene = context.scene
+    active_obj = context.view_layer.objects.active
+
+    mesh_objects_list = model.find_MMD_MeshesList(active_obj)
+    if not mesh_objects_list:
+        raise Exception("未找到关联的 MMD 模型，请确保选中 MMD 模型对象")
+
+    armature_obj = model.find_MMD_Armature(active_obj)
+    bone_names = set(armature_obj.data.bones.keys()) if armature_obj else None
+    if bone_names is None and scene.vg_cleanup_remove_orphans:
+        mmd_logging.warning("未找到骨架，跳过无对应骨骼顶点组的检查")
+
+    total_groups = 0
+    total_assignments = 0
+    for mesh_obj in mesh_objects_list:
+        indices, assignments = find_prunable_groups(
+            mesh_obj,
+            bone_names,
+            scene.vg_cleanup_weight_threshold,
+            scene.vg_cleanup_remove_empty,
+            scene.vg_cleanup_remove_orphans,
+        )
+        if len(indices) == 0:
+            continue
+        removed = prune_vertex_groups(mesh_obj, indices)
+        total_groups += len(removed)
+        total_assignments += assignments
+        mmd_logging.info(f"{mesh_obj.name}: 删除 {len(removed)} 个顶点组（{assignments} 条权重分配）")
+        for name in removed:
+            mmd_logging.debug(f"  - {name}")
+
+    # 每条权重分配在 Blender 中约占 8 字节（组索引 + 权重）
+    freed_kb = total_assignments * 8 / 1024.0
+    return total_groups, total_assignments, freed_kb
+
+
+# ------------------------------
+# 3. 操作器类
+# ------------------------------
+class VertexGroupCleanup(bpy.types.Operator):
+    """删除 MMD 模型网格中无权重或无对应骨骼的顶点组"""
+    bl_idname = "mmd_tools_helper.vertex_group_cleanup"
+    bl_label = "Prune Vertex Groups"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Vertex Group Cleanup", context.scene):
+                groups, assignments, freed_kb = main(context)
+                mmd_logging.info(f"共删除 {groups} 个顶点组，释放 {assignments} 条权重分配（约 {freed_kb:.1f} KB）")
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Removed {groups} vertex groups, {assignments} weight entries (~{freed_kb:.1f} KB)")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 4. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.vg_cleanup_weight_threshold = bpy.props.FloatProperty(
+        name="Weight Threshold",
+        description="权重总和低于此值的顶点组视为无权重",
+        default=1e-4,
+        min=0.0,
+        precision=5
+    )
+    bpy.types.Scene.vg_cleanup_remove_empty = bpy.props.BoolProperty(
+        name="Remove Zero-Weight Groups",
+        description="删除权重总和低于阈值的顶点组",
+        default=True
+    )
+    bpy.types.Scene.vg_cleanup_remove_orphans = bpy.props.BoolProperty(
+        name="Remove Groups Without Bone",
+        description="删除骨架中没有同名骨骼的顶点组（mmd_ 前缀和修改器引用的顶点组除外）",
+        default=True
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("vg_cleanup_weight_threshold", "vg_cleanup_remove_empty", "vg_cleanup_remove_orphans"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(VertexGroupCleanupPanel)
+    bpy.utils.register_class(VertexGroupCleanup)
+
+
+def unregister():
+    bpy.utils.unregister_class(VertexGroupCleanup)
+    bpy.utils.unregister_class(VertexGroupCleanupPanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()
@@ -0,0 +1,89 @@
+import numpy as np
+
+# 顶点组权重的批量读写工具（供顶点组相关工具共用）
+#
+# Blender 的顶点组权重不支持 foreach_get，这里对每个网格只遍历一次 vertices/groups，
+# 把全部分配展平成 NumPy 数组，后续统计和筛选都在数组上完成：
+#   counts[i]  : 顶点 i 的影响数
+#   groups[k]  : 第 k 条分配的顶点组索引
+#   weights[k] : 第 k 条分配的权重
+# 分配按顶点顺序排列，与 vertices[i].groups 的遍历顺序一致。
+
+
+def read_weights(mesh_obj):
+    """一次遍历读取网格的全部顶点组分配，返回 (counts, groups, weights)"""
+    vertices = mesh_obj.data.vertices
+    counts = np.zeros(len(vertices), dtype=np.int32)
+    pairs = []
+    for i, v in enumerate(vertices):
+        elements = v.groups
+        counts[i] = len(elements)
+        pairs.extend((g.group, g.weight) for g in elements)
+
+    if pairs:
+        flat = np.array(pairs, dtype=np.float64)
+        groups = flat[:, 0].astype(np.int32)
+        weights = flat[:, 1].astype(np.float32)
+    else:
+        groups = np.zeros(0, dtype=np.int32)
+        weights = np.zeros(0, dtype=np.float32)
+    return counts, groups, weights
+
+
+def vertex_indices(counts):
+    """展开每条分配对应的顶点索引"""
+    return np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+
+
+def group_totals(mesh_obj, groups, weights):
+    """每个顶点组的权重总和（长度 = 顶点组数量）"""
+    return np.bincount(groups, weights=weights, minlength=len(mesh_obj.vertex_groups))
+
+
+def group_assignment_counts(mesh_obj, groups):
+    """每个顶点组的分配条数（长度 = 顶点组数量）"""
+    return np.bincount(groups, minlength=len(mesh_obj.vertex_groups))
+
+
+def vertex_offsets(counts):
+    """每个顶点在展平数组中的起始位置"""
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+def influence_histogram(counts):
+    """影响数直方图：hist[n] = 恰好有 n 个影响的顶点数"""
+    return np.bincount(counts) if len(counts) else np.zeros(1, dtype=np.int64)
+
+
+def write_weights(mesh_obj, counts, groups, weights, keep, changed_vertices=None):
+    """按读取顺序批量写回权重：保留项直接改写 weight，丢弃项按顶点组批量移除
+
+    keep 为与 groups/weights 等长的布尔数组；changed_vertices 为需要改写的顶点索引
+    （默认全部）。读取后网格不能被修改，否则遍历顺序会与读取时不一致。
+    """
+    vertices = mesh_obj.data.vertices
+    offsets = vertex_offsets(counts)
+    if changed_vertices is None:
+        changed_vertices = np.arange(len(counts))
+
+    # 先改写权重（此时分配顺序仍与读取时一致）
+    new_weights = weights.tolist()
+    for i in changed_vertices.tolist():
+        k = int(offsets[i])
+        for g in vertices[i].groups:
+            g.weight = new_weights[k]
+            k += 1
+
+    # 再移除丢弃项：每个顶点组一次 remove 调用
+    drop = ~keep
+    if drop.any():
+        drop_verts = vertex_indices(counts)[drop]
+        drop_groups = groups[drop]
+        order = np.argsort(drop_groups, kind="stable")
+        drop_verts = drop_verts[order]
+        drop_groups = drop_groups[order]
+        bounds = np.flatnonzero(np.diff(drop_groups)) + 1
+        for verts, grp in zip(np.split(drop_verts, bounds), drop_groups[np.r_[0, bounds]]):
+            mesh_obj.vertex_groups[int(grp)].remove(verts.tolist())
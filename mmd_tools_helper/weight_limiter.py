@@ -0,0 +1,195 @@
+import bpy
+import numpy as np
+from . import model
+from . import mmd_logging
+from . import vertex_weights
+
+
+# ------------------------------
+# 1. 面板类
+# ------------------------------
+class WeightLimiterPanel(bpy.types.Panel):
+    """限制每个顶点的骨骼影响数并重新规范化权重（MMD BDEF 上限为 4）"""
+    bl_idname = "OBJECT_PT_mmd_weight_limiter"
+    bl_label = "MMD Weight Limiter"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "mmd_tools_helper"
+    bl_context = "objectmode"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        layout.label(text="Limit Bone Influences", icon="MOD_VERTEX_WEIGHT")
+        layout.prop(scene, "weight_limiter_max_influences")
+        layout.prop(scene, "weight_limiter_min_weight")
+        row = layout.row()
+        row.operator("mmd_tools_helper.weight_limiter", text="Limit and Normalize Weights")
+        row.enabled = context.active_object is not None
+
+
+# ------------------------------
+# 2. 核心逻辑（全部在 NumPy 数组上完成）
+# ------------------------------
+def deform_group_mask(mesh_obj, armature_obj):
+    """顶点组索引 → 是否为变形骨骼顶点组"""
+    deform_bones = {b.name for b in armature_obj.data.bones if b.use_deform}
+    return np.array([vg.name in deform_bones for vg in mesh_obj.vertex_groups], dtype=bool)
+
+
+def limit_weights(counts, groups, weights, is_deform, max_influences, min_weight):
+    """保留每个顶点权重最大的 max_influences 个变形影响，丢弃过小权重并重新规范化
+
+    返回 (keep, new_weights, 处理前影响数, 处理后影响数, changed_vertices)；非变形顶点组（如 mmd_edge_scale）原样保留。
+    """
+    vert = vertex_weights.vertex_indices(counts)
+    deform = is_deform[groups] if len(is_deform) else np.zeros(len(groups), dtype=bool)
+
+    # 变形分配按 (顶点, 权重降序) 排序，计算每条分配在所属顶点内的名次
+    d_idx = np.flatnonzero(deform)
+    d_vert = vert[d_idx]
+    d_weight = weights[d_idx]
+    order = np.lexsort((-d_weight, d_vert))
+    d_idx = d_idx[order]
+    d_vert = d_vert[order]
+    d_weight = d_weight[order]
+    d_counts = np.bincount(d_vert, minlength=len(counts))
+    starts = vertex_weights.vertex_offsets(d_counts)[:-1]
+    rank = np.arange(len(d_idx)) - starts[d_vert]
+
+    # 名次超限或权重过小的丢弃；但每个顶点至少保留最大的一个影响
+    d_keep = (rank < max_influences) & ((d_weight >= min_weight) | (rank == 0))
+
+    # 重新规范化保留的影响
+    sums = np.bincount(d_vert[d_keep], weights=d_weight[d_keep], minlength=len(counts))
+    new_weights = weights.copy()
+    kept = d_idx[d_keep]
+    kept_vert = d_vert[d_keep]
+    valid = sums[kept_vert] > 0
+    new_weights[kept[valid]] = (d_weight[d_keep][valid] / sums[kept_vert[valid]]).astype(np.float32)
+
+    keep = np.ones(len(groups), dtype=bool)
+    keep[d_idx[~d_keep]] = False
+
+    changed = (np.abs(new_weights - weights) > 1e-6) | ~keep
+    changed_vertices = np.unique(vert[changed])
+    new_counts = np.bincount(d_vert[d_keep], minlength=len(counts))
+    return keep, new_weights, d_counts, new_counts, changed_vertices
+
+
+def format_histogram(hist):
+    return ", ".join(f"{n}:{int(c)}" for n, c in enumerate(hist) if c)
+
+
+def main(context):
+    scene = context.scene
+    active_obj = context.view_layer.objects.active
+
+    mesh_objects_list = model.find_MMD_MeshesList(active_obj)
+    if not mesh_objects_list:
+        raise Exception("未找到关联的 MMD 模型，请确保选中 MMD 模型对象")
+    armature_obj = model.find_MMD_Armature(active_obj)
+    if armature_obj is None:
+        raise Exception("未找到 MMD 模型的骨架")
+
+    max_influences = scene.weight_limiter_max_influences
+    min_weight = scene.weight_limiter_min_weight
+    before_total = np.zeros(1, dtype=np.int64)
+    after_total = np.zeros(1, dtype=np.int64)
+    changed_total = 0
+
+    for mesh_obj in mesh_objects_list:
+        counts, groups, weights = vertex_weights.read_weights(mesh_obj)
+        if len(groups) == 0:
+            continue
+        is_deform = deform_group_mask(mesh_obj, armature_obj)
+        keep, new_weights, before, after, changed_vertices = limit_weights(
+            counts, groups, weights, is_deform, max_influences, min_weight
+        )
+        hist_before = vertex_weights.influence_histogram(before)
+        hist_after = vertex_weights.influence_histogram(after)
+        mmd_logging.info(f"{mesh_obj.name}: 影响数直方图 前 [{format_histogram(hist_before)}] → 后 [{format_histogram(hist_after)}]")
+
+        if len(changed_vertices):
+            vertex_weights.write_weights(mesh_obj, counts, groups, new_weights, keep, changed_vertices)
+            mesh_obj.data.update()
+        changed_total += len(changed_vertices)
+
+        before_total = _add_histograms(before_total, hist_before)
+        after_total = _add_histograms(after_total, hist_after)
+
+    mmd_logging.info(f"合计影响数直方图 前 [{format_histogram(before_total)}] → 后 [{format_histogram(after_total)}]")
+    return changed_total, before_total, after_total
+
+
+def _add_histograms(a, b):
+    size = max(len(a), len(b))
+    return np.pad(a, (0, size - len(a))) + np.pad(b, (0, size - len(b)))
+
+
+# ------------------------------
+# 3. 操作器类
+# ------------------------------
+class WeightLimiter(bpy.types.Operator):
+    """将 MMD 模型所有网格的骨骼影响数限制到 N 个并重新规范化"""
+    bl_idname = "mmd_tools_helper.weight_limiter"
+    bl_label = "Limit and Normalize Weights"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None
+
+    def execute(self, context):
+        try:
+            with mmd_logging.session("Weight Limiter", context.scene):
+                changed, before, after = main(context)
+        except Exception as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Updated {changed} vertices, max influences {len(before) - 1} → {len(after) - 1}")
+        return {'FINISHED'}
+
+
+# ------------------------------
+# 4. 注册场景属性
+# ------------------------------
+def register_scene_properties():
+    bpy.types.Scene.weight_limiter_max_influences = bpy.props.IntProperty(
+        name="Max Influences",
+        description="每个顶点最多保留的骨骼影响数（MMD BDEF4 为 4）",
+        default=4,
+        min=1,
+        max=8
+    )
+    bpy.types.Scene.weight_limiter_min_weight = bpy.props.FloatProperty(
+        name="Min Weight",
+        description="低于此值的权重被丢弃（每个顶点至少保留一个影响）",
+        default=0.01,
+        min=0.0,
+        max=1.0,
+        precision=3
+    )
+
+
+def unregister_scene_properties():
+    for prop in ("weight_limiter_max_influences", "weight_limiter_min_weight"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+
+
+def register():
+    register_scene_properties()
+    bpy.utils.register_class(WeightLimiterPanel)
+    bpy.utils.register_class(WeightLimiter)
+
+
+def unregister():
+    bpy.utils.unregister_class(WeightLimiter)
+    bpy.utils.unregister_class(WeightLimiterPanel)
+    unregister_scene_properties()
+
+
+if __name__ == "__main__":
+    register()